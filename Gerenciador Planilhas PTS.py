@@ -1,23 +1,84 @@
+import os
+import time
 import streamlit as st
 import pandas as pd
-import re
 from pathlib import Path
 from datetime import datetime
+from functools import wraps
 from uuid import uuid4
 
+from central import actions, enrich, export, history, instrument, retention
+from central.catalog import Catalog
+from central.health import HEALTH_NAME, STATUS_LABELS, HealthChecker, HealthStore
+from central.importer import errors_frame, import_csv, validate
+from central.merge import changed_rows, conflicts_frame, editor_changes
+from central.query import ORDERS, filter_view
+from central.sheet_key import canonical_url, duplicates_frame, sheet_key
+from central.storage import COLS, DATE_FMT, StaleRows, ensure_cols, get_storage
+from central.tag_index import parse_tags
+
 # =========================
 # Configuração geral
 # =========================
 st.set_page_config(page_title="Central de Planilhas", layout="wide")
 
+# Instrumentação do rerun (central/instrument.py); None com CENTRAL_TRACE desligado
+TRACE = instrument.begin("Gerenciador Planilhas PTS.py")
+# True durante o rerun completo; o fim do script o zera, e um fragmento que
+# reroda sozinho (com as globais do último rerun completo) o encontra False
+FULL_RUN = True
+
 BASE_DIR = Path(__file__).parent if "__file__" in globals() else Path.cwd()
-DB_PATH = BASE_DIR / "links_db.csv"
 
-# Colunas do "banco"
-COLS = [
-    "ID", "Nome", "URL", "Categoria", "Tags",
-    "Ativo", "Criado_em", "Arquivado_em"
-]
+def logged_in_email() -> str | None:
+    # e-mail do login do Streamlit (st.login), quando o app tem autenticação configurada
+    return st.user.get("email") if st.user.get("is_logged_in") else None
+
+def current_author() -> str | None:
+    # Quem está gravando, para o histórico: o e-mail do login ou o nome
+    # informado na barra lateral. Sem nenhum dos dois, central/history.py
+    # cai em CENTRAL_AUTHOR ou no usuário do sistema.
+    return logged_in_email() or st.session_state.get("autor") or None
+
+@st.cache_resource
+def shared_catalog() -> Catalog:
+    # Um único snapshot do catálogo por processo, compartilhado (somente
+    # leitura) por todas as sessões. Backend: SQLite por padrão (central/storage.py).
+    # Cada gravação também entra no histórico por linha (links_history.sqlite,
+    # central/history.py); CENTRAL_HISTORY=0 desliga.
+    history.set_author_provider(current_author)
+    return Catalog(get_storage(BASE_DIR), history.open_history(BASE_DIR))
+
+CATALOG = shared_catalog()
+
+@st.cache_resource
+def shared_health() -> HealthChecker:
+    # Verificação de links em segundo plano (central/health.py), uma rodada por
+    # vez no processo. Resultados por ID, válidos por CENTRAL_HEALTH_TTL segundos.
+    return HealthChecker(HealthStore(BASE_DIR / HEALTH_NAME))
+
+HEALTH = shared_health()
+
+@st.cache_resource
+def shared_enricher():
+    # Metadados da planilha (título, dono, última modificação) buscados em
+    # lotes por uma thread do processo (central/enrich.py). Sem cliente
+    # configurado (CENTRAL_DRIVE_TOKEN / CENTRAL_DRIVE_API_KEY) fica desligado.
+    client = enrich.get_client()
+    return enrich.Enricher(CATALOG, client).start() if client else None
+
+ENRICHER = shared_enricher()
+
+@st.cache_resource
+def shared_purger():
+    # Retenção da lixeira (central/retention.py): com CENTRAL_RETENTION_DAYS
+    # definido, uma thread do processo exclui as arquivadas antigas em lotes
+    # pequenos e espaçados, registrando cada lote no log de exclusões.
+    if not retention.DAYS:
+        return None
+    return retention.Purger(CATALOG, BASE_DIR / retention.LOG_NAME).start()
+
+PURGER = shared_purger()
 
 # =========================
 # Estilos (CSS) - Shopee
@@ -125,93 +186,141 @@ st.markdown(
 # =========================
 # Helpers
 # =========================
-def is_valid_gsheets_url(url: str) -> bool:
-    if not isinstance(url, str):
-        return False
-    pattern = r"^https://docs\.google\.com/spreadsheets/d/[^/\s]+"
-    return re.match(pattern, url.strip()) is not None
-
-def ensure_cols(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    for c in COLS:
-        if c not in df.columns:
-            if c in ("Ativo",):
-                df[c] = "True"
-            else:
-                df[c] = ""
-    # IDs
-    mask_no_id = (df["ID"].isna()) | (df["ID"].astype(str).str.strip() == "")
-    if mask_no_id.any():
-        df.loc[mask_no_id, "ID"] = [str(uuid4()) for _ in range(mask_no_id.sum())]
-    # Normalizações
-    df["Ativo"] = df["Ativo"].fillna("True").astype(str)
-    df["Arquivado_em"] = df["Arquivado_em"].fillna("").astype(str)
-    df["Tags"] = df["Tags"].fillna("").astype(str)
-    return df[COLS]
+def io_stat(name: str):
+    # contadores de E/S da sessão (painel de debug na sidebar)
+    stats = st.session_state.setdefault("io_stats", {"reads": 0, "writes": 0, "skipped": 0})
+    stats[name] += 1
+
+def finish_run():
+    # Fim de um rerun (completo ou só de fragmento): se nenhuma gravação
+    # aconteceu desde o fim do anterior, o rerun não tocou o disco e conta
+    # como gravação evitada.
+    stats = st.session_state.setdefault("io_stats", {"reads": 0, "writes": 0, "skipped": 0})
+    if stats["writes"] == st.session_state.get("writes_seen", 0):
+        stats["skipped"] += 1
+    st.session_state.writes_seen = stats["writes"]
 
 def load_db() -> pd.DataFrame:
-    if DB_PATH.exists():
-        df = pd.read_csv(DB_PATH, dtype=str)
-        df = ensure_cols(df)
-        df.to_csv(DB_PATH, index=False)  # grava caso tenha completado colunas
-        return df
-    else:
-        df = pd.DataFrame(columns=COLS)
-        df = ensure_cols(df)
-        df.to_csv(DB_PATH, index=False)
-        return df
+    # só relê o backend quando a versão do catálogo mudou
+    loads = CATALOG.loads
+    with instrument.span("load_db"):
+        df = CATALOG.snapshot()
+    if CATALOG.loads != loads:
+        io_stat("reads")
+    return df
 
 def save_db(df: pd.DataFrame):
+    # substitui o catálogo inteiro (edição em tabela / importação)
+    io_stat("writes")
     df = ensure_cols(df)
-    df.to_csv(DB_PATH, index=False)
+    CATALOG.replace_all(df)
 
-def parse_tags(tags_str: str) -> list[str]:
-    if not isinstance(tags_str, str) or not tags_str.strip():
-        return []
-    return [t.strip() for t in tags_str.split(",") if t.strip()]
+def format_datetime(value) -> str:
+    # datas ficam como datetime64 em memória; texto só na exibição
+    return "" if pd.isna(value) else value.strftime(DATE_FMT)
 
-def unique_sorted(values):
-    vals = sorted({v for v in values if isinstance(v, str) and v.strip()})
-    return vals
+@st.cache_data(max_entries=4, show_spinner=False)
+def export_file(version, filter_key, fmt: str, _df: pd.DataFrame) -> bytes:
+    # Arquivo de exportação (central/export.py). Só é chamado quando alguém
+    # clica em baixar (download_button com data=callable, numa thread à
+    # parte) e fica em cache por versão do catálogo + filtro + formato.
+    return export.payload(_df, fmt)
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def purge_log(stamp) -> pd.DataFrame:
+    # últimas exclusões; relido só quando o arquivo muda (stamp = mtime e tamanho)
+    return retention.read_log(BASE_DIR / retention.LOG_NAME, limit=20)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def health_results(version, health_version, bucket, _df: pd.DataFrame) -> dict:
+    # ID -> resultado válido da verificação. Recalculado quando o catálogo ou
+    # os resultados mudam, e a cada 10 minutos (bucket) para respeitar o TTL.
+    return HEALTH.store.current(_df["ID"], _df["URL"])
 
 # Ações
+def commit_op(op: dict):
+    # Persiste só a operação (linha do journal / linhas do SQLite); o catálogo
+    # deriva o novo snapshot por copy-on-write, sem regravar a tabela.
+    n = CATALOG.commit(op)
+    io_stat("writes")
+    return n
+
+def notify(message: str):
+    # As ações também rodam dentro de callbacks de fragmentos, onde não se
+    # deve desenhar nada; o toast fica guardado e o fragmento das métricas
+    # (que roda após toda gravação) o exibe.
+    st.session_state.setdefault("pending_toasts", []).append(message)
+
+# Arquivar/restaurar/excluir ficam em central/actions.py, o mesmo código
+# usado pela linha de comando (python -m central.cli).
 def archive_ids(ids: list[str]):
     if not ids: return
-    df = st.session_state.df_links.copy()
-    df.loc[df["ID"].isin(ids), "Ativo"] = "False"
-    df.loc[df["ID"].isin(ids), "Arquivado_em"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    save_db(df)
-    st.session_state.df_links = df
-    st.toast(f"🗃️ {len(ids)} link(s) enviados para a lixeira.")
+    actions.archive(CATALOG, ids)
+    io_stat("writes")
+    notify(f"🗃️ {len(ids)} link(s) enviados para a lixeira.")
 
 def restore_ids(ids: list[str]):
     if not ids: return
-    df = st.session_state.df_links.copy()
-    df.loc[df["ID"].isin(ids), "Ativo"] = "True"
-    df.loc[df["ID"].isin(ids), "Arquivado_em"] = ""
-    save_db(df)
-    st.session_state.df_links = df
-    st.toast(f"♻️ {len(ids)} link(s) restaurado(s).")
+    actions.restore(CATALOG, ids)
+    io_stat("writes")
+    notify(f"♻️ {len(ids)} link(s) restaurado(s).")
 
 def permanent_delete_ids(ids: list[str]):
     if not ids: return
-    df = st.session_state.df_links.copy()
-    before = len(df)
-    df = df[~df["ID"].isin(ids)].reset_index(drop=True)
-    save_db(df)
-    st.session_state.df_links = df
-    st.toast(f"🗑️ Excluídos definitivamente {before - len(df)} link(s).")
+    removed = actions.delete(CATALOG, ids)
+    io_stat("writes")
+    notify(f"🗑️ Excluídos definitivamente {removed} link(s).")
+
+def current_health() -> dict:
+    # resultados da verificação de links para o snapshot atual (cache por versão)
+    return health_results(CATALOG.version, HEALTH.store.version, int(time.time() // 600), load_db())
 
 # =========================
-# Estado (upgrade de esquema garantido)
+# Fragmentos e aviso de mudança no catálogo
 # =========================
-if "df_links" not in st.session_state:
-    st.session_state.df_links = load_db()
-else:
-    st.session_state.df_links = ensure_cols(st.session_state.df_links)
-    save_db(st.session_state.df_links)
+# Métricas, formulário de inclusão, filtros e grade de cada aba, e cada card
+# são fragmentos (st.fragment) com chave: interagir com um deles reroda só
+# ele. Quem grava o catálogo num callback chama catalog_changed(), que
+# reroda os fragmentos que dependem do catálogo inteiro (métricas e facetas
+# dos filtros) mais os indicados, sem o rerun completo do app (CSS, header,
+# editor em tabela...). Filtros vêm antes das grades e da exportação porque
+# elas leem o resultado deles (view_act / view_arch no session_state).
+#
+# Um rerun só do fragmento não passa pelo begin/end da instrumentação do
+# script: traced_fragment() embrulha o st.fragment para que esse rerun
+# grave o próprio registro ("Gerenciador Planilhas PTS.py#<fragmento>") e
+# entre no histórico do painel de debug, e fecha a conta de gravações
+# evitadas (finish_run). No rerun completo o fragmento continua contando
+# dentro do registro e da conta do script.
+def remember_trace(record):
+    # últimos 20 registros, para o gráfico do painel de debug
+    if record:
+        trace_history = st.session_state.get("trace_history", []) + [record]
+        st.session_state.trace_history = trace_history[-20:]
+
+def traced_fragment(key: str, name: str | None = None):
+    label = f"Gerenciador Planilhas PTS.py#{name or key}"
+    def wrap(fn):
+        traced = instrument.fragment_trace(label, BASE_DIR, remember_trace)(fn)
+        @wraps(fn)
+        def run(*args, **kwargs):
+            try:
+                return traced(*args, **kwargs)
+            finally:
+                if not FULL_RUN:
+                    finish_run()
+        return st.fragment(run, key=key)
+    return wrap
 
-df = st.session_state.df_links
+CATALOG_DEPENDENTS = ["metrics", "filters_act", "filters_arch", "export"]
+
+def catalog_changed(*keys: str):
+    st.rerun([*CATALOG_DEPENDENTS, *keys])
+
+# =========================
+# Estado (snapshot compartilhado; rerun sem mutação não grava nada)
+# =========================
+df = load_db()
 
 # =========================
 # Header
@@ -226,148 +335,444 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Métricas
-total = len(df)
-ativas = int((df["Ativo"] == "True").sum())
-arquivadas = total - ativas
-m1, m2, m3 = st.columns([1,1,1])
-with m1: st.metric("Total", total)
-with m2: st.metric("Ativas", ativas)
-with m3: st.metric("Arquivadas", arquivadas)
+# Métricas (fragmento: reroda sozinho a cada gravação)
+@traced_fragment("metrics")
+def render_metrics():
+    snapshot = load_db()
+    total = len(snapshot)
+    ativas = int(snapshot["Ativo"].sum())
+    arquivadas = total - ativas
+    m1, m2, m3 = st.columns([1,1,1])
+    with m1: st.metric("Total", total)
+    with m2: st.metric("Ativas", ativas)
+    with m3: st.metric("Arquivadas", arquivadas)
+    for message in st.session_state.pop("pending_toasts", []):
+        st.toast(message)
+
+render_metrics()
 
 st.write("")
 
 # =========================
 # Formulário: Adicionar link
 # =========================
-with st.container(border=True):
-    st.subheader("➕ Adicionar nova planilha")
-    c1, c2, c3, c4 = st.columns([3, 5, 3, 3])
+def save_new_link():
+    # Callback do botão "Salvar link": os campos vêm do session_state. Em
+    # caso de erro só o fragmento do formulário reroda (e mostra a mensagem).
+    ss = st.session_state
+    nome, url = ss.new_name, ss.new_url
+    # chave canônica (planilha + aba): a mesma planilha não entra duas vezes
+    key = sheet_key(url)
+    owner = CATALOG.keys.owner(key)
+    if not nome.strip() or not url.strip():
+        ss.new_link_msg = ("error", "Informe **Nome** e **URL**.")
+    elif key is None:
+        ss.new_link_msg = ("error", "URL inválida. Use um link de Google Sheets (começando com `https://docs.google.com/spreadsheets/d/`).")
+    elif owner is not None:
+        existing = load_db().set_index("ID").at[owner, "Nome"]
+        ss.new_link_msg = ("error", f"Essa planilha/aba já está cadastrada como **{existing}**.")
+    else:
+        new_row = {
+            "ID": str(uuid4()),
+            "Nome": nome.strip(),
+            "URL": canonical_url(key),
+            "Categoria": ss.new_category.strip(),
+            "Tags": ss.new_tags.strip(),
+            "Ativo": "True" if ss.new_active else "False",
+            "Criado_em": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "Arquivado_em": "" if ss.new_active else datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        commit_op({"op": "add", "rows": [new_row]})
+        ss.new_link_msg = ("success", f"✅ '{nome}' adicionada.")
+        catalog_changed("add_link", "grid_act" if ss.new_active else "grid_arch")
 
-    with c1:
-        nome = st.text_input("Nome", placeholder="Ex.: Controle de Frota")
+@traced_fragment("add_link")
+def render_add_form():
+    with st.container(border=True):
+        st.subheader("➕ Adicionar nova planilha")
+        c1, c2, c3, c4 = st.columns([3, 5, 3, 3])
 
-    with c2:
-        url = st.text_input("URL do Google Sheets", placeholder="https://docs.google.com/spreadsheets/d/…")
+        with c1:
+            st.text_input("Nome", placeholder="Ex.: Controle de Frota", key="new_name")
 
-    with c3:
-        categoria = st.text_input("Categoria", placeholder="Operações, Vendas…")
+        with c2:
+            st.text_input("URL do Google Sheets", placeholder="https://docs.google.com/spreadsheets/d/…", key="new_url")
 
-    with c4:
-        tags = st.text_input("Tags (separe por vírgulas)", placeholder="Shopee, LPA-03, Motoristas")
+        with c3:
+            st.text_input("Categoria", placeholder="Operações, Vendas…", key="new_category")
 
-    col_a, col_b = st.columns([1, 5])
-    with col_a:
-        ativo = st.checkbox("Ativo", value=True)
+        with c4:
+            st.text_input("Tags (separe por vírgulas)", placeholder="Shopee, LPA-03, Motoristas", key="new_tags")
 
-    if st.button("Salvar link", type="primary"):
-        if not nome.strip() or not url.strip():
-            st.error("Informe **Nome** e **URL**.")
-        elif not is_valid_gsheets_url(url):
-            st.error("URL inválida. Use um link de Google Sheets (começando com `https://docs.google.com/spreadsheets/d/`).")
-        else:
-            new_row = {
-                "ID": str(uuid4()),
-                "Nome": nome.strip(),
-                "URL": url.strip(),
-                "Categoria": categoria.strip(),
-                "Tags": tags.strip(),
-                "Ativo": "True" if ativo else "False",
-                "Criado_em": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "Arquivado_em": "" if ativo else datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            }
-            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-            save_db(df)
-            st.session_state.df_links = df
-            st.success(f"✅ '{nome}' adicionada.")
+        col_a, col_b = st.columns([1, 5])
+        with col_a:
+            st.checkbox("Ativo", value=True, key="new_active")
+
+        st.button("Salvar link", type="primary", on_click=save_new_link)
+        message = st.session_state.pop("new_link_msg", None)
+        if message:
+            kind, text = message
+            getattr(st, kind)(text)
+
+render_add_form()
+
+# =========================
+# Autor das alterações (sidebar)
+# =========================
+# Sem login configurado, o nome digitado aqui assina as gravações no histórico.
+if CATALOG.history is not None and not logged_in_email():
+    st.sidebar.text_input("👤 Seu nome (para o histórico)", key="autor")
+
+# =========================
+# Saúde dos links (sidebar)
+# =========================
+health = current_health()
+with st.sidebar.expander("🩺 Saúde dos links"):
+    status_counts = pd.Series([r["status"] for r in health.values()]).value_counts()
+    for status, label in STATUS_LABELS.items():
+        n = len(df) - len(health) if status == "unchecked" else int(status_counts.get(status, 0))
+        st.write(f"{label}: **{n}**")
+    if HEALTH.running:
+        st.progress(HEALTH.done / max(HEALTH.total, 1), text=f"Verificando… {HEALTH.done}/{HEALTH.total}")
+        st.button("Atualizar", key="health_refresh")
+    elif st.button("Verificar links pendentes", disabled=len(health) == len(df)):
+        # só as linhas sem resultado válido (nunca verificadas, vencidas ou com URL alterada)
+        HEALTH.start(HEALTH.store.stale(df))
+        st.rerun()
+
+# =========================
+# Metadados das planilhas (sidebar)
+# =========================
+with st.sidebar.expander("🔄 Metadados das planilhas"):
+    if ENRICHER is None:
+        st.caption("Desligado: defina `CENTRAL_DRIVE_TOKEN` ou `CENTRAL_DRIVE_API_KEY`.")
+    else:
+        st.write(f"Com metadados: **{int(df['Metadados_em'].notna().sum())}** de {len(df)}")
+        if ENRICHER.busy:
+            st.caption(f"Buscando… {ENRICHER.pending} planilha(s) na fila.")
+        elif ENRICHER.last_run:
+            st.caption(f"Última rodada: {ENRICHER.last_run:%d/%m %H:%M}")
+        if ENRICHER.last_error:
+            st.warning(ENRICHER.last_error)
+        # só antecipa a próxima rodada; a thread busca apenas o que está vencido
+        if st.button("Atualizar agora", key="enrich_now", disabled=ENRICHER.busy):
+            ENRICHER.refresh()
+
+# =========================
+# Retenção da lixeira (sidebar)
+# =========================
+with st.sidebar.expander("🧹 Retenção da lixeira"):
+    if PURGER is None:
+        st.caption("Desligada: defina `CENTRAL_RETENTION_DAYS` para excluir as arquivadas antigas.")
+    else:
+        st.write(f"Regra: {PURGER.rule}. Na fila: **{len(retention.due(df, PURGER.days))}**")
+        if PURGER.busy:
+            st.caption("Excluindo em lotes…")
+        elif PURGER.last_run:
+            st.caption(f"Última rodada: {PURGER.last_run:%d/%m %H:%M} · "
+                       f"{PURGER.removed} excluída(s) desde o início")
+        if PURGER.last_error:
+            st.warning(PURGER.last_error)
+        if st.button("Rodar agora", key="purge_now", disabled=PURGER.busy):
+            PURGER.refresh()
+    log_path = BASE_DIR / retention.LOG_NAME
+    stamp = (log_path.stat().st_mtime_ns, log_path.stat().st_size) if log_path.exists() else None
+    recent = purge_log(stamp)
+    if len(recent):
+        st.caption("Últimas exclusões")
+        st.dataframe(recent, hide_index=True, use_container_width=True)
 
 # =========================
 # Abas
 # =========================
-tab1, tab2, tab3 = st.tabs(["📁 Ativas", "🗃️ Arquivadas (Lixeira)", "🧾 Tabela & Importar"])
+tab1, tab2, tab3, tab4 = st.tabs(["📁 Ativas", "🗃️ Arquivadas (Lixeira)", "🧾 Tabela & Importar", "🕓 Histórico"])
 
 # ============
 # Filtros comuns
 # ============
-def filtros_basicos(df_base: pd.DataFrame, show_archived: bool = False) -> pd.DataFrame:
+@instrument.traced("filtros")
+def filtros_basicos(show_archived: bool = False):
+    # Fragmento por aba. O resultado vai para view_{scope} no session_state,
+    # de onde o fragmento da grade o lê; mudar um filtro reroda só os dois
+    # fragmentos desta aba.
+    scope = "arch" if show_archived else "act"
+    snapshot = load_db()
+    df_base = snapshot[~snapshot["Ativo"]] if show_archived else snapshot[snapshot["Ativo"]]
+    rerun_tab = lambda: st.rerun([f"filters_{scope}", f"batch_{scope}", f"grid_{scope}", "export"])
+
     with st.container(border=True):
         st.subheader("🔎 Buscar e filtrar")
 
-        # Proteções para esquemas antigos
-        df_base = df_base.copy()
-        if "Categoria" not in df_base.columns: df_base["Categoria"] = ""
-        if "Tags" not in df_base.columns: df_base["Tags"] = ""
-
-        all_cats = unique_sorted(df_base["Categoria"].dropna().astype(str).tolist())
-        all_tags = sorted({t for s in df_base["Tags"].fillna("").astype(str) for t in parse_tags(s)})
+        # Facetas: opções e contagens vêm do catálogo (uma vez por versão).
+        # As contagens são refinadas pela seleção atual, lida do session_state
+        # antes de desenhar os widgets (o valor já foi atualizado pelo rerun).
+        facets = CATALOG.facets
+        termo = st.session_state.get(f"search_{scope}", "")
+        # busca: índice de trigramas (ignora acentos/caixa, tolera erros de digitação)
+        scores = CATALOG.search.search(termo) if termo else {}
+        searched = df_base[df_base["ID"].isin(list(scores))] if termo else df_base
+        cat_counts, tag_counts = facets.refine(
+            (scope, termo), searched,
+            st.session_state.get(f"cat_{scope}", []),
+            st.session_state.get(f"tag_{scope}", []),
+        )
 
         fc1, fc2 = st.columns([3, 2])
         with fc1:
             termo = st.text_input(
-                "Buscar por nome",
-                placeholder="Digite um trecho do nome…",
-                key=f"search_{'arch' if show_archived else 'act'}"
+                "Buscar (nome, categoria, tags)",
+                placeholder="Digite um trecho do nome, categoria ou tag…",
+                key=f"search_{scope}",
+                on_change=rerun_tab,
             )
         with fc2:
             order = st.selectbox(
                 "Ordenar por",
-                ["Mais recentes", "Mais antigas", "Nome (A→Z)", "Nome (Z→A)"],
+                ORDERS,
                 index=0,
-                key=f"order_{'arch' if show_archived else 'act'}"
+                key=f"order_{scope}",
+                on_change=rerun_tab,
             )
 
-        fc3, fc4, fc5 = st.columns([2, 3, 2])
+        fc3, fc4, fc5, fc6 = st.columns([2, 3, 2, 2])
         with fc3:
-            cat_multi = st.multiselect("Categoria", all_cats, key=f"cat_{'arch' if show_archived else 'act'}")
+            cat_multi = st.multiselect(
+                "Categoria",
+                facets.categories(scope),
+                format_func=lambda c: f"{c} ({cat_counts.get(c, 0)})",
+                key=f"cat_{scope}",
+                on_change=rerun_tab,
+            )
         with fc4:
-            tag_multi = st.multiselect("Tags", all_tags, key=f"tag_{'arch' if show_archived else 'act'}")
+            tag_multi = st.multiselect(
+                "Tags",
+                facets.tag_names(scope),
+                format_func=lambda t: f"{t} ({tag_counts.get(t, 0)})",
+                key=f"tag_{scope}",
+                on_change=rerun_tab,
+            )
         with fc5:
             st.write("")
             if show_archived:
                 st.caption("Exibindo apenas **arquivadas**.")
             else:
-                only_active = st.checkbox("Somente ativas", value=True, key="only_active_filter")
-                df_base = df_base[df_base["Ativo"] == "True"] if only_active else df_base
-
-        df_view = df_base.copy()
-
-        # filtros
-        if termo:
-            df_view = df_view[df_view["Nome"].str.contains(termo, case=False, na=False)]
-        if cat_multi:
-            df_view = df_view[df_view["Categoria"].isin(cat_multi)]
-        if tag_multi:
-            def has_tags(s):
-                tset = set(parse_tags(str(s)))
-                return set(tag_multi).issubset(tset)
-            df_view = df_view[df_view["Tags"].apply(has_tags)]
-
-        # ordenação
-        if "Criado_em" not in df_view.columns:
-            df_view["Criado_em"] = ""
-        if order == "Mais recentes":
-            df_view = df_view.sort_values(by="Criado_em", ascending=False, na_position="last")
-        elif order == "Mais antigas":
-            df_view = df_view.sort_values(by="Criado_em", ascending=True, na_position="last")
-        elif order == "Nome (A→Z)":
-            df_view = df_view.sort_values(by="Nome", ascending=True, na_position="last")
-        else:
-            df_view = df_view.sort_values(by="Nome", ascending=False, na_position="last")
+                only_active = st.checkbox("Somente ativas", value=True, key="only_active_filter", on_change=rerun_tab)
+                df_base = df_base[df_base["Ativo"]] if only_active else df_base
+        with fc6:
+            status_multi = st.multiselect(
+                "Status do link",
+                list(STATUS_LABELS),
+                format_func=STATUS_LABELS.get,
+                key=f"health_{scope}",
+                on_change=rerun_tab,
+            )
+
+        # filtros e ordenação (central/query.py), reaproveitando o resultado da busca
+        df_view = filter_view(df_base, CATALOG, termo, cat_multi, tag_multi, order, scores=scores,
+                              status=status_multi, health=current_health())
 
         st.write(f"Exibindo **{len(df_view)}** planilha(s).")
-        return df_view
+        st.session_state[f"view_{scope}"] = df_view
+        # Chave do filtro para o cache da exportação. O filtro de status
+        # depende também dos resultados da verificação de links.
+        st.session_state[f"filter_key_{scope}"] = (
+            scope, termo, tuple(cat_multi), tuple(tag_multi), order,
+            st.session_state.get("only_active_filter"), tuple(status_multi),
+            HEALTH.store.version if status_multi else None,
+        )
+
+# ============
+# Seleção e ações em lote
+# ============
+# Com "Seleção em lote" ligado, cada card ganha uma caixa de seleção; os IDs
+# marcados ficam em selected_{scope} (um conjunto por aba). As ações viram
+# etapas numa fila compartilhada pelas duas abas (batch_queue), com prévia
+# do resultado (actions.plan), e "Aplicar fila" grava todas as etapas numa
+# única operação batch: uma transação no SQLite, uma linha no journal.
+BATCH_PANELS = ["batch_act", "batch_arch"]
+
+def selected_ids(scope: str) -> set:
+    return st.session_state.setdefault(f"selected_{scope}", set())
+
+def batch_queue() -> list:
+    return st.session_state.setdefault("batch_queue", [])
+
+def toggle_selected(link_id: str, scope: str):
+    # marcar um card só reroda os painéis de lote (o contador)
+    selected_ids(scope).symmetric_difference_update({link_id})
+    st.rerun(BATCH_PANELS)
+
+def set_selection(scope: str, ids: list[str]):
+    # Seleção em massa: a geração nova entra na chave das caixas dos cards,
+    # que são recriadas já com o valor certo.
+    st.session_state[f"selected_{scope}"] = set(ids)
+    st.session_state.selection_gen = st.session_state.get("selection_gen", 0) + 1
+    st.rerun([*BATCH_PANELS, f"grid_{scope}"])
+
+def stage_action(scope: str, kind: str):
+    ss = st.session_state
+    step = {"kind": kind, "ids": sorted(selected_ids(scope))}
+    if kind == "retag":
+        step["add"] = parse_tags(ss.get(f"batch_add_{scope}", ""))
+        step["remove"] = parse_tags(ss.get(f"batch_remove_{scope}", ""))
+    elif kind == "recategorize":
+        step["category"] = ss.get(f"batch_category_{scope}", "")
+    batch_queue().append(step)
+    st.rerun(BATCH_PANELS)
+
+def clear_queue():
+    st.session_state.batch_queue = []
+    st.rerun(BATCH_PANELS)
+
+def apply_queue():
+    snapshot = load_db()
+    ops, preview = actions.plan(snapshot, batch_queue())
+    try:
+        # só grava se nenhum link do lote mudou desde o snapshot do plano
+        actions.commit_batch(CATALOG, ops, snapshot)
+    except StaleRows as e:
+        # nada foi gravado; a fila continua para o usuário conferir a prévia
+        notify(f"⚠️ {len(e.ids)} link(s) do lote mudaram em outra sessão; nada foi gravado. "
+               "Confira a prévia e aplique de novo.")
+        catalog_changed(*BATCH_PANELS, "grid_act", "grid_arch")
+        return
+    io_stat("writes")
+    notify(f"✅ Lote aplicado: {len(preview)} alteração(ões) em {preview['ID'].nunique()} link(s), numa gravação.")
+    st.session_state.batch_queue = []
+    st.session_state.selected_act = set()
+    st.session_state.selected_arch = set()
+    st.session_state.selection_gen = st.session_state.get("selection_gen", 0) + 1
+    catalog_changed(*BATCH_PANELS, "grid_act", "grid_arch")
+
+def describe_step(step: dict) -> str:
+    detail = ""
+    if step["kind"] == "retag":
+        added = ", ".join(step.get("add", [])) or "—"
+        removed = ", ".join(step.get("remove", [])) or "—"
+        detail = f" (+{added} / −{removed})"
+    elif step["kind"] == "recategorize":
+        detail = f" → {step.get('category') or '—'}"
+    return f"{actions.STAGE_LABELS[step['kind']]}{detail}: {len(step['ids'])} link(s)"
+
+def render_batch_panel(archived: bool = False):
+    # Fragmento por aba, entre os filtros e a grade. Sempre chamado (mesmo
+    # vazio) para que a chave continue registrada para os reruns parciais.
+    scope = "arch" if archived else "act"
+    selected = selected_ids(scope)
+    queue = batch_queue()
+    selecting = st.toggle("☑️ Seleção em lote", key=f"batch_mode_{scope}",
+                          on_change=lambda: st.rerun([*BATCH_PANELS, f"grid_{scope}"]))
+    if not selecting and not queue:
+        return
+
+    with st.container(border=True):
+        if selecting:
+            df_view = st.session_state[f"view_{scope}"]
+            s1, s2, s3 = st.columns([2, 2, 2])
+            with s1:
+                st.write(f"**{len(selected)}** selecionada(s)")
+            with s2:
+                st.button(f"Selecionar filtradas ({len(df_view)})", key=f"select_all_{scope}",
+                          on_click=set_selection, args=(scope, df_view["ID"].tolist()))
+            with s3:
+                st.button("Limpar seleção", key=f"select_none_{scope}", on_click=set_selection, args=(scope, []))
+
+            # ações possíveis nesta aba
+            kinds = ["restore", "delete", "retag", "recategorize"] if archived else ["archive", "retag", "recategorize"]
+            a1, a2, a3 = st.columns([2, 3, 1.4])
+            with a1:
+                kind = st.selectbox("Ação", kinds, format_func=actions.STAGE_LABELS.get, key=f"batch_kind_{scope}")
+            with a2:
+                if kind == "retag":
+                    st.text_input("Adicionar tags", placeholder="Shopee, LPA-03", key=f"batch_add_{scope}")
+                    st.text_input("Remover tags", key=f"batch_remove_{scope}")
+                elif kind == "recategorize":
+                    st.text_input("Nova categoria", key=f"batch_category_{scope}")
+            with a3:
+                st.button("➕ Colocar na fila", key=f"batch_stage_{scope}", disabled=not selected,
+                          on_click=stage_action, args=(scope, kind))
+
+        if queue:
+            st.markdown("**Fila de ações** (gravadas juntas, numa única operação)")
+            for n, step in enumerate(queue, 1):
+                st.caption(f"{n}. {describe_step(step)}")
+            # prévia: as etapas aplicadas em sequência sobre o snapshot atual
+            ops, preview = actions.plan(load_db(), queue)
+            with st.expander(f"👀 Prévia: {len(preview)} alteração(ões) em {preview['ID'].nunique()} link(s)"):
+                st.dataframe(preview, use_container_width=True, hide_index=True)
+            confirmed = True
+            if any(step["kind"] == "delete" for step in queue):
+                confirmed = st.checkbox("Entendo que exclusões não podem ser desfeitas", key=f"batch_confirm_{scope}")
+            b1, b2 = st.columns(2)
+            with b1:
+                st.button("✅ Aplicar fila", type="primary", key=f"batch_apply_{scope}", use_container_width=True,
+                          disabled=not ops or not confirmed, on_click=apply_queue)
+            with b2:
+                st.button("Esvaziar fila", key=f"batch_clear_{scope}", use_container_width=True, on_click=clear_queue)
 
 # ============
 # Render de card
 # ============
-def render_card(row: pd.Series, archived: bool = False):
+def card_action(action, link_id: str, keys: list[str], confirm_key: str | None = None):
+    # Callback dos botões do card: grava e reroda só o próprio card, as
+    # métricas, as facetas e a grade da outra aba (para onde o link foi).
+    # Sem a confirmação marcada, o rerun padrão do card mostra o aviso.
+    if confirm_key and not st.session_state.get(confirm_key):
+        return
+    action([link_id])
+    catalog_changed(*keys)
+
+def render_card(row: pd.Series, archived: bool = False, version=None, result: dict | None = None):
+    link_id = row["ID"]
+    own_key = f"card_{link_id}"
+    other_grid = "grid_act" if archived else "grid_arch"
+
+    # Rerun só deste card (depois de uma ação): a linha é relida no snapshot atual.
+    if version != CATALOG.version:
+        snapshot = load_db()
+        match = snapshot[snapshot["ID"] == link_id]
+        if match.empty:
+            st.caption(f"🗑️ **{row['Nome']}** excluída definitivamente.")
+            return
+        row = match.iloc[0]
+
+    # O link saiu desta aba: fica um aviso com "Desfazer" até a grade ser redesenhada.
+    if bool(row["Ativo"]) == archived:
+        with st.container(border=True):
+            if archived:
+                st.caption(f"♻️ **{row['Nome']}** restaurada.")
+            else:
+                st.caption(f"🗃️ **{row['Nome']}** enviada para a lixeira.")
+            undo = archive_ids if archived else restore_ids
+            st.button("↩️ Desfazer", key=f"undo_{link_id}", on_click=card_action,
+                      args=(undo, link_id, [own_key, other_grid]))
+        instrument.count("widgets")
+        return
+
+    # widgets contados onde são criados: 4 no card ativo, 5 no arquivado,
+    # mais a caixa de seleção no modo de seleção em massa
+    instrument.count("cards")
     tags = parse_tags(row.get("Tags", ""))
     st.markdown('<div class="card">', unsafe_allow_html=True)
+    scope = "arch" if archived else "act"
+    if st.session_state.get(f"batch_mode_{scope}"):
+        # a geração na chave recria a caixa depois de uma seleção em massa
+        gen = st.session_state.get("selection_gen", 0)
+        st.checkbox("Selecionar", value=link_id in selected_ids(scope), key=f"pick_{link_id}_{gen}",
+                    on_change=toggle_selected, args=(link_id, scope))
+        instrument.count("widgets")
     st.markdown(f"**{row['Nome']}**")
+    # título real da planilha (enriquecimento), quando difere do nome cadastrado
+    if row["Titulo"] and row["Titulo"] != row["Nome"]:
+        st.caption(f"📄 {row['Titulo']}")
     # badges
     badges = ""
     if row.get("Categoria"):
         badges += f'<span class="badge">{row["Categoria"]}</span>'
+    if result:
+        # status da última verificação; código HTTP e latência no tooltip
+        tip = f'HTTP {result["code"] or "—"} · {result["latency_ms"]} ms'
+        badges += f'<span class="chip" title="{tip}">{STATUS_LABELS[result["status"]]}</span>'
     if badges:
         st.markdown(badges, unsafe_allow_html=True)
 
@@ -377,125 +782,248 @@ def render_card(row: pd.Series, archived: bool = False):
         st.markdown(chips, unsafe_allow_html=True)
 
     # meta
-    criado = row.get("Criado_em", "")
-    arquivado = row.get("Arquivado_em", "")
+    criado = format_datetime(row["Criado_em"])
+    arquivado = format_datetime(row["Arquivado_em"])
     meta = f'<div class="meta">Criado em: {criado}'
     if archived and arquivado:
         meta += f' &nbsp;•&nbsp; Arquivado em: {arquivado}'
+    modificado = format_datetime(row["Modificado_em"])
+    if modificado:
+        meta += f' &nbsp;•&nbsp; Modificada em: {modificado}'
+    if row["Dono"]:
+        meta += f' &nbsp;•&nbsp; Dono: {row["Dono"]}'
     meta += "</div>"
     st.markdown(meta, unsafe_allow_html=True)
 
-    # ações
+    # ações (callbacks: a gravação reroda só os fragmentos afetados)
     c1, c2, c3 = st.columns([1.2, 1, 1.2])
     with c1:
         st.link_button("🔗 Abrir planilha", row["URL"])
+        instrument.count("widgets")
     with c2:
         if not archived:
             # Arquivar com confirmação
             with st.popover("🗃️ Arquivar", use_container_width=True):
                 st.write(f"Arquivar **{row['Nome']}**?")
-                confirm = st.checkbox("Confirmo", key=f"arch_{row['ID']}")
-                if st.button("Confirmar", key=f"arch_btn_{row['ID']}", use_container_width=True):
-                    if confirm:
-                        archive_ids([row["ID"]])
-                        st.rerun()
-                    else:
-                        st.warning("Confirme antes de arquivar.")
+                st.checkbox("Confirmo", key=f"arch_{link_id}")
+                instrument.count("widgets", 3)  # popover, caixa e botão Confirmar
+                if st.button("Confirmar", key=f"arch_btn_{link_id}", use_container_width=True,
+                             on_click=card_action, args=(archive_ids, link_id, [own_key, other_grid]),
+                             kwargs={"confirm_key": f"arch_{link_id}"}):
+                    st.warning("Confirme antes de arquivar.")
         else:
             # Restaurar
-            if st.button("♻️ Restaurar", key=f"restore_{row['ID']}", use_container_width=True):
-                restore_ids([row["ID"]])
-                st.rerun()
+            st.button("♻️ Restaurar", key=f"restore_{link_id}", use_container_width=True,
+                      on_click=card_action, args=(restore_ids, link_id, [own_key, other_grid]))
+            instrument.count("widgets")
     with c3:
         if archived:
             # Exclusão permanente
             with st.popover("🗑️ Excluir definitivamente", use_container_width=True):
                 st.write("Esta ação não pode ser desfeita.")
-                confirm2 = st.checkbox("Entendo os riscos", key=f"del_{row['ID']}")
-                if st.button("Excluir", key=f"del_btn_{row['ID']}", use_container_width=True, type="secondary"):
-                    if confirm2:
-                        permanent_delete_ids([row["ID"]])
-                        st.rerun()
-                    else:
-                        st.warning("Confirme antes de excluir.")
+                st.checkbox("Entendo os riscos", key=f"del_{link_id}")
+                instrument.count("widgets", 3)  # popover, caixa e botão Excluir
+                if st.button("Excluir", key=f"del_btn_{link_id}", use_container_width=True, type="secondary",
+                             on_click=card_action, args=(permanent_delete_ids, link_id, [own_key]),
+                             kwargs={"confirm_key": f"del_{link_id}"}):
+                    st.warning("Confirme antes de excluir.")
         else:
             st.caption("")
 
     st.markdown("</div>", unsafe_allow_html=True)
 
+# ============
+# Paginação da grade de cards
+# ============
+PAGE_SIZES = [12, 24, 48, 96]
+
+def paginate(df_view: pd.DataFrame, key: str) -> pd.DataFrame:
+    # Só a página visível cria widgets. Tamanho e posição ficam no
+    # session_state (chaves por aba) e sobrevivem aos reruns.
+    pc1, pc2, pc3 = st.columns([2, 4, 2])
+    with pc1:
+        size = st.selectbox("Por página", PAGE_SIZES, key=f"page_size_{key}")
+    pages = max(1, -(-len(df_view) // size))
+    if st.session_state.get(f"page_{key}", 1) > pages:
+        st.session_state[f"page_{key}"] = pages  # filtro encolheu o resultado
+    with pc3:
+        page = st.number_input("Página", min_value=1, max_value=pages, step=1, key=f"page_{key}")
+    with pc2:
+        st.caption(f"Página {page} de {pages}")
+    return df_view.iloc[(page - 1) * size: page * size]
+
+@instrument.traced("cards")
+def render_grid(archived: bool = False):
+    # Fragmento por aba: a página de cards do resultado dos filtros.
+    key = "arch" if archived else "act"
+    df_view = st.session_state[f"view_{key}"]
+    if len(df_view) == 0:
+        st.info("Nenhuma planilha arquivada." if archived else "Nenhuma planilha encontrada com os filtros aplicados.")
+        return
+    results = current_health()
+    version = CATALOG.version
+    cols = st.columns(3)
+    for i, (_, row) in enumerate(paginate(df_view, key).iterrows()):
+        with cols[i % 3]:
+            # cada card é um fragmento com chave própria: uma ação redesenha só ele
+            card = traced_fragment(f"card_{row['ID']}", "card")(render_card)
+            card(row, archived=archived, version=version, result=results.get(row["ID"]))
+
 # =========================
 # Tab 1: ATIVAS
 # =========================
 with tab1:
-    df_ativas = df[df["Ativo"] == "True"].copy()
-    view1 = filtros_basicos(df_ativas, show_archived=False)
-
-    if len(view1) == 0:
-        st.info("Nenhuma planilha encontrada com os filtros aplicados.")
-    else:
-        cols = st.columns(3)
-        for i, (_, row) in enumerate(view1.iterrows()):
-            with cols[i % 3]:
-                render_card(row, archived=False)
+    traced_fragment("filters_act")(filtros_basicos)(show_archived=False)
+    traced_fragment("batch_act")(render_batch_panel)(archived=False)
+    traced_fragment("grid_act")(render_grid)(archived=False)
 
 # =========================
 # Tab 2: LIXEIRA (Arquivadas)
 # =========================
 with tab2:
-    df_arch = df[df["Ativo"] != "True"].copy()
-    view2 = filtros_basicos(df_arch, show_archived=True)
-
-    if len(view2) == 0:
-        st.info("Nenhuma planilha arquivada.")
-    else:
-        cols = st.columns(3)
-        for i, (_, row) in enumerate(view2.iterrows()):
-            with cols[i % 3]:
-                render_card(row, archived=True)
+    traced_fragment("filters_arch")(filtros_basicos)(show_archived=True)
+    traced_fragment("batch_arch")(render_batch_panel)(archived=True)
+    traced_fragment("grid_arch")(render_grid)(archived=True)
 
 # =========================
 # Tab 3: TABELA & IMPORTAR
 # =========================
+def reset_table_editor():
+    # o estado do editor é posicional e por página; descarta todas as páginas
+    for key in [k for k in st.session_state if str(k).startswith("table_editor")]:
+        del st.session_state[key]
+
+EXPORT_TARGETS = {"all": "Catálogo inteiro", "act": "Filtro das Ativas", "arch": "Filtro da Lixeira"}
+
+@traced_fragment("export")
+def render_export():
+    # Exportação preguiçosa: este fragmento só registra o download. O arquivo
+    # é gerado quando alguém clica (em blocos, central/export.py) e reaproveitado
+    # enquanto catálogo, filtro e formato não mudarem. Reroda junto com os
+    # filtros e a cada gravação, para o download refletir o recorte atual.
+    f1, f2 = st.columns([1, 2])
+    with f1:
+        fmt = st.selectbox(
+            "Formato",
+            export.available_formats(),
+            format_func=lambda f: export.FORMATS[f][0],
+            key="export_format",
+        )
+    with f2:
+        target = st.radio(
+            "Exportar",
+            list(EXPORT_TARGETS),
+            format_func=EXPORT_TARGETS.get,
+            horizontal=True,
+            key="export_target",
+        )
+    if target == "all":
+        rows, filter_key = load_db(), ("all",)
+    else:
+        rows, filter_key = st.session_state[f"view_{target}"], st.session_state[f"filter_key_{target}"]
+    version = CATALOG.version
+    st.download_button(
+        f"⬇️ Exportar {export.FORMATS[fmt][0]} ({len(rows)} linha(s))",
+        data=lambda: export_file(version, filter_key, fmt, rows),
+        file_name=export.file_name("links_export", fmt),
+        mime=export.FORMATS[fmt][2],
+        on_click="ignore",
+        use_container_width=True,
+    )
+
 with tab3:
     st.subheader("🧾 Edição em tabela")
-    table_df = df.copy()
-    if "Tags" not in table_df.columns:  # proteção extra
-        table_df["Tags"] = ""
-    table_df["Selecionar"] = False  # coluna auxiliar
 
-    edited = st.data_editor(
-        table_df,
-        use_container_width=True,
-        num_rows="dynamic",
-        column_config={
-            "ID": st.column_config.TextColumn(disabled=True, width="small"),
-            "Nome": st.column_config.TextColumn(required=True, width="medium"),
-            "URL": st.column_config.LinkColumn(required=True, width="large"),
-            "Categoria": st.column_config.TextColumn(width="small"),
-            "Tags": st.column_config.TextColumn(help="Separe por vírgulas", width="medium"),
-            "Ativo": st.column_config.SelectboxColumn(options=["True", "False"], width="small"),
-            "Criado_em": st.column_config.TextColumn(width="small", help="Preenchido automaticamente"),
-            "Arquivado_em": st.column_config.TextColumn(width="small"),
-            "Selecionar": st.column_config.CheckboxColumn(help="Marque para ação em lote", width="small"),
-        }
+    # A edição fica presa ao snapshot em que começou (table_base). Sem edições
+    # pendentes, a base acompanha o catálogo; com edições, o salvamento faz
+    # compare-and-swap por linha e mescla o que não conflita (central/merge.py).
+    dirty = any(
+        isinstance(state, dict) and any(state.get(k) for k in ("edited_rows", "added_rows", "deleted_rows"))
+        for key, state in st.session_state.items()
+        if str(key).startswith("table_editor")
     )
+    if "table_base" not in st.session_state or (
+        st.session_state.table_base[0] != CATALOG.version and not dirty
+    ):
+        st.session_state.table_base = (CATALOG.version, df)
+        reset_table_editor()
+    base_version, base_df = st.session_state.table_base
+
+    if base_version != CATALOG.version:
+        b1, b2 = st.columns([4, 1])
+        with b1:
+            st.info("O catálogo mudou desde que você começou a editar. Ao salvar, suas alterações serão mescladas.")
+        with b2:
+            if st.button("🔄 Recarregar tabela", use_container_width=True):
+                del st.session_state.table_base
+                reset_table_editor()
+                st.rerun()
+
+    # Só a página visível vai para o editor. O conjunto de alterações do
+    # editor é posicional, então cada página tem a sua chave.
+    page_df = paginate(base_df, "table")
+    st.caption("Salve as alterações antes de trocar de página.")
+    editor_key = f"table_editor_{st.session_state.page_size_table}_{st.session_state.page_table}"
+
+    # assign não altera o snapshot compartilhado; Categoria vira texto livre no editor
+    table_df = page_df.assign(
+        Categoria=page_df["Categoria"].astype("string"),
+        Selecionar=False,  # coluna auxiliar
+    )
+
+    with instrument.span("data_editor"):
+        edited = st.data_editor(
+            table_df,
+            use_container_width=True,
+            num_rows="dynamic",
+            key=editor_key,
+            column_config={
+                "ID": st.column_config.TextColumn(disabled=True, width="small"),
+                "Nome": st.column_config.TextColumn(required=True, width="medium"),
+                "URL": st.column_config.LinkColumn(required=True, width="large"),
+                "Categoria": st.column_config.TextColumn(width="small"),
+                "Tags": st.column_config.TextColumn(help="Separe por vírgulas", width="medium"),
+                "Ativo": st.column_config.CheckboxColumn(width="small"),
+                "Criado_em": st.column_config.DatetimeColumn(
+                    format="YYYY-MM-DD HH:mm:ss", width="small", help="Preenchido automaticamente"
+                ),
+                "Arquivado_em": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm:ss", width="small"),
+                "Versao": None,  # carimbo de concorrência, oculto
+                # metadados do enriquecimento: somente leitura
+                "Titulo": st.column_config.TextColumn("Título (planilha)", disabled=True, width="medium"),
+                "Dono": st.column_config.TextColumn(disabled=True, width="small"),
+                "Modificado_em": st.column_config.DatetimeColumn(
+                    format="YYYY-MM-DD HH:mm:ss", disabled=True, width="small"
+                ),
+                "Metadados_em": None,
+                "Selecionar": st.column_config.CheckboxColumn(help="Marque para ação em lote", width="small"),
+            }
+        )
 
     a1, a2, a3, a4 = st.columns([1.2, 1.2, 1.4, 2.2])
     with a1:
         if st.button("💾 Salvar alterações", type="primary", use_container_width=True):
-            # Validação básica
-            if edited["Nome"].isna().any() or (edited["Nome"].astype(str).str.strip() == "").any():
-                st.error("Há linhas com **Nome** vazio.")
-            elif (~edited["URL"].apply(is_valid_gsheets_url)).any():
-                st.error("Há URLs inválidas. Corrija antes de salvar.")
+            # Só o conjunto de alterações do editor (editadas, novas, excluídas)
+            # é convertido, validado linha a linha e gravado
+            changes = editor_changes(page_df, st.session_state.get(editor_key) or {})
+            rows = changed_rows(changes, page_df)
+            reasons = validate(rows, CATALOG.keys)
+            invalid = reasons.ne("")
+            if not changes:
+                st.info("Nenhuma alteração para salvar.")
+            elif invalid.any():
+                st.error("Corrija as linhas abaixo antes de salvar.")
+                st.dataframe(
+                    rows.loc[invalid, ["ID", "Nome", "URL"]].assign(Motivo=reasons[invalid]),
+                    use_container_width=True, hide_index=True,
+                )
             else:
-                # garante ID para novas linhas
-                mask_no_id = (edited["ID"].isna()) | (edited["ID"].astype(str).str.strip() == "")
-                if mask_no_id.any():
-                    edited.loc[mask_no_id, "ID"] = [str(uuid4()) for _ in range(mask_no_id.sum())]
-                save_db(edited.drop(columns=["Selecionar"], errors="ignore"))
-                st.session_state.df_links = load_db()
-                st.success("Alterações salvas.")
+                saved, conflicts = CATALOG.commit_changes(changes)
+                io_stat("writes")
+                st.session_state.table_result = (saved, conflicts)
+                del st.session_state.table_base
+                reset_table_editor()
+                st.rerun()
     with a2:
         if st.button("🗃️ Arquivar selecionados", use_container_width=True):
             ids = edited.loc[edited["Selecionar"] == True, "ID"].dropna().astype(str).tolist()
@@ -521,32 +1049,198 @@ with tab3:
                 permanent_delete_ids(ids)
                 st.rerun()
 
+    # Resultado do último salvamento (conflitos como diff por linha/campo)
+    if "table_result" in st.session_state:
+        saved, conflicts = st.session_state.table_result
+        if conflicts:
+            st.warning(
+                f"{saved} alteração(ões) salva(s). {len(conflicts)} linha(s) foram alteradas "
+                "por outra sessão e não foram gravadas:"
+            )
+            st.dataframe(conflicts_frame(conflicts), use_container_width=True, hide_index=True)
+            if st.button("OK, entendi"):
+                del st.session_state.table_result
+                st.rerun()
+        else:
+            st.success(f"Alterações salvas ({saved} linha(s)).")
+            del st.session_state.table_result
+
+    # Relatório de duplicatas: links que apontam para a mesma planilha/aba
+    duplicates = duplicates_frame(df, CATALOG.keys)
+    with st.expander(f"🔁 Planilhas duplicadas ({duplicates['Grupo'].nunique()} grupo(s))"):
+        if duplicates.empty:
+            st.caption("Nenhum link aponta para a mesma planilha/aba de outro.")
+        else:
+            st.dataframe(duplicates, use_container_width=True, hide_index=True)
+
     st.divider()
     cexp, cup = st.columns([1, 1])
     with cexp:
-        st.download_button(
-            "⬇️ Exportar CSV",
-            data=edited.drop(columns=["Selecionar"], errors="ignore").to_csv(index=False).encode("utf-8"),
-            file_name="links_export.csv",
-            mime="text/csv",
-            use_container_width=True,
-        )
+        render_export()
     with cup:
         up = st.file_uploader("📥 Importar/mesclar CSV", type=["csv"])
         if up is not None:
             try:
-                new_df = pd.read_csv(up, dtype=str)
-                new_df = ensure_cols(new_df)
-
-                # mescla por ID (mantém existentes, adiciona novos)
-                base = st.session_state.df_links.copy()
-                merged = pd.concat([base, new_df], ignore_index=True)
-                merged = merged.drop_duplicates(subset=["ID"], keep="last").reset_index(drop=True)
-
-                save_db(merged)
-                st.session_state.df_links = load_db()
-                st.success(f"Importação concluída. Total agora: {len(merged)}.")
+                # importação em blocos com upsert por ID; reimportar o mesmo
+                # arquivo (inclusive a cada rerun) não grava nada
+                up.seek(0)
+                bar = st.progress(0.0, text="Importando…")
+                report = import_csv(
+                    CATALOG, up,
+                    on_progress=lambda n, frac: bar.progress(frac or 0.0, text=f"{n} linha(s) lidas…"),
+                )
+                bar.empty()
+                if report["novas"] or report["atualizadas"]:
+                    io_stat("writes")
+                st.success(
+                    f"Importação concluída: {report['novas']} nova(s), {report['atualizadas']} atualizada(s), "
+                    f"{report['iguais']} sem alteração. Total agora: {len(load_db())}."
+                )
+                if report["erros"]:
+                    st.warning(f"{len(report['erros'])} linha(s) rejeitada(s):")
+                    st.dataframe(errors_frame(report["erros"]), use_container_width=True, hide_index=True)
             except Exception as e:
                 st.error(f"Falha ao importar: {e}")
 
+# =========================
+# Tab 4: HISTÓRICO
+# =========================
+# O histórico (central/history.py) guarda, por gravação, só os campos que
+# mudaram em cada linha, com autor e horário, e checkpoints comprimidos do
+# catálogo inteiro de tempos em tempos. Daqui dá para ver quem alterou um
+# link e voltar um link (ou o catálogo todo) ao estado de uma data: a volta
+# é uma única operação batch, que também entra no histórico e pode ser
+# desfeita do mesmo jeito.
+def restore_from_history(when: datetime, ids: list[str] | None = None):
+    n = history.restore(CATALOG, when, ids)
+    io_stat("writes")
+    if n:
+        notify(f"🕓 {n} link(s) de volta a {when:%d/%m/%Y %H:%M}.")
+    else:
+        notify("Nada a restaurar: já estava assim naquela data.")
+    st.session_state.pop("history_preview", None)
+    catalog_changed("history", "grid_act", "grid_arch")
+
+def preview_restore(when: datetime):
+    # Reconstruir o catálogo numa data pode levar alguns segundos em
+    # catálogos grandes: a prévia só é calculada sob demanda (botão), nunca
+    # a cada rerun, e fica no session_state até a data mudar.
+    try:
+        preview = history.restore_ops(load_db(), CATALOG.history.at(when))[1]
+        st.session_state.history_preview = (when, preview, None)
+    except ValueError as e:  # data anterior ao início do histórico
+        st.session_state.history_preview = (when, None, str(e))
+
+@traced_fragment("history")
+def render_history():
+    store = CATALOG.history
+    if store is None:
+        st.info("Histórico desligado (`CENTRAL_HISTORY=0`).")
+        return
+    st.caption(
+        f"Registrado desde {store.first_ts()}: cada gravação guarda só os campos alterados, "
+        "com autor e horário; checkpoints periódicos aceleram a volta a qualquer data."
+    )
+    snapshot = load_db()
+    names = dict(zip(snapshot["ID"].astype(object), snapshot["Nome"].astype(object)))
+
+    # Quem alterou um link (inclusive excluídos, pelo ID)
+    st.subheader("🔍 Quem alterou este link?")
+    c1, c2 = st.columns([3, 2])
+    with c1:
+        selected = st.selectbox(
+            "Link", list(names), index=None, placeholder="Escolha um link…", key="history_id",
+            format_func=lambda i: f"{names[i]} · {i[:8]}",
+        )
+    with c2:
+        typed = st.text_input("…ou cole um ID (inclusive de excluídas)", key="history_id_text").strip()
+    link_id = typed or selected
+    if link_id:
+        changes = store.log(link_id)
+        if changes.empty:
+            st.caption("Nenhuma alteração registrada para este link.")
+        else:
+            st.dataframe(changes, use_container_width=True, hide_index=True)
+        d1, d2, d3 = st.columns([2, 2, 2])
+        with d1:
+            day = st.date_input("Voltar este link para", key="history_day", format="DD/MM/YYYY")
+        with d2:
+            hour = st.time_input("às", key="history_time")
+        with d3:
+            st.button(
+                "↩️ Restaurar este link", key="history_restore_one", use_container_width=True,
+                on_click=restore_from_history, args=(datetime.combine(day, hour), [link_id]),
+            )
+
+    # Catálogo inteiro numa data: prévia, confirmação e uma única gravação
+    st.subheader("🕰️ Catálogo inteiro em outra data")
+    e1, e2, e3 = st.columns([2, 2, 2])
+    with e1:
+        day = st.date_input("Dia", key="catalog_day", format="DD/MM/YYYY")
+    with e2:
+        hour = st.time_input("Hora", key="catalog_time")
+    when = datetime.combine(day, hour)
+    with e3:
+        st.button("👀 Prever restauração", key="catalog_preview", use_container_width=True,
+                  on_click=preview_restore, args=(when,))
+    preview = st.session_state.get("history_preview")
+    if preview and preview[0] == when:
+        _, frame, error = preview
+        if error:
+            st.warning(error)
+        elif frame.empty:
+            st.caption("O catálogo já está como naquela data.")
+        else:
+            st.dataframe(frame, use_container_width=True, hide_index=True)
+            confirmed = st.checkbox(
+                f"Confirmo: {len(frame)} link(s) voltam ao estado de {when:%d/%m/%Y %H:%M}",
+                key="catalog_confirm",
+            )
+            st.button("🕓 Restaurar catálogo", type="primary", key="catalog_apply", disabled=not confirmed,
+                      on_click=restore_from_history, args=(when,))
+
+    # Últimas alterações de todo o catálogo (nome atual para as linhas sem nome no delta)
+    st.subheader("📜 Últimas alterações")
+    recent_changes = store.recent(50)
+    recent_changes["Nome"] = recent_changes["Nome"].mask(
+        recent_changes["Nome"].eq(""), recent_changes["ID"].map(names)
+    ).fillna("")
+    st.dataframe(recent_changes, use_container_width=True, hide_index=True)
+
+with tab4:
+    render_history()
+
+# =========================
+# Debug (E/S e desempenho do rerun, só para admin)
+# =========================
+# fim do rerun medido: o painel abaixo não entra na conta
+finish_run()
+FULL_RUN = False
+trace_record = instrument.end(TRACE, BASE_DIR)
+remember_trace(trace_record)
+
+def is_admin() -> bool:
+    # painel visível só com ?admin=<CENTRAL_ADMIN_TOKEN> na URL
+    token = os.environ.get("CENTRAL_ADMIN_TOKEN")
+    return bool(token) and st.query_params.get("admin") == token
+
+if is_admin():
+    with st.sidebar.expander("🛠️ Debug (admin)"):
+        io = {"reads": 0, "writes": 0, "skipped": 0, **st.session_state.get("io_stats", {})}
+        st.caption(f"Versão do catálogo: {CATALOG.version}")
+        st.write(f"Snapshots carregados no processo: **{CATALOG.loads}**")
+        st.write(f"Gravações realizadas: **{io['writes']}**")
+        st.write(f"Gravações ignoradas: **{io['skipped']}**")
+        st.write(f"Leituras: **{io['reads']}**")
+        if trace_record is None:
+            st.caption("Instrumentação desligada: use `CENTRAL_TRACE=1` (ou `profile` para o cProfile).")
+        else:
+            st.write(f"Último rerun: **{trace_record['total_ms']:.0f} ms**")
+            spans = pd.DataFrame({"ms": trace_record["spans"], "chamadas": trace_record["calls"]})
+            st.dataframe(spans.sort_values("ms", ascending=False), use_container_width=True)
+            st.json(trace_record["counters"])
+            st.line_chart(pd.DataFrame({"ms": [r["total_ms"] for r in st.session_state.trace_history]}))
+            if "profile" in trace_record:
+                st.code(trace_record["profile"], language=None)
+
 st.caption("💡 Desenvolvido por Kayo Soares - LPA-O3")
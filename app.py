@@ -1,17 +1,80 @@
 # app.py
+import os
 import streamlit as st
 import pandas as pd
-import re
 from pathlib import Path
 from datetime import datetime
+from functools import wraps
 from uuid import uuid4
+import time
+from central import actions, enrich, export, history, instrument, retention
+from central.catalog import Catalog
+from central.health import HEALTH_NAME, STATUS_LABELS, HealthChecker, HealthStore
+from central.importer import errors_frame, import_csv, validate
+from central.merge import changed_rows, conflicts_frame, editor_changes
+from central.query import ORDERS, filter_view
+from central.sheet_key import canonical_url, duplicates_frame, sheet_key
+from central.storage import COLS, DATE_FMT, StaleRows, ensure_cols, get_storage
+from central.tag_index import parse_tags
 
 st.set_page_config(page_title="Central de Planilhas", layout="wide")
+TRACE = instrument.begin("app.py")  # None com CENTRAL_TRACE desligado
+RUN_COMPLETO = True  # vira False no fim do script: fragmento que reroda sozinho o vê assim
 
 BASE_DIR = Path(__file__).parent if "__file__" in globals() else Path.cwd()
-DB_PATH = BASE_DIR / "links_db.csv"
 
-COLS = ["ID","Nome","URL","Categoria","Tags","Ativo","Criado_em","Arquivado_em"]
+def guardar_trace(rec):
+    if rec: st.session_state.trace_history = (st.session_state.get("trace_history", []) + [rec])[-20:]
+
+def fragmento(key, nome=None):
+    # st.fragment com registro próprio de instrumentação e conta de E/S quando só o fragmento reroda
+    def embrulha(fn):
+        medido = instrument.fragment_trace(f"app.py#{nome or key}", BASE_DIR, guardar_trace)(fn)
+        @wraps(fn)
+        def rodar(*a, **k):
+            try: return medido(*a, **k)
+            finally:
+                if not RUN_COMPLETO: fim_de_run()
+        return st.fragment(rodar, key=key)
+    return embrulha
+
+def autor():
+    # quem grava, para o histórico: e-mail do login (st.login), se configurado, ou o nome da barra lateral
+    return logado() or st.session_state.get("autor") or None
+
+def logado():
+    return st.user.get("email") if st.user.get("is_logged_in") else None
+
+@st.cache_resource
+def shared_catalog()->Catalog:
+    # um snapshot por processo, compartilhado (somente leitura) por todas as sessões;
+    # cada gravação entra no histórico (links_history.sqlite, CENTRAL_HISTORY=0 desliga)
+    history.set_author_provider(autor)
+    return Catalog(get_storage(BASE_DIR), history.open_history(BASE_DIR))
+
+CATALOG = shared_catalog()
+
+@st.cache_resource
+def shared_health()->HealthChecker:
+    # verificação de links em segundo plano; resultados por ID com TTL (CENTRAL_HEALTH_TTL)
+    return HealthChecker(HealthStore(BASE_DIR / HEALTH_NAME))
+
+HEALTH = shared_health()
+
+@st.cache_resource
+def shared_enricher():
+    # metadados da planilha (título, dono, modificação) em segundo plano; None sem cliente configurado
+    client = enrich.get_client()
+    return enrich.Enricher(CATALOG, client).start() if client else None
+
+ENRICHER = shared_enricher()
+
+@st.cache_resource
+def shared_purger():
+    # retenção da lixeira (CENTRAL_RETENTION_DAYS): apaga as arquivadas antigas em lotes, em segundo plano
+    return retention.Purger(CATALOG, BASE_DIR / retention.LOG_NAME).start() if retention.DAYS else None
+
+PURGER = shared_purger()
 
 ACCENT = "#EE4D2D"
 ACCENT_RGB = "238,77,45"
@@ -43,71 +106,81 @@ st.markdown(f"""
 </style>
 """, unsafe_allow_html=True)
 
-def is_valid_gsheets_url(url:str)->bool:
-    if not isinstance(url,str): return False
-    return re.match(r"^https://docs\.google\.com/spreadsheets/d/[^/\s]+", url.strip()) is not None
-
-def ensure_cols(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    for c in COLS:
-        if c not in df.columns:
-            df[c] = "True" if c=="Ativo" else ""
-    mask_no_id = (df["ID"].isna()) | (df["ID"].astype(str).str.strip()=="")
-    if mask_no_id.any():
-        df.loc[mask_no_id,"ID"] = [str(uuid4()) for _ in range(mask_no_id.sum())]
-    df["Ativo"] = df["Ativo"].fillna("True").astype(str)
-    df["Arquivado_em"] = df["Arquivado_em"].fillna("").astype(str)
-    df["Tags"] = df["Tags"].fillna("").astype(str)
-    return df[COLS]
+def io_stat(name):
+    stats = st.session_state.setdefault("io_stats", {"reads":0,"writes":0,"skipped":0})
+    stats[name] += 1
+
+def fim_de_run():
+    # rerun (completo ou só de fragmento) sem gravação desde o anterior: uma gravação evitada
+    stats = st.session_state.setdefault("io_stats", {"reads":0,"writes":0,"skipped":0})
+    if stats["writes"] == st.session_state.get("writes_vistos", 0): stats["skipped"] += 1
+    st.session_state.writes_vistos = stats["writes"]
 
 def load_db()->pd.DataFrame:
-    if DB_PATH.exists():
-        df = pd.read_csv(DB_PATH, dtype=str)
-        df = ensure_cols(df)
-        df.to_csv(DB_PATH, index=False)
-        return df
-    else:
-        df = ensure_cols(pd.DataFrame(columns=COLS))
-        df.to_csv(DB_PATH, index=False)
-        return df
+    with instrument.span("load_db"): loads = CATALOG.loads; df = CATALOG.snapshot()
+    if CATALOG.loads != loads: io_stat("reads")
+    return df
 
 def save_db(df: pd.DataFrame):
-    ensure_cols(df).to_csv(DB_PATH, index=False)
+    io_stat("writes"); CATALOG.replace_all(ensure_cols(df))
+
+def fmt_dt(v)->str:
+    return "" if pd.isna(v) else v.strftime(DATE_FMT)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def exportar(version, chave, fmt, _df)->bytes:
+    # gerado só no clique (download com data=callable), uma vez por versão + filtro + formato
+    return export.payload(_df, fmt)
 
-def parse_tags(s:str):
-    if not isinstance(s,str) or not s.strip(): return []
-    return [t.strip() for t in s.split(",") if t.strip()]
+@st.cache_data(max_entries=2, show_spinner=False)
+def log_exclusoes(stamp)->pd.DataFrame:
+    # relido só quando o arquivo muda (stamp = mtime e tamanho)
+    return retention.read_log(BASE_DIR / retention.LOG_NAME, 20)
 
-def uniq_sorted(values):
-    return sorted({v for v in values if isinstance(v,str) and v.strip()})
+@st.cache_data(max_entries=4)
+def health_map(version, health_version, bucket, _df)->dict:
+    # ID -> resultado válido; recalcula quando o catálogo ou os resultados mudam (e a cada 10 min, pelo TTL)
+    return HEALTH.store.current(_df["ID"], _df["URL"])
 
+def commit_op(op):
+    # grava só a operação; o catálogo deriva o novo snapshot (copy-on-write)
+    n = CATALOG.commit(op); io_stat("writes")
+    return n
+
+def avisar(msg):
+    # toast adiado: as ações também rodam em callbacks, que não devem desenhar nada; metricas() mostra
+    st.session_state.setdefault("avisos", []).append(msg)
+
+# arquivar/restaurar/excluir: central/actions.py (mesmo código da linha de comando)
 def archive_ids(ids):
     if not ids: return
-    df = st.session_state.df_links.copy()
-    df.loc[df["ID"].isin(ids),"Ativo"]="False"
-    df.loc[df["ID"].isin(ids),"Arquivado_em"]=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    save_db(df); st.session_state.df_links=df; st.toast(f"🗃️ {len(ids)} link(s) arquivado(s).")
+    actions.archive(CATALOG, ids); io_stat("writes")
+    avisar(f"🗃️ {len(ids)} link(s) arquivado(s).")
 
 def restore_ids(ids):
     if not ids: return
-    df = st.session_state.df_links.copy()
-    df.loc[df["ID"].isin(ids),"Ativo"]="True"
-    df.loc[df["ID"].isin(ids),"Arquivado_em"]=""
-    save_db(df); st.session_state.df_links=df; st.toast(f"♻️ {len(ids)} link(s) restaurado(s).")
+    actions.restore(CATALOG, ids); io_stat("writes")
+    avisar(f"♻️ {len(ids)} link(s) restaurado(s).")
 
 def permanent_delete_ids(ids):
     if not ids: return
-    df = st.session_state.df_links.copy()
-    before=len(df); df=df[~df["ID"].isin(ids)].reset_index(drop=True)
-    save_db(df); st.session_state.df_links=df; st.toast(f"🗑️ {before-len(df)} link(s) excluído(s).")
-
-# Estado
-if "df_links" not in st.session_state:
-    st.session_state.df_links = load_db()
-else:
-    st.session_state.df_links = ensure_cols(st.session_state.df_links)
-    save_db(st.session_state.df_links)
-df = st.session_state.df_links
+    n = actions.delete(CATALOG, ids); io_stat("writes")
+    avisar(f"🗑️ {n} link(s) excluído(s).")
+
+def saude_atual()->dict:
+    return health_map(CATALOG.version, HEALTH.store.version, int(time.time()//600), load_db())
+
+# Fragmentos: métricas, formulário, filtros e grade de cada aba e cada card rerodam sozinhos.
+# Quem grava num callback avisa com catalogo_mudou(); só os fragmentos que dependem do
+# catálogo inteiro (mais os indicados) rerodam, sem o rerun completo do app. A ordem
+# importa: filtros antes das grades e da exportação, que leem o resultado deles (view_act/view_arch).
+DEPENDENTES = ["metricas", "filtros_act", "filtros_arch", "exportar"]
+
+def catalogo_mudou(*keys):
+    st.rerun([*DEPENDENTES, *keys])
+
+# Estado: snapshot compartilhado; rerun sem mutação não grava nada
+df = load_db()
 
 # Header
 st.markdown("""
@@ -117,157 +190,360 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-m1,m2,m3 = st.columns(3)
-with m1: st.metric("Total", len(df))
-with m2: st.metric("Ativas", int((df["Ativo"]=="True").sum()))
-with m3: st.metric("Arquivadas", int((df["Ativo"]!="True").sum()))
-
-with st.container(border=True):
-    st.subheader("➕ Adicionar nova planilha")
-    c1,c2,c3,c4 = st.columns([3,5,3,3])
-    nome = c1.text_input("Nome", placeholder="Ex.: Controle de Frota")
-    url = c2.text_input("URL do Google Sheets", placeholder="https://docs.google.com/spreadsheets/d/...")
-    categoria = c3.text_input("Categoria", placeholder="Operações, Vendas…")
-    tags = c4.text_input("Tags (separe por vírgulas)", placeholder="Shopee, LPA-03, Motoristas")
-    ativo = st.checkbox("Ativo", value=True)
-    if st.button("Salvar link", type="primary"):
-        if not nome.strip() or not url.strip():
-            st.error("Informe **Nome** e **URL**.")
-        elif not is_valid_gsheets_url(url):
-            st.error("URL inválida. Use um link de Google Sheets.")
-        else:
-            row = {
-                "ID": str(uuid4()), "Nome": nome.strip(), "URL": url.strip(),
-                "Categoria": categoria.strip(), "Tags": tags.strip(),
-                "Ativo": "True" if ativo else "False",
-                "Criado_em": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "Arquivado_em": "" if ativo else datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            }
-            df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-            save_db(df); st.session_state.df_links=df
-            st.success(f"✅ '{nome}' adicionada.")
+@fragmento("metricas")
+def metricas():
+    df = load_db(); m1,m2,m3 = st.columns(3)
+    with m1: st.metric("Total", len(df))
+    with m2: st.metric("Ativas", int(df["Ativo"].sum()))
+    with m3: st.metric("Arquivadas", int((~df["Ativo"]).sum()))
+    for msg in st.session_state.pop("avisos", []): st.toast(msg)
+
+metricas()
+
+def salvar_link():
+    ss = st.session_state; nome, url = ss.n_nome, ss.n_url
+    key = sheet_key(url); dono = CATALOG.keys.owner(key)
+    if not nome.strip() or not url.strip():
+        ss.n_msg = ("error", "Informe **Nome** e **URL**.")
+    elif key is None:
+        ss.n_msg = ("error", "URL inválida. Use um link de Google Sheets.")
+    elif dono is not None:
+        ss.n_msg = ("error", f"Essa planilha/aba já está cadastrada como **{load_db().set_index('ID').at[dono,'Nome']}**.")
+    else:
+        row = {
+            "ID": str(uuid4()), "Nome": nome.strip(), "URL": canonical_url(key),
+            "Categoria": ss.n_cat.strip(), "Tags": ss.n_tags.strip(),
+            "Ativo": "True" if ss.n_ativo else "False",
+            "Criado_em": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "Arquivado_em": "" if ss.n_ativo else datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        commit_op({"op":"add","rows":[row]}); ss.n_msg = ("success", f"✅ '{nome}' adicionada.")
+        catalogo_mudou("adicionar", "grade_act" if ss.n_ativo else "grade_arch")
+
+@fragmento("adicionar")
+def adicionar():
+    with st.container(border=True):
+        st.subheader("➕ Adicionar nova planilha")
+        c1,c2,c3,c4 = st.columns([3,5,3,3])
+        c1.text_input("Nome", placeholder="Ex.: Controle de Frota", key="n_nome")
+        c2.text_input("URL do Google Sheets", placeholder="https://docs.google.com/spreadsheets/d/...", key="n_url")
+        c3.text_input("Categoria", placeholder="Operações, Vendas…", key="n_cat")
+        c4.text_input("Tags (separe por vírgulas)", placeholder="Shopee, LPA-03, Motoristas", key="n_tags")
+        st.checkbox("Ativo", value=True, key="n_ativo")
+        st.button("Salvar link", type="primary", on_click=salvar_link)
+        msg = st.session_state.pop("n_msg", None)
+        if msg: getattr(st, msg[0])(msg[1])
+
+adicionar()
+
+if CATALOG.history is not None and not logado():
+    st.sidebar.text_input("👤 Seu nome (para o histórico)", key="autor")
 
-tab1,tab2,tab3 = st.tabs(["📁 Ativas","🗃️ Arquivadas (Lixeira)","🧾 Tabela & Importar"])
+saude = saude_atual()
+with st.sidebar.expander("🩺 Saúde dos links"):
+    n = pd.Series([r["status"] for r in saude.values()]).value_counts()
+    for s_,lbl in STATUS_LABELS.items(): st.write(f"{lbl}: **{int(n.get(s_,0)) if s_!='unchecked' else len(df)-len(saude)}**")
+    if HEALTH.running:
+        st.progress(HEALTH.done/max(HEALTH.total,1), text=f"Verificando… {HEALTH.done}/{HEALTH.total}")
+        st.button("Atualizar", key="health_refresh")
+    elif st.button("Verificar links pendentes", disabled=len(saude)==len(df)):
+        HEALTH.start(HEALTH.store.stale(df)); st.rerun()
+
+with st.sidebar.expander("🔄 Metadados das planilhas"):
+    if ENRICHER is None: st.caption("Desligado: defina `CENTRAL_DRIVE_TOKEN` ou `CENTRAL_DRIVE_API_KEY`.")
+    else:
+        st.write(f"Com metadados: **{int(df['Metadados_em'].notna().sum())}** de {len(df)}")
+        if ENRICHER.busy: st.caption(f"Buscando… {ENRICHER.pending} planilha(s) na fila.")
+        elif ENRICHER.last_run: st.caption(f"Última rodada: {ENRICHER.last_run:%d/%m %H:%M}")
+        if ENRICHER.last_error: st.warning(ENRICHER.last_error)
+        if st.button("Atualizar agora", key="enrich_now", disabled=ENRICHER.busy): ENRICHER.refresh()
 
-def filtros(df_base: pd.DataFrame, show_arch=False)->pd.DataFrame:
+with st.sidebar.expander("🧹 Retenção da lixeira"):
+    if PURGER is None: st.caption("Desligada: defina `CENTRAL_RETENTION_DAYS` para excluir as arquivadas antigas.")
+    else:
+        st.write(f"Regra: {PURGER.rule}. Na fila: **{len(retention.due(df, PURGER.days))}**")
+        if PURGER.busy: st.caption("Excluindo em lotes…")
+        elif PURGER.last_run: st.caption(f"Última rodada: {PURGER.last_run:%d/%m %H:%M} · {PURGER.removed} excluída(s) desde o início")
+        if PURGER.last_error: st.warning(PURGER.last_error)
+        if st.button("Rodar agora", key="purge_now", disabled=PURGER.busy): PURGER.refresh()
+    p_ = BASE_DIR / retention.LOG_NAME
+    log = log_exclusoes((p_.stat().st_mtime_ns, p_.stat().st_size) if p_.exists() else None)
+    if len(log): st.caption("Últimas exclusões"); st.dataframe(log, hide_index=True, use_container_width=True)
+
+tab1,tab2,tab3,tab4 = st.tabs(["📁 Ativas","🗃️ Arquivadas (Lixeira)","🧾 Tabela & Importar","🕓 Histórico"])
+
+@instrument.traced("filtros")
+def filtros(show_arch=False):
+    # fragmento por aba; o resultado fica em view_{k} para o fragmento da grade
+    k = 'arch' if show_arch else 'act'; df = load_db()
+    df_base = df[~df["Ativo"]] if show_arch else df[df["Ativo"]]
+    mudou = lambda: st.rerun([f"filtros_{k}", f"lote_{k}", f"grade_{k}", "exportar"])  # filtro novo: só esta aba (e a exportação)
     with st.container(border=True):
         st.subheader("🔎 Buscar e filtrar")
-        df_base=df_base.copy()
-        for col in ["Categoria","Tags"]: 
-            if col not in df_base.columns: df_base[col]=""
-        all_cats = uniq_sorted(df_base["Categoria"].astype(str).tolist())
-        all_tags = sorted({t for s in df_base["Tags"].fillna("").astype(str) for t in parse_tags(s)})
+        # facetas da versão atual; contagens refinadas pela seleção do session_state
+        facets = CATALOG.facets
+        termo = st.session_state.get(f"s_{k}", "")
+        scores = CATALOG.search.search(termo) if termo else {}  # índice de trigramas, sem acento/caixa
+        base = df_base[df_base["ID"].isin(list(scores))] if termo else df_base
+        cat_n, tag_n = facets.refine((k, termo), base, st.session_state.get(f"c_{k}", []), st.session_state.get(f"t_{k}", []))
         c1,c2 = st.columns([3,2])
-        termo = c1.text_input("Buscar por nome", placeholder="Digite um trecho…", key=f"s_{'arch' if show_arch else 'act'}")
-        order = c2.selectbox("Ordenar por", ["Mais recentes","Mais antigas","Nome (A→Z)","Nome (Z→A)"], key=f"o_{'arch' if show_arch else 'act'}")
-        c3,c4,c5 = st.columns([2,3,2])
-        cat_sel = c3.multiselect("Categoria", all_cats, key=f"c_{'arch' if show_arch else 'act'}")
-        tag_sel = c4.multiselect("Tags", all_tags, key=f"t_{'arch' if show_arch else 'act'}")
+        termo = c1.text_input("Buscar (nome, categoria, tags)", placeholder="Digite um trecho…", key=f"s_{k}", on_change=mudou)
+        order = c2.selectbox("Ordenar por", ORDERS, key=f"o_{k}", on_change=mudou)
+        c3,c4,c5,c6 = st.columns([2,3,2,2])
+        cat_sel = c3.multiselect("Categoria", facets.categories(k), format_func=lambda c: f"{c} ({cat_n.get(c,0)})", key=f"c_{k}", on_change=mudou)
+        tag_sel = c4.multiselect("Tags", facets.tag_names(k), format_func=lambda t: f"{t} ({tag_n.get(t,0)})", key=f"t_{k}", on_change=mudou)
         if not show_arch:
-            only_active = c5.checkbox("Somente ativas", value=True, key="only_active_filter")
-            df_base = df_base[df_base["Ativo"]=="True"] if only_active else df_base
+            only_active = c5.checkbox("Somente ativas", value=True, key="only_active_filter", on_change=mudou)
+            df_base = df_base[df_base["Ativo"]] if only_active else df_base
         else:
             c5.caption("Exibindo apenas **arquivadas**.")
-        view=df_base.copy()
-        if termo: view=view[view["Nome"].str.contains(termo, case=False, na=False)]
-        if cat_sel: view=view[view["Categoria"].isin(cat_sel)]
-        if tag_sel:
-            view = view[view["Tags"].apply(lambda s: set(tag_sel).issubset(set(parse_tags(str(s)))) )]
-        if "Criado_em" not in view.columns: view["Criado_em"]=""
-        if order=="Mais recentes": view=view.sort_values("Criado_em", ascending=False, na_position="last")
-        elif order=="Mais antigas": view=view.sort_values("Criado_em", ascending=True, na_position="last")
-        elif order=="Nome (A→Z)": view=view.sort_values("Nome", ascending=True, na_position="last")
-        else: view=view.sort_values("Nome", ascending=False, na_position="last")
+        st_sel = c6.multiselect("Status do link", list(STATUS_LABELS), format_func=STATUS_LABELS.get, key=f"h_{k}", on_change=mudou)
+        view = filter_view(df_base, CATALOG, termo, cat_sel, tag_sel, order, scores=scores, status=st_sel, health=saude_atual())
         st.write(f"Exibindo **{len(view)}** planilha(s).")
-        return view
+        st.session_state[f"view_{k}"] = view
+        # chave do filtro para o cache da exportação (o status depende também dos resultados da verificação)
+        st.session_state[f"chave_{k}"] = (k, termo, tuple(cat_sel), tuple(tag_sel), order, st.session_state.get("only_active_filter"),
+                                           tuple(st_sel), HEALTH.store.version if st_sel else None)
+
+# Seleção em lote: caixas nos cards (sel_act/sel_arch) e uma fila de etapas compartilhada pelas
+# duas abas; "Aplicar fila" grava tudo numa operação batch (actions.plan / actions.commit_batch).
+LOTES = ["lote_act", "lote_arch"]
 
-def card(row: pd.Series, archived=False):
+def selecao(k)->set:
+    return st.session_state.setdefault(f"sel_{k}", set())
+
+def fila()->list:
+    return st.session_state.setdefault("fila", [])
+
+def marcar(i, k):
+    selecao(k).symmetric_difference_update({i}); st.rerun(LOTES)
+
+def selecionar(k, ids):
+    # seleção em massa: a geração nova recria as caixas dos cards com o valor certo
+    st.session_state[f"sel_{k}"] = set(ids); st.session_state.sel_gen = st.session_state.get("sel_gen", 0) + 1
+    st.rerun([*LOTES, f"grade_{k}"])
+
+def enfileirar(k, kind):
+    ss = st.session_state; item = {"kind": kind, "ids": sorted(selecao(k))}
+    if kind == "retag": item.update(add=parse_tags(ss.get(f"lt_add_{k}", "")), remove=parse_tags(ss.get(f"lt_rm_{k}", "")))
+    if kind == "recategorize": item["category"] = ss.get(f"lt_cat_{k}", "")
+    fila().append(item); st.rerun(LOTES)
+
+def esvaziar_fila():
+    st.session_state.fila = []; st.rerun(LOTES)
+
+def aplicar_fila():
+    df = load_db(); ops, prev = actions.plan(df, fila())
+    try: actions.commit_batch(CATALOG, ops, df)
+    except StaleRows as e:
+        # outra sessão mexeu em links do lote entre o plano e a gravação: nada gravado, a fila fica
+        avisar(f"⚠️ {len(e.ids)} link(s) do lote mudaram em outra sessão; nada foi gravado. Confira a prévia e aplique de novo.")
+        catalogo_mudou(*LOTES, "grade_act", "grade_arch"); return
+    io_stat("writes")
+    avisar(f"✅ Lote aplicado: {len(prev)} alteração(ões) em {prev['ID'].nunique()} link(s), numa gravação.")
+    st.session_state.fila = []; st.session_state.sel_act = set(); st.session_state.sel_arch = set()
+    st.session_state.sel_gen = st.session_state.get("sel_gen", 0) + 1
+    catalogo_mudou(*LOTES, "grade_act", "grade_arch")
+
+def lote(archived=False):
+    k = 'arch' if archived else 'act'; sel, q = selecao(k), fila()
+    modo = st.toggle("☑️ Seleção em lote", key=f"modo_{k}", on_change=lambda: st.rerun([*LOTES, f"grade_{k}"]))
+    if not modo and not q: return
+    with st.container(border=True):
+        if modo:
+            view = st.session_state[f"view_{k}"]
+            c1,c2,c3 = st.columns([2,2,2])
+            c1.write(f"**{len(sel)}** selecionada(s)")
+            c2.button(f"Selecionar filtradas ({len(view)})", key=f"sa_{k}", on_click=selecionar, args=(k, view["ID"].tolist()))
+            c3.button("Limpar seleção", key=f"sc_{k}", on_click=selecionar, args=(k, []))
+            kinds = ["restore","delete","retag","recategorize"] if archived else ["archive","retag","recategorize"]
+            a1,a2,a3 = st.columns([2,3,1.4])
+            kind = a1.selectbox("Ação", kinds, format_func=actions.STAGE_LABELS.get, key=f"lk_{k}")
+            if kind == "retag":
+                a2.text_input("Adicionar tags", placeholder="Shopee, LPA-03", key=f"lt_add_{k}")
+                a2.text_input("Remover tags", key=f"lt_rm_{k}")
+            elif kind == "recategorize": a2.text_input("Nova categoria", key=f"lt_cat_{k}")
+            a3.button("➕ Colocar na fila", key=f"lq_{k}", disabled=not sel, on_click=enfileirar, args=(k, kind))
+        if q:
+            st.markdown("**Fila de ações** (gravadas juntas, numa única operação)")
+            for n,item in enumerate(q, 1):
+                extra = {"retag": f" (+{', '.join(item.get('add', [])) or '—'} / −{', '.join(item.get('remove', [])) or '—'})",
+                         "recategorize": f" → {item.get('category') or '—'}"}.get(item["kind"], "")
+                st.caption(f"{n}. {actions.STAGE_LABELS[item['kind']]}{extra}: {len(item['ids'])} link(s)")
+            ops, prev = actions.plan(load_db(), q)
+            with st.expander(f"👀 Prévia: {len(prev)} alteração(ões) em {prev['ID'].nunique()} link(s)"):
+                st.dataframe(prev, use_container_width=True, hide_index=True)
+            ok = st.checkbox("Entendo que exclusões não podem ser desfeitas", key=f"lok_{k}") if any(i["kind"]=="delete" for i in q) else True
+            b1,b2 = st.columns(2)
+            b1.button("✅ Aplicar fila", type="primary", key=f"la_{k}", disabled=not ops or not ok, on_click=aplicar_fila, use_container_width=True)
+            b2.button("Esvaziar fila", key=f"le_{k}", on_click=esvaziar_fila, use_container_width=True)
+
+def acao(fn, id_, keys, confirm=None):
+    # callback dos cards: grava e reroda só o card, as métricas, as facetas e a grade da outra aba
+    if confirm and not st.session_state.get(confirm): return  # o rerun do próprio card mostra o aviso
+    fn([id_]); catalogo_mudou(*keys)
+
+def widget(n=1): instrument.count("widgets", n)  # contado onde o card cria o widget
+
+def card(row: pd.Series, archived=False, version=None, h=None):
+    i = row["ID"]; fk = f"card_{i}"; outra = "grade_act" if archived else "grade_arch"
+    if version != CATALOG.version:
+        # rerun só do card (depois de uma ação): relê a linha no snapshot atual
+        atual = load_db(); hit = atual[atual["ID"]==i]
+        if hit.empty: st.caption(f"🗑️ **{row['Nome']}** excluída definitivamente."); return
+        row = hit.iloc[0]
+    if bool(row["Ativo"]) == archived:
+        # saiu desta aba: fica um aviso com desfazer até a grade ser redesenhada
+        with st.container(border=True):
+            st.caption(f"♻️ **{row['Nome']}** restaurada." if archived else f"🗃️ **{row['Nome']}** arquivada.")
+            st.button("↩️ Desfazer", key=f"u_{i}", on_click=acao, args=(archive_ids if archived else restore_ids, i, [fk, outra])); widget()
+        return
+    instrument.count("cards")
     st.markdown('<div class="card">', unsafe_allow_html=True)
+    k = 'arch' if archived else 'act'
+    if st.session_state.get(f"modo_{k}"):
+        st.checkbox("Selecionar", value=i in selecao(k), key=f"pk_{i}_{st.session_state.get('sel_gen', 0)}", on_change=marcar, args=(i, k)); widget()
     st.markdown(f"**{row['Nome']}**")
-    if row.get("Categoria"):
-        st.markdown(f'<span class="badge">{row["Categoria"]}</span>', unsafe_allow_html=True)
+    if row["Titulo"] and row["Titulo"] != row["Nome"]: st.caption(f"📄 {row['Titulo']}")
+    badges = f'<span class="badge">{row["Categoria"]}</span>' if row.get("Categoria") else ""
+    if h: badges += f'<span class="chip" title="HTTP {h["code"] or "—"} · {h["latency_ms"]} ms">{STATUS_LABELS[h["status"]]}</span>'
+    if badges: st.markdown(badges, unsafe_allow_html=True)
     t = parse_tags(row.get("Tags",""))
     if t:
         st.markdown(" ".join([f'<span class="chip">{x}</span>' for x in t]), unsafe_allow_html=True)
-    meta = f'<div class="meta">Criado em: {row.get("Criado_em","")}'
-    if archived and row.get("Arquivado_em"):
-        meta += f' &nbsp;•&nbsp; Arquivado em: {row.get("Arquivado_em","")}'
+    meta = f'<div class="meta">Criado em: {fmt_dt(row["Criado_em"])}'
+    if archived and pd.notna(row["Arquivado_em"]):
+        meta += f' &nbsp;•&nbsp; Arquivado em: {fmt_dt(row["Arquivado_em"])}'
+    if pd.notna(row["Modificado_em"]): meta += f' &nbsp;•&nbsp; Modificada em: {fmt_dt(row["Modificado_em"])}'
+    if row["Dono"]: meta += f' &nbsp;•&nbsp; Dono: {row["Dono"]}'
     meta += "</div>"
     st.markdown(meta, unsafe_allow_html=True)
     c1,c2,c3 = st.columns([1.2,1,1.2])
-    with c1: st.link_button("🔗 Abrir planilha", row["URL"])
+    with c1: st.link_button("🔗 Abrir planilha", row["URL"]); widget()
     with c2:
         if not archived:
             with st.popover("🗃️ Arquivar", use_container_width=True):
                 st.write(f"Arquivar **{row['Nome']}**?")
-                ok = st.checkbox("Confirmo", key=f"a_{row['ID']}")
-                if st.button("Confirmar", key=f"ab_{row['ID']}", use_container_width=True):
-                    if ok: archive_ids([row["ID"]]); st.rerun()
-                    else: st.warning("Confirme antes de arquivar.")
+                st.checkbox("Confirmo", key=f"a_{i}"); widget(3)  # popover, caixa e botão
+                if st.button("Confirmar", key=f"ab_{i}", use_container_width=True,
+                             on_click=acao, args=(archive_ids, i, [fk, outra]), kwargs={"confirm": f"a_{i}"}):
+                    st.warning("Confirme antes de arquivar.")
         else:
-            if st.button("♻️ Restaurar", key=f"r_{row['ID']}", use_container_width=True):
-                restore_ids([row["ID"]]); st.rerun()
+            st.button("♻️ Restaurar", key=f"r_{i}", use_container_width=True, on_click=acao, args=(restore_ids, i, [fk, outra])); widget()
     with c3:
         if archived:
             with st.popover("🗑️ Excluir definitivamente", use_container_width=True):
                 st.write("Esta ação não pode ser desfeita.")
-                ok2 = st.checkbox("Entendo os riscos", key=f"d_{row['ID']}")
-                if st.button("Excluir", key=f"db_{row['ID']}", type="secondary", use_container_width=True):
-                    if ok2: permanent_delete_ids([row["ID"]]); st.rerun()
-                    else: st.warning("Confirme antes de excluir.")
+                st.checkbox("Entendo os riscos", key=f"d_{i}"); widget(3)  # popover, caixa e botão
+                if st.button("Excluir", key=f"db_{i}", type="secondary", use_container_width=True,
+                             on_click=acao, args=(permanent_delete_ids, i, [fk]), kwargs={"confirm": f"d_{i}"}):
+                    st.warning("Confirme antes de excluir.")
         else:
             st.caption("")
     st.markdown("</div>", unsafe_allow_html=True)
 
+PAGE_SIZES = [12, 24, 48, 96]
+
+def paginar(view: pd.DataFrame, key: str)->pd.DataFrame:
+    # só a página visível vira widgets; tamanho e posição ficam no session_state
+    c1,c2,c3 = st.columns([2,4,2])
+    size = c1.selectbox("Por página", PAGE_SIZES, key=f"ps_{key}")
+    pages = max(1, -(-len(view)//size))
+    if st.session_state.get(f"pg_{key}", 1) > pages: st.session_state[f"pg_{key}"] = pages
+    page = c3.number_input("Página", min_value=1, max_value=pages, step=1, key=f"pg_{key}")
+    c2.caption(f"Página {page} de {pages}")
+    return view.iloc[(page-1)*size : page*size]
+
+@instrument.traced("cards")
+def grade(archived=False):
+    k = 'arch' if archived else 'act'; view = st.session_state[f"view_{k}"]
+    if len(view)==0:
+        st.info("Nenhuma planilha arquivada." if archived else "Nenhuma planilha encontrada com os filtros aplicados."); return
+    saude, version = saude_atual(), CATALOG.version
+    cols = st.columns(3)
+    for n,(_,row) in enumerate(paginar(view, k).iterrows()):
+        # cada card é um fragmento com chave própria: uma ação redesenha só ele
+        with cols[n%3]: fragmento(f"card_{row['ID']}", "card")(card)(row, archived, version, saude.get(row["ID"]))
+
 with tab1:
-    v = filtros(df[df["Ativo"]=="True"].copy(), show_arch=False)
-    if len(v)==0: st.info("Nenhuma planilha encontrada com os filtros aplicados.")
-    else:
-        cols = st.columns(3)
-        for i,(_,row) in enumerate(v.iterrows()):
-            with cols[i%3]: card(row, archived=False)
+    fragmento("filtros_act")(filtros)(False); fragmento("lote_act")(lote)(False)
+    fragmento("grade_act")(grade)(False)
 
 with tab2:
-    v = filtros(df[df["Ativo"]!="True"].copy(), show_arch=True)
-    if len(v)==0: st.info("Nenhuma planilha arquivada.")
-    else:
-        cols = st.columns(3)
-        for i,(_,row) in enumerate(v.iterrows()):
-            with cols[i%3]: card(row, archived=True)
+    fragmento("filtros_arch")(filtros)(True); fragmento("lote_arch")(lote)(True)
+    fragmento("grade_arch")(grade)(True)
+
+def limpar_editor():
+    for k in [k for k in st.session_state if str(k).startswith("table_editor")]: del st.session_state[k]
+
+ALVOS = {"todas": "Catálogo inteiro", "act": "Filtro das Ativas", "arch": "Filtro da Lixeira"}
+
+def exportacao():
+    # fragmento: nada é serializado aqui; o arquivo só é gerado quando alguém clica em baixar
+    c1,c2 = st.columns([1,2])
+    fmt = c1.selectbox("Formato", export.available_formats(), format_func=lambda f: export.FORMATS[f][0], key="x_fmt")
+    alvo = c2.radio("Exportar", list(ALVOS), format_func=ALVOS.get, horizontal=True, key="x_alvo")
+    if alvo == "todas": dados, chave = load_db(), ("todas",)
+    else: dados, chave = st.session_state[f"view_{alvo}"], st.session_state[f"chave_{alvo}"]
+    v = CATALOG.version
+    st.download_button(
+        f"⬇️ Exportar {export.FORMATS[fmt][0]} ({len(dados)} linha(s))", data=lambda: exportar(v, chave, fmt, dados),
+        file_name=export.file_name("links_export", fmt), mime=export.FORMATS[fmt][2], on_click="ignore", use_container_width=True
+    )
 
 with tab3:
     st.subheader("🧾 Edição em tabela")
-    table_df = df.copy()
-    if "Tags" not in table_df.columns: table_df["Tags"]=""
-    table_df["Selecionar"]=False
-    edited = st.data_editor(
-        table_df, use_container_width=True, num_rows="dynamic",
-        column_config={
-            "ID": st.column_config.TextColumn(disabled=True, width="small"),
-            "Nome": st.column_config.TextColumn(required=True, width="medium"),
-            "URL": st.column_config.LinkColumn(required=True, width="large"),
-            "Categoria": st.column_config.TextColumn(width="small"),
-            "Tags": st.column_config.TextColumn(help="Separe por vírgulas", width="medium"),
-            "Ativo": st.column_config.SelectboxColumn(options=["True","False"], width="small"),
-            "Criado_em": st.column_config.TextColumn(width="small", help="Preenchido automaticamente"),
-            "Arquivado_em": st.column_config.TextColumn(width="small"),
-            "Selecionar": st.column_config.CheckboxColumn(help="Marque para ação em lote", width="small"),
-        }
-    )
+    # a edição fica presa ao snapshot em que começou; ao salvar só as linhas
+    # alteradas são gravadas, com compare-and-swap por linha (central/merge.py)
+    dirty = any(isinstance(v, dict) and any(v.get(k) for k in ("edited_rows","added_rows","deleted_rows"))
+                for k, v in st.session_state.items() if str(k).startswith("table_editor"))
+    if "table_base" not in st.session_state or (st.session_state.table_base[0]!=CATALOG.version and not dirty):
+        st.session_state.table_base = (CATALOG.version, df); limpar_editor()
+    base_version, base_df = st.session_state.table_base
+    if base_version != CATALOG.version:
+        b1,b2 = st.columns([4,1])
+        b1.info("O catálogo mudou desde que você começou a editar. Ao salvar, suas alterações serão mescladas.")
+        if b2.button("🔄 Recarregar tabela", use_container_width=True):
+            del st.session_state.table_base; limpar_editor(); st.rerun()
+    # só a página visível vai para o editor; o estado do editor é por página
+    page_df = paginar(base_df, "tbl")
+    st.caption("Salve as alterações antes de trocar de página.")
+    ed_key = f"table_editor_{st.session_state.ps_tbl}_{st.session_state.pg_tbl}"
+    table_df = page_df.assign(Categoria=page_df["Categoria"].astype("string"), Selecionar=False)
+    with instrument.span("data_editor"):
+        edited = st.data_editor(
+            table_df, use_container_width=True, num_rows="dynamic", key=ed_key,
+            column_config={
+                "ID": st.column_config.TextColumn(disabled=True, width="small"),
+                "Nome": st.column_config.TextColumn(required=True, width="medium"),
+                "URL": st.column_config.LinkColumn(required=True, width="large"),
+                "Categoria": st.column_config.TextColumn(width="small"),
+                "Tags": st.column_config.TextColumn(help="Separe por vírgulas", width="medium"),
+                "Ativo": st.column_config.CheckboxColumn(width="small"),
+                "Criado_em": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm:ss", width="small", help="Preenchido automaticamente"),
+                "Arquivado_em": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm:ss", width="small"),
+                "Versao": None,
+                "Titulo": st.column_config.TextColumn("Título (planilha)", disabled=True, width="medium"),
+                "Dono": st.column_config.TextColumn(disabled=True, width="small"),
+                "Modificado_em": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm:ss", disabled=True, width="small"),
+                "Metadados_em": None,
+                "Selecionar": st.column_config.CheckboxColumn(help="Marque para ação em lote", width="small"),
+            }
+        )
     a1,a2,a3,a4 = st.columns([1.2,1.2,1.4,2.2])
     with a1:
         if st.button("💾 Salvar alterações", type="primary", use_container_width=True):
-            if edited["Nome"].isna().any() or (edited["Nome"].astype(str).str.strip()=="").any():
-                st.error("Há linhas com **Nome** vazio.")
-            elif (~edited["URL"].apply(is_valid_gsheets_url)).any():
-                st.error("Há URLs inválidas. Corrija antes de salvar.")
+            # só as linhas do conjunto de alterações do editor são validadas e gravadas
+            changes = editor_changes(page_df, st.session_state.get(ed_key) or {})
+            rows = changed_rows(changes, page_df); motivo = validate(rows, CATALOG.keys)
+            if not changes: st.info("Nenhuma alteração para salvar.")
+            elif motivo.ne("").any():
+                st.error("Corrija as linhas abaixo antes de salvar.")
+                st.dataframe(rows.loc[motivo.ne(""),["ID","Nome","URL"]].assign(Motivo=motivo[motivo.ne("")]), use_container_width=True, hide_index=True)
             else:
-                mask_no_id = (edited["ID"].isna()) | (edited["ID"].astype(str).str.strip()=="")
-                if mask_no_id.any():
-                    edited.loc[mask_no_id,"ID"] = [str(uuid4()) for _ in range(mask_no_id.sum())]
-                save_db(edited.drop(columns=["Selecionar"], errors="ignore"))
-                st.session_state.df_links = load_db()
-                st.success("Alterações salvas.")
+                n, conflicts = CATALOG.commit_changes(changes); io_stat("writes")
+                st.session_state.table_result = (n, conflicts)
+                del st.session_state.table_base; limpar_editor(); st.rerun()
     with a2:
         if st.button("🗃️ Arquivar selecionados", use_container_width=True):
             ids = edited.loc[edited["Selecionar"]==True,"ID"].dropna().astype(str).tolist()
@@ -284,26 +560,107 @@ with tab3:
             if not ids: st.warning("Nenhuma linha selecionada.")
             else: permanent_delete_ids(ids); st.rerun()
 
+    if "table_result" in st.session_state:
+        n, conflicts = st.session_state.table_result
+        if conflicts:
+            st.warning(f"{n} alteração(ões) salva(s); {len(conflicts)} linha(s) em conflito com outra sessão não foram gravadas:")
+            st.dataframe(conflicts_frame(conflicts), use_container_width=True, hide_index=True)
+            if st.button("OK, entendi"): del st.session_state.table_result; st.rerun()
+        else:
+            st.success(f"Alterações salvas ({n} linha(s))."); del st.session_state.table_result
+
+    dups = duplicates_frame(df, CATALOG.keys)
+    with st.expander(f"🔁 Planilhas duplicadas ({dups['Grupo'].nunique()} grupo(s))"):
+        if dups.empty: st.caption("Nenhum link aponta para a mesma planilha/aba de outro.")
+        else: st.dataframe(dups, use_container_width=True, hide_index=True)
+
     st.divider()
     cexp, cup = st.columns([1,1])
     with cexp:
-        st.download_button(
-            "⬇️ Exportar CSV",
-            data=edited.drop(columns=["Selecionar"], errors="ignore").to_csv(index=False).encode("utf-8"),
-            file_name="links_export.csv", mime="text/csv", use_container_width=True
-        )
+        fragmento("exportar")(exportacao)()
     with cup:
         up = st.file_uploader("📥 Importar/mesclar CSV", type=["csv"])
         if up is not None:
             try:
-                new_df = pd.read_csv(up, dtype=str)
-                new_df = ensure_cols(new_df)
-                base = st.session_state.df_links.copy()
-                merged = pd.concat([base, new_df], ignore_index=True)
-                merged = merged.drop_duplicates(subset=["ID"], keep="last").reset_index(drop=True)
-                save_db(merged); st.session_state.df_links = load_db()
-                st.success(f"Importação concluída. Total agora: {len(merged)}.")
+                # em blocos, upsert por ID; reimportar o mesmo arquivo não grava nada
+                up.seek(0); bar = st.progress(0.0, text="Importando…")
+                r = import_csv(CATALOG, up, on_progress=lambda n, f: bar.progress(f or 0.0, text=f"{n} linha(s) lidas…"))
+                bar.empty()
+                if r["novas"] or r["atualizadas"]: io_stat("writes")
+                st.success(f"Importação concluída: {r['novas']} nova(s), {r['atualizadas']} atualizada(s), "
+                           f"{r['iguais']} sem alteração. Total agora: {len(load_db())}.")
+                if r["erros"]:
+                    st.warning(f"{len(r['erros'])} linha(s) rejeitada(s):")
+                    st.dataframe(errors_frame(r["erros"]), use_container_width=True, hide_index=True)
             except Exception as e:
                 st.error(f"Falha ao importar: {e}")
 
-st.caption("💡 Dica: versionar o arquivo `links_db.csv` no Git ajuda a manter histórico de alterações.")
+def restaurar(quando, ids=None):
+    n = history.restore(CATALOG, quando, ids); io_stat("writes")
+    avisar(f"🕓 {n} link(s) de volta a {quando:%d/%m/%Y %H:%M}." if n else "Nada a restaurar: já estava assim naquela data.")
+    st.session_state.pop("h_prev", None); catalogo_mudou("historico", "grade_act", "grade_arch")
+
+def prever(quando):
+    # a reconstrução pode levar alguns segundos: só sob demanda, nunca a cada rerun
+    try: st.session_state.h_prev = (quando, history.restore_ops(load_db(), CATALOG.history.at(quando))[1], None)
+    except ValueError as e: st.session_state.h_prev = (quando, None, str(e))
+
+def historico():
+    H = CATALOG.history
+    if H is None: st.info("Histórico desligado (`CENTRAL_HISTORY=0`)."); return
+    st.caption(f"Registrado desde {H.first_ts()}: cada gravação guarda só os campos alterados, com autor e horário; "
+               "checkpoints periódicos aceleram a volta a qualquer data.")
+    df = load_db(); nomes = dict(zip(df["ID"].astype(object), df["Nome"].astype(object)))
+    st.subheader("🔍 Quem alterou este link?")
+    c1,c2 = st.columns([3,2])
+    sel = c1.selectbox("Link", list(nomes), index=None, format_func=lambda i: f"{nomes[i]} · {i[:8]}", placeholder="Escolha um link…", key="h_id")
+    id_ = c2.text_input("…ou cole um ID (inclusive de excluídas)", key="h_id_txt").strip() or sel
+    if id_:
+        log = H.log(id_)
+        if log.empty: st.caption("Nenhuma alteração registrada para este link.")
+        else: st.dataframe(log, use_container_width=True, hide_index=True)
+        d1,d2,d3 = st.columns([2,2,2])
+        dia = d1.date_input("Voltar este link para", key="h_dia", format="DD/MM/YYYY"); hora = d2.time_input("às", key="h_hora")
+        d3.button("↩️ Restaurar este link", key="h_um", on_click=restaurar, args=(datetime.combine(dia, hora), [id_]), use_container_width=True)
+    st.subheader("🕰️ Catálogo inteiro em outra data")
+    e1,e2,e3 = st.columns([2,2,2])
+    dia = e1.date_input("Dia", key="c_dia", format="DD/MM/YYYY"); hora = e2.time_input("Hora", key="c_hora")
+    quando = datetime.combine(dia, hora)
+    e3.button("👀 Prever restauração", key="c_prev", on_click=prever, args=(quando,), use_container_width=True)
+    prev = st.session_state.get("h_prev")
+    if prev and prev[0] == quando:
+        if prev[2]: st.warning(prev[2])
+        elif prev[1].empty: st.caption("O catálogo já está como naquela data.")
+        else:
+            st.dataframe(prev[1], use_container_width=True, hide_index=True)
+            ok = st.checkbox(f"Confirmo: {len(prev[1])} link(s) voltam ao estado de {quando:%d/%m/%Y %H:%M}", key="c_ok")
+            st.button("🕓 Restaurar catálogo", type="primary", key="c_apply", disabled=not ok, on_click=restaurar, args=(quando,))
+    st.subheader("📜 Últimas alterações")
+    rec = H.recent(50); rec["Nome"] = rec["Nome"].mask(rec["Nome"].eq(""), rec["ID"].map(nomes)).fillna("")
+    st.dataframe(rec, use_container_width=True, hide_index=True)
+
+with tab4:
+    fragmento("historico")(historico)()
+
+# fim do rerun medido; o painel abaixo fica fora da conta
+fim_de_run(); RUN_COMPLETO = False
+rec = instrument.end(TRACE, BASE_DIR); guardar_trace(rec)
+
+def is_admin()->bool:
+    token = os.environ.get("CENTRAL_ADMIN_TOKEN")
+    return bool(token) and st.query_params.get("admin") == token
+
+if is_admin():
+    with st.sidebar.expander("🛠️ Debug (admin)"):
+        io = {"reads":0,"writes":0,"skipped":0, **st.session_state.get("io_stats", {})}
+        st.caption(f"Versão do catálogo: {CATALOG.version} · snapshots carregados no processo: {CATALOG.loads}")
+        st.write(f"Gravações: **{io['writes']}** · ignoradas: **{io['skipped']}** · leituras: **{io['reads']}**")
+        if rec is None: st.caption("Instrumentação desligada: use `CENTRAL_TRACE=1` (ou `profile`).")
+        else:
+            st.write(f"Último rerun: **{rec['total_ms']:.0f} ms**")
+            st.dataframe(pd.DataFrame({"ms": rec["spans"], "chamadas": rec["calls"]}).sort_values("ms", ascending=False), use_container_width=True)
+            st.json(rec["counters"])
+            st.line_chart(pd.DataFrame({"ms": [r["total_ms"] for r in st.session_state.trace_history]}))
+            if "profile" in rec: st.code(rec["profile"], language=None)
+
+st.caption("🕓 Cada alteração fica no histórico (`links_history.sqlite`): veja quem mudou cada link e volte a qualquer data na aba Histórico.")
@@ -0,0 +1 @@
+"""Benchmarks da camada de dados (sem navegador; ver ``bench/run.py``)."""
@@ -0,0 +1,37 @@
+"""Compara dois resultados de ``bench/run.py`` (mediana nova / antiga).
+
+    python -m bench.compare antes.json depois.json [--threshold 1.2]
+
+Sai com código 1 se algum caso ficou mais lento que ``threshold``.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path) -> dict:
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    return {(r["name"], r["size"], r["backend"]): r["median_s"] for r in data["results"]}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args(argv)
+    old, new = load(args.old), load(args.new)
+    worse = 0
+    for key in sorted(old.keys() & new.keys(), key=str):
+        ratio = new[key] / old[key] if old[key] else float("inf")
+        flag = "  <-- mais lento" if ratio > args.threshold else ""
+        worse += bool(flag)
+        name, size, backend = key
+        print(f"{size:>6} {backend or '-':>8} {name:<18} {old[key] * 1000:10.2f} -> {new[key] * 1000:10.2f} ms"
+              f"  x{ratio:.2f}{flag}")
+    return 1 if worse else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
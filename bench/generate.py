@@ -0,0 +1,91 @@
+"""Gerador determinístico de catálogos sintéticos.
+
+Mesmo ``seed`` e ``n`` geram sempre o mesmo catálogo. As distribuições
+imitam um hub real: poucas categorias concentram a maior parte dos links
+(Zipf), cada link tem de 0 a 5 tags tiradas de um vocabulário com cauda
+longa, ~15% dos links estão arquivados e uma fração pequena aponta para a
+mesma planilha de outro link (duplicatas com URLs diferentes).
+
+    python -m bench.generate 100k links_db.csv
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+CATEGORIES = [
+    "Operações", "Vendas", "Financeiro", "Logística", "RH", "Marketing", "Compras",
+    "Qualidade", "Frota", "Atendimento", "TI", "Jurídico", "Expedição", "Estoque",
+    "Planejamento", "Comercial", "Controladoria", "Facilities", "Segurança", "Projetos",
+]
+WORDS = [
+    "Controle", "Relatório", "Painel", "Base", "Acompanhamento", "Escala", "Indicadores",
+    "Inventário", "Fechamento", "Pedidos", "Entregas", "Metas", "Custos", "Rotas",
+    "Motoristas", "Clientes", "Fornecedores", "Devoluções", "Ocorrências", "Turnos",
+]
+TAG_STEMS = [
+    "Shopee", "LPA", "Motoristas", "Diário", "Semanal", "Mensal", "SP", "RJ", "MG", "Sul",
+    "Norte", "Urgente", "Backlog", "KPI", "SLA", "Hub", "CD", "Frota", "B2B", "B2C",
+]
+ALPHABET = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"))
+DUPLICATE_RATE = 0.01
+ARCHIVED_RATE = 0.15
+
+
+def parse_size(size: str) -> int:
+    return SIZES.get(size.lower()) or int(size)
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> np.ndarray:
+    w = 1.0 / np.arange(1, n + 1) ** s
+    return w / w.sum()
+
+
+def generate(n: int, seed: int = 42) -> pd.DataFrame:
+    """Catálogo de ``n`` links na forma texto do armazenamento (``COLS``)."""
+    rng = np.random.default_rng(seed)
+    ids = pd.Series([f"{i:08x}-bench-{seed:04x}" for i in range(n)])
+
+    # nome: duas palavras + número
+    w1, w2 = rng.integers(0, len(WORDS), n), rng.integers(0, len(WORDS), n)
+    names = (pd.Series(np.array(WORDS)[w1]) + " " + pd.Series(np.array(WORDS)[w2]).str.lower()
+             + " " + pd.Series(rng.integers(1, 1000, n)).astype(str))
+
+    # URL: ID de planilha de 44 caracteres, gid às vezes; parte vira duplicata de outra linha
+    sheet = pd.Series(ALPHABET[rng.integers(0, len(ALPHABET), (n, 44))].view("<U44").ravel())
+    dup = rng.random(n) < DUPLICATE_RATE
+    sheet[dup] = sheet.to_numpy()[rng.integers(0, n, dup.sum())]
+    gid = np.where(rng.random(n) < 0.3, rng.integers(1, 2_000_000_000, n).astype(str), "0")
+    suffix = np.where(rng.random(n) < 0.2, "?usp=sharing", "")
+    urls = "https://docs.google.com/spreadsheets/d/" + sheet + "/edit" + suffix + "#gid=" + gid
+
+    cats = np.array(CATEGORIES)[rng.choice(len(CATEGORIES), n, p=_zipf_weights(len(CATEGORIES)))]
+
+    # tags: vocabulário de ~200 (radical + região/número) com cauda longa
+    vocab = np.array([f"{s}-{i:02d}" if i else s for i in range(10) for s in TAG_STEMS])
+    picks = rng.choice(len(vocab), (n, 5), p=_zipf_weights(len(vocab), 0.9))
+    k = rng.choice(6, n, p=[0.1, 0.25, 0.3, 0.2, 0.1, 0.05])
+    tags = [", ".join(dict.fromkeys(vocab[row[:j]])) for row, j in zip(picks, k)]
+
+    created = pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 3 * 365 * 86400, n), unit="s")
+    archived = rng.random(n) < ARCHIVED_RATE
+    arch_at = created + pd.to_timedelta(rng.integers(3600, 180 * 86400, n), unit="s")
+
+    return pd.DataFrame({
+        "ID": ids,
+        "Nome": names,
+        "URL": urls,
+        "Categoria": cats,
+        "Tags": tags,
+        "Ativo": np.where(archived, "False", "True"),
+        "Criado_em": created.strftime("%Y-%m-%d %H:%M:%S"),
+        "Arquivado_em": np.where(archived, arch_at.strftime("%Y-%m-%d %H:%M:%S"), ""),
+        "Versao": rng.integers(1, 4, n).astype(str),
+    })
+
+
+if __name__ == "__main__":
+    size, out = sys.argv[1], sys.argv[2]
+    generate(parse_size(size)).to_csv(out, index=False)
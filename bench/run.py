@@ -0,0 +1,156 @@
+"""Microbenchmarks da camada de dados.
+
+Mede, para catálogos sintéticos (``bench/generate.py``) de cada tamanho, o
+custo dos caminhos que a interface usa: carga a frio (``load_db``),
+gravação completa (``save_db``), conversão de tipos, montagem dos índices,
+filtros/ordenação (``central/query.py``), a importação de CSV e uma
+gravação pequena (arquivar uma linha), sozinha e depois de 200 outras: no
+journal ela não pode crescer com o journal acumulado. O resultado
+vai para um JSON comparável entre versões (``bench/compare.py``)::
+
+    python -m bench.run --sizes 1k,10k,100k --backends sqlite,arrow,journal
+    python -m bench.compare bench/results/antes.json bench/results/depois.json
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from bench.generate import generate, parse_size
+from central.catalog import Catalog
+from central.facets import Facets
+from central.importer import import_csv
+from central.query import filter_view
+from central.search import SearchIndex
+from central.sheet_key import SheetKeyIndex
+from central.storage import ensure_cols, get_storage, serialize
+from central.tag_index import TagIndex
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def measure(fn, repeat: int, setup=None) -> dict:
+    """Executa ``fn`` ``repeat`` vezes (``setup`` antes de cada uma, fora do tempo)."""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t0 = time.perf_counter()
+        fn(arg) if setup else fn()
+        times.append(time.perf_counter() - t0)
+    return {"repeat": repeat, "min_s": min(times), "median_s": statistics.median(times)}
+
+
+def import_payload(text: pd.DataFrame, seed: int = 7) -> bytes:
+    """CSV de importação: 10% das linhas alteradas + 10% de linhas novas."""
+    n = max(1, len(text) // 10)
+    changed = text.sample(n, random_state=seed).assign(Nome=lambda d: d["Nome"] + " (rev)")
+    new = generate(n, seed=seed)
+    return pd.concat([changed, new], ignore_index=True).to_csv(index=False).encode("utf-8")
+
+
+def bench_size(size: str, backends: list[str], repeat: int, workdir: Path):
+    n = parse_size(size)
+    text = generate(n)
+    typed = ensure_cols(text)
+    yield "ensure_cols", None, measure(lambda: ensure_cols(text), repeat)
+    yield "serialize", None, measure(lambda: serialize(typed), repeat)
+    yield "index.tags", None, measure(lambda: TagIndex.build(typed), repeat)
+    yield "index.search", None, measure(lambda: SearchIndex.build(typed), repeat)
+    yield "index.sheet_keys", None, measure(lambda: SheetKeyIndex.build(typed), repeat)
+    tags = TagIndex.build(typed)
+    yield "index.facets", None, measure(lambda: Facets(typed, tags), repeat)
+
+    for kind in backends:
+        folder = workdir / f"{size}-{kind}"
+        folder.mkdir()
+        text.to_csv(folder / "links_db.csv", index=False)
+        store = get_storage(folder, kind)
+        yield "load_db", kind, measure(lambda: Catalog(store).snapshot(), repeat)
+        yield "save_db", kind, measure(lambda: store.replace_all(typed), repeat)
+
+        catalog = Catalog(store)
+        df = catalog.snapshot()
+        catalog.search, catalog.tags  # índices montados fora do tempo medido
+        top_cats = df["Categoria"].value_counts().index[:2].tolist()
+        top_tags = catalog.tags.tags()[:2]
+        cases = {
+            "filter.search": dict(termo="controle rotas"),
+            "filter.category": dict(categorias=top_cats),
+            "filter.tags": dict(tags=top_tags),
+            "filter.sort_name": dict(order="Nome (A→Z)"),
+            "filter.combined": dict(termo="painel", categorias=top_cats, tags=top_tags[:1]),
+        }
+        for name, kwargs in cases.items():
+            yield name, kind, measure(lambda: filter_view(df, catalog, **kwargs), repeat)
+
+        payload = import_payload(text)
+
+        def fresh_catalog():
+            store.replace_all(typed)
+            return Catalog(store)
+
+        yield "import.merge", kind, measure(lambda c: import_csv(c, io.BytesIO(payload)), repeat,
+                                            setup=fresh_catalog)
+        import_csv(catalog, io.BytesIO(payload))  # 1ª importação; as medidas são de reimportação
+        yield "import.reimport", kind, measure(lambda: import_csv(catalog, io.BytesIO(payload)), repeat)
+
+        ids = typed["ID"].tolist()
+
+        def archive_op(k):
+            return {"op": "archive", "ids": [ids[k % len(ids)]],
+                    "values": {"Ativo": "False", "Arquivado_em": "2024-01-01 00:00:00"}}
+
+        store.replace_all(typed)
+        yield "write.archive", kind, measure(lambda: store.apply(archive_op(0)), repeat)
+        for k in range(200):
+            store.apply(archive_op(k))
+        yield "write.archive_200", kind, measure(lambda: store.apply(archive_op(0)), repeat)
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).parent, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,10k", help="tamanhos: 1k,10k,100k,1m ou números")
+    parser.add_argument("--backends", default="sqlite,arrow,journal", help="backends de CENTRAL_STORAGE")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", type=Path, help="arquivo JSON (padrão: bench/results/<data>.json)")
+    args = parser.parse_args(argv)
+
+    import numpy
+    import pyarrow
+    meta = {
+        "commit": git_commit(), "at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "platform": platform.platform(),
+        "pandas": pd.__version__, "numpy": numpy.__version__, "pyarrow": pyarrow.__version__,
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes.split(","):
+            for name, backend, stats in bench_size(size, args.backends.split(","), args.repeat, Path(tmp)):
+                results.append({"name": name, "size": size, "backend": backend, **stats})
+                print(f"{size:>6} {backend or '-':>8} {name:<18} {stats['median_s'] * 1000:10.2f} ms")
+
+    out = args.out or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"meta": meta, "results": results}, indent=2, ensure_ascii=False))
+    print(f"Resultados em {out}")
+
+
+if __name__ == "__main__":
+    main()
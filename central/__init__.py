@@ -0,0 +1 @@
+"""Camada de dados da Central de Planilhas."""
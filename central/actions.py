@@ -0,0 +1,183 @@
+"""Ações sobre o catálogo (arquivar, restaurar, excluir, seleção por filtro).
+
+Não depende do Streamlit: a interface e a linha de comando
+(``central/cli.py``) chamam as mesmas funções. Cada ação monta a operação
+do journal e a grava com ``Catalog.commit``, que só atualiza o snapshot em
+memória se ele já tiver sido carregado; um script que nunca pede o
+snapshot não paga a carga completa nem a montagem dos índices.
+
+``select`` escolhe linhas por filtro lendo só as colunas necessárias
+(``Storage.load(columns=...)``).
+
+Ações em lote da interface (seleção nos cards) passam por uma fila de
+etapas (``STAGE_KINDS``); ``plan`` a converte nas operações do journal e
+numa prévia das linhas afetadas, e ``commit_batch`` grava tudo como uma
+operação ``batch`` (uma transação no SQLite, uma linha no journal), desde
+que nenhuma linha do lote tenha mudado desde o snapshot do plano.
+"""
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from central.catalog import Catalog
+from central.history import open_history
+from central.search import fold
+from central.storage import DATE_FMT, get_storage
+from central.tag_index import parse_tags
+
+# colunas lidas por ``select``
+SELECT_COLS = ["ID", "Nome", "Categoria", "Tags", "Ativo", "Criado_em", "Arquivado_em"]
+SCOPES = ("todas", "ativas", "arquivadas")
+# etapas da fila de ações em lote: {"kind": ..., "ids": [...]} mais
+# "add"/"remove" (listas de tags) em retag e "category" em recategorize
+STAGE_KINDS = ("archive", "restore", "delete", "retag", "recategorize")
+STAGE_LABELS = {"archive": "🗃️ Arquivar", "restore": "♻️ Restaurar", "delete": "🗑️ Excluir definitivamente",
+                "retag": "🏷️ Alterar tags", "recategorize": "📂 Mudar categoria"}
+
+
+def open_catalog(base_dir: Path, kind: str | None = None) -> Catalog:
+    """Catálogo da pasta ``base_dir`` (backend de ``CENTRAL_STORAGE`` se ``kind`` for omitido).
+
+    As gravações entram no histórico da pasta (``central/history.py``),
+    salvo com ``CENTRAL_HISTORY=0``.
+    """
+    return Catalog(get_storage(base_dir, kind), open_history(base_dir))
+
+
+def archive(catalog: Catalog, ids) -> int:
+    """Envia ``ids`` para a lixeira."""
+    ids = list(ids)
+    if ids:
+        ts = datetime.now().strftime(DATE_FMT)
+        catalog.commit({"op": "archive", "ids": ids, "values": {"Ativo": "False", "Arquivado_em": ts}})
+    return len(ids)
+
+
+def restore(catalog: Catalog, ids) -> int:
+    """Tira ``ids`` da lixeira."""
+    ids = list(ids)
+    if ids:
+        catalog.commit({"op": "restore", "ids": ids, "values": {"Ativo": "True", "Arquivado_em": ""}})
+    return len(ids)
+
+
+def delete(catalog: Catalog, ids) -> int:
+    """Exclui ``ids`` definitivamente; devolve quantas linhas saíram."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    return catalog.commit({"op": "delete", "ids": ids}) or 0
+
+
+def select(df: pd.DataFrame, scope: str = "todas", ids=None, categorias=None, tags=None, termo: str = "",
+           criado_antes=None, criado_depois=None, arquivado_antes=None) -> pd.DataFrame:
+    """Linhas de ``df`` que casam com todos os filtros informados.
+
+    ``tags`` exige todas as tags; ``termo`` é um trecho de Nome, Categoria ou
+    Tags (sem acento/caixa); as datas aceitam qualquer texto que o pandas
+    entenda (``2024-01-31``, ``2024-01-31 18:00``...).
+    """
+    mask = pd.Series(True, index=df.index)
+    if scope == "ativas":
+        mask &= df["Ativo"]
+    elif scope == "arquivadas":
+        mask &= ~df["Ativo"]
+    if ids:
+        mask &= df["ID"].isin(list(ids))
+    if categorias:
+        mask &= df["Categoria"].isin(list(categorias))
+    if tags:
+        wanted = set(tags)
+        mask &= df["Tags"].map(lambda s: wanted <= set(parse_tags(s))).astype(bool)
+    if termo:
+        text = (df["Nome"].astype(str) + " " + df["Categoria"].astype(str) + " " + df["Tags"].astype(str))
+        mask &= text.map(fold).str.contains(fold(termo), regex=False)
+    if criado_antes is not None:
+        mask &= df["Criado_em"] < pd.Timestamp(criado_antes)
+    if criado_depois is not None:
+        mask &= df["Criado_em"] >= pd.Timestamp(criado_depois)
+    if arquivado_antes is not None:
+        mask &= df["Arquivado_em"] < pd.Timestamp(arquivado_antes)
+    return df[mask]
+
+
+def plan(df: pd.DataFrame, staged: list[dict]) -> tuple[list[dict], pd.DataFrame]:
+    """Operações do journal para a fila ``staged`` e a prévia das linhas afetadas.
+
+    As etapas valem em ordem sobre ``df`` (o snapshot atual): arquivar só
+    pega linhas ativas, restaurar e excluir só as arquivadas (inclusive as
+    arquivadas por uma etapa anterior), e tags/categoria iguais ao valor
+    novo ficam de fora. IDs que já não existem são ignorados. A prévia tem
+    uma linha por etapa e link (``ID``, ``Nome``, ``Ação``, ``Alteração``).
+    """
+    ids = {i for item in staged for i in item["ids"]}
+    rows = df[df["ID"].isin(list(ids))]
+    rows = rows.astype({"ID": object, "Nome": object, "Tags": object, "Categoria": object})
+    name = dict(zip(rows["ID"], rows["Nome"]))
+    active = dict(zip(rows["ID"], rows["Ativo"]))
+    tags = dict(zip(rows["ID"], rows["Tags"]))
+    category = dict(zip(rows["ID"], rows["Categoria"]))
+    ts = datetime.now().strftime(DATE_FMT)
+    ops, preview = [], []
+    for item in staged:
+        kind, wanted = item["kind"], [i for i in item["ids"] if i in active]
+        if kind == "archive":
+            hit = [i for i in wanted if active[i]]
+            if hit:
+                ops.append({"op": "archive", "ids": hit, "values": {"Ativo": "False", "Arquivado_em": ts}})
+            change = {i: "Ativa → Arquivada" for i in hit}
+        elif kind == "restore":
+            hit = [i for i in wanted if not active[i]]
+            if hit:
+                ops.append({"op": "restore", "ids": hit, "values": {"Ativo": "True", "Arquivado_em": ""}})
+            change = {i: "Arquivada → Ativa" for i in hit}
+        elif kind == "delete":
+            hit = [i for i in wanted if not active[i]]
+            if hit:
+                ops.append({"op": "delete", "ids": hit})
+            change = {i: "Excluída definitivamente" for i in hit}
+        elif kind == "retag":
+            add, remove = list(item.get("add") or []), set(item.get("remove") or [])
+            # valores diferentes por linha: uma operação edit por conjunto de tags resultante
+            by_value, change = {}, {}
+            for i in wanted:
+                old = parse_tags(tags[i])
+                new = [t for t in old if t not in remove] + [t for t in add if t not in old and t not in remove]
+                if new != old:
+                    by_value.setdefault(", ".join(new), []).append(i)
+                    change[i] = f"Tags: {tags[i] or '—'} → {', '.join(new) or '—'}"
+                    tags[i] = ", ".join(new)
+            ops += [{"op": "edit", "ids": hit, "values": {"Tags": value}} for value, hit in by_value.items()]
+        elif kind == "recategorize":
+            new = item["category"].strip()
+            hit = [i for i in wanted if category[i] != new]
+            if hit:
+                ops.append({"op": "edit", "ids": hit, "values": {"Categoria": new}})
+            change = {i: f"Categoria: {category[i] or '—'} → {new or '—'}" for i in hit}
+            category.update(dict.fromkeys(hit, new))
+        else:
+            raise ValueError(f"Etapa desconhecida: {kind}")
+        for i in change:
+            if kind in ("archive", "restore"):
+                active[i] = kind == "restore"
+            elif kind == "delete":
+                del active[i]
+            preview.append({"ID": i, "Nome": name[i], "Ação": STAGE_LABELS[kind], "Alteração": change[i]})
+    return ops, pd.DataFrame(preview, columns=["ID", "Nome", "Ação", "Alteração"])
+
+
+def commit_batch(catalog: Catalog, ops: list[dict], base: pd.DataFrame | None = None) -> int:
+    """Grava ``ops`` (de ``plan``) numa única operação ``batch``; devolve quantas havia.
+
+    Com ``base`` (o snapshot passado a ``plan``) o lote só é gravado se
+    nenhuma das suas linhas mudou desde então; senão ``StaleRows`` sobe com
+    os IDs alterados e nada é gravado.
+    """
+    if ops:
+        expected = None
+        if base is not None:
+            rows = base[base["ID"].isin({i for op in ops for i in op["ids"]})]
+            expected = dict(zip(rows["ID"], rows["Versao"]))
+        catalog.commit({"op": "batch", "ops": ops, "label": "lote"}, expected=expected)
+    return len(ops)
@@ -0,0 +1,283 @@
+"""Endpoint HTTP somente leitura do catálogo, em JSON (sem Streamlit).
+
+    python -m central.api --port 8502
+    curl 'http://localhost:8502/links?categoria=Vendas&tag=Shopee&ativo=true&limit=50'
+
+Rotas:
+
+- ``GET /links``: filtros ``categoria`` e ``tag`` (repetíveis; tags exigem
+  todas), ``ativo`` (``true``/``false``), ``busca`` e ``ordem``
+  (``recentes``, ``antigas``, ``nome``, ``-nome``, ``modificadas``,
+  ``paradas``, ``relevancia``); paginação por ``limit`` (até
+  ``MAX_LIMIT``) e ``offset``. A resposta traz ``total`` e ``next``.
+- ``GET /links/<ID>``: um link.
+- ``GET /status``: versão do catálogo e contagens.
+
+Usa o mesmo backend da interface (``get_storage``/``CENTRAL_STORAGE``) e um
+``Catalog`` por processo, que só relê o armazenamento quando a versão muda.
+O ETag é forte e sai da versão do catálogo mais a consulta normalizada, então
+um ``If-None-Match`` é respondido com 304 sem filtrar nada; as respostas
+montadas ficam num LRU por (versão, consulta). Snapshot e versão são lidos
+juntos (``Catalog.state``), então o ETag sempre corresponde aos dados do
+corpo. Corpo comprimido com gzip leva o sufixo ``-gz`` no ETag: são bytes
+diferentes do corpo sem compressão. ``CENTRAL_API_TOKEN``, se
+definido, passa a exigir ``Authorization: Bearer <token>``.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from central.catalog import Catalog
+from central.query import filter_view
+from central.storage import COLS, DATE_FMT, get_storage
+from central.tag_index import parse_tags
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+CACHE_ENTRIES = 512
+GZIP_MIN_BYTES = 1024
+ORDERS = {
+    "recentes": "Mais recentes", "antigas": "Mais antigas", "nome": "Nome (A→Z)", "-nome": "Nome (Z→A)",
+    "modificadas": "Planilha modificada recentemente", "paradas": "Planilha parada há mais tempo",
+    "relevancia": "Relevância",
+}
+# colunas publicadas (Versao e Metadados_em são controle interno)
+FIELDS = [c for c in COLS if c not in ("Versao", "Metadados_em")]
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def gzip_tag(tag: str) -> str:
+    """ETag do mesmo corpo comprimido com gzip (outros bytes, outro ETag forte)."""
+    return tag[:-1] + '-gz"'
+
+
+def _query(raw: str) -> dict:
+    """Consulta normalizada (ordem estável): a mesma chave para o cache e o ETag."""
+    qs = parse_qs(raw, keep_blank_values=False)
+    q = {
+        "categoria": sorted(qs.get("categoria", [])),
+        "tag": sorted(qs.get("tag", [])),
+        "ativo": (qs.get("ativo") or [""])[-1].lower(),
+        "busca": (qs.get("busca") or [""])[-1].strip(),
+        "ordem": (qs.get("ordem") or ["recentes"])[-1],
+    }
+    if q["ativo"] not in ("", "true", "false"):
+        raise BadRequest("ativo deve ser true ou false")
+    if q["ordem"] not in ORDERS:
+        raise BadRequest(f"ordem deve ser uma de: {', '.join(ORDERS)}")
+    try:
+        q["limit"] = min(int((qs.get("limit") or [DEFAULT_LIMIT])[-1]), MAX_LIMIT)
+        q["offset"] = int((qs.get("offset") or [0])[-1])
+    except ValueError:
+        raise BadRequest("limit e offset devem ser inteiros") from None
+    if q["limit"] < 1 or q["offset"] < 0:
+        raise BadRequest("limit deve ser >= 1 e offset >= 0")
+    return q
+
+
+def _items(df: pd.DataFrame) -> list[dict]:
+    """Linhas tipadas -> JSON (datas em texto, vazias como null, tags em lista)."""
+    out = {}
+    for c in FIELDS:
+        s = df[c]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            out[c] = s.dt.strftime(DATE_FMT).astype(object).where(s.notna(), None)
+        elif c == "Ativo":
+            out[c] = s.astype(bool).astype(object)
+        else:
+            out[c] = s.astype(str).astype(object)
+    rows = pd.DataFrame(out, index=df.index).to_dict("records")
+    for r in rows:
+        r["Tags"] = parse_tags(r["Tags"])
+    return rows
+
+
+class CatalogAPI:
+    """Monta as respostas (corpo + ETag) com cache por versão do catálogo."""
+
+    def __init__(self, catalog: Catalog, cache_entries: int = CACHE_ENTRIES):
+        self.catalog = catalog
+        self.cache_entries = cache_entries
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def version_tag(version) -> str:
+        return hashlib.sha1(repr(version).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def etag(version: str, key: str) -> str:
+        return '"' + hashlib.sha1(f"{version}|{key}".encode()).hexdigest()[:24] + '"'
+
+    def _cached(self, key: tuple, build):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = build()
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return value
+
+    def links(self, q: dict, df: pd.DataFrame) -> dict:
+        if q["ativo"]:
+            df = df[df["Ativo"] == (q["ativo"] == "true")]
+        view = filter_view(df, self.catalog, q["busca"], q["categoria"], q["tag"], ORDERS[q["ordem"]])
+        page = view.iloc[q["offset"]:q["offset"] + q["limit"]]
+        nxt = q["offset"] + q["limit"]
+        return {
+            "total": len(view), "offset": q["offset"], "limit": q["limit"],
+            "next": nxt if nxt < len(view) else None,
+            "items": _items(page),
+        }
+
+    @staticmethod
+    def link(id_: str, df: pd.DataFrame) -> dict | None:
+        rows = df[df["ID"] == id_]
+        return _items(rows)[0] if len(rows) else None
+
+    @staticmethod
+    def status(df: pd.DataFrame, version) -> dict:
+        return {"versao": str(version), "total": len(df), "ativas": int(df["Ativo"].sum()),
+                "arquivadas": int((~df["Ativo"]).sum())}
+
+    def respond(self, path: str, raw_query: str, if_none_match=()):
+        """``(status, corpo JSON em bytes, ETag)``; o corpo pode ser ``None`` (404).
+
+        Se o ETag estiver em ``if_none_match``, devolve 304 antes de filtrar
+        ou serializar qualquer coisa.
+        """
+        # state() relê o backend se outro processo (a interface) gravou; os
+        # builders usam este frame, nunca um snapshot mais novo
+        df, current = self.catalog.state()
+        version = self.version_tag(current)
+        if path == "/links":
+            q = _query(raw_query)
+            key = json.dumps(q, sort_keys=True, ensure_ascii=False)
+            build = lambda: self.links(q, df)  # noqa: E731
+        elif path.startswith("/links/"):
+            id_ = path[len("/links/"):]
+            if not (df["ID"] == id_).any():
+                return 404, None, None
+            key = path
+            build = lambda: self.link(id_, df)  # noqa: E731
+        elif path == "/status":
+            key = path
+            build = lambda: self.status(df, current)  # noqa: E731
+        else:
+            return 404, None, None
+        tag = self.etag(version, key)
+        if tag in if_none_match or "*" in if_none_match:
+            return 304, b"", tag
+
+        def encode():
+            data = build()
+            return None if data is None else json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+        body = self._cached((version, key), encode)
+        return (200 if body is not None else 404), body, tag
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: clientes reaproveitam a conexão
+    # cabeçalho e corpo saem em escritas separadas: sem TCP_NODELAY o ACK
+    # atrasado segura cada resposta por ~40 ms numa conexão reaproveitada
+    disable_nagle_algorithm = True
+    api: CatalogAPI = None
+    token: str | None = None
+    quiet = False
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+    def _send(self, status: int, body: bytes = b"", headers: dict | None = None, head_only: bool = False):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and not head_only:
+            self.wfile.write(body)
+
+    def _error(self, status: int, message: str):
+        body = json.dumps({"erro": message}, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, {"Content-Type": "application/json; charset=utf-8"})
+
+    def do_GET(self, head_only: bool = False):
+        if self.token and self.headers.get("Authorization") != f"Bearer {self.token}":
+            return self._error(401, "token inválido")
+        url = urlsplit(self.path)
+        tags = [t.strip() for t in self.headers.get("If-None-Match", "").split(",") if t.strip()]
+        accepts_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        # o ETag do corpo gzip só vale se o cliente ainda aceita gzip
+        plain = [t[:-4] + '"' if accepts_gzip and t.endswith('-gz"') else t for t in tags]
+        try:
+            status, body, tag = self.api.respond(url.path.rstrip("/") or "/", url.query, plain)
+        except BadRequest as e:
+            return self._error(400, str(e))
+        if body is None:
+            return self._error(404, "não encontrado")
+        if status == 304:
+            sent = gzip_tag(tag) if accepts_gzip and gzip_tag(tag) in tags else tag
+            return self._send(304, b"", {"ETag": sent, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"})
+        headers = {"ETag": tag, "Cache-Control": "no-cache", "Content-Type": "application/json; charset=utf-8",
+                   "Vary": "Accept-Encoding"}
+        if len(body) >= GZIP_MIN_BYTES and accepts_gzip:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+            headers["ETag"] = gzip_tag(tag)
+        self._send(status, body, headers, head_only=head_only)
+
+    def do_HEAD(self):
+        self.do_GET(head_only=True)
+
+
+def serve(base_dir: Path, host: str = "127.0.0.1", port: int = 8502, kind: str | None = None,
+          quiet: bool = False) -> ThreadingHTTPServer:
+    """Cria o servidor (ainda sem ``serve_forever``) para a pasta ``base_dir``."""
+    handler = type("CatalogHandler", (Handler,), {
+        # sem histórico: o serviço só lê o catálogo
+        "api": CatalogAPI(Catalog(get_storage(base_dir, kind))),
+        "token": os.environ.get("CENTRAL_API_TOKEN") or None,
+        "quiet": quiet,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m central.api", description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=Path.cwd(), help="pasta do catálogo (padrão: atual)")
+    parser.add_argument("--storage", help="backend (padrão: CENTRAL_STORAGE)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--quiet", action="store_true", help="sem log de acesso")
+    args = parser.parse_args(argv)
+    server = serve(args.dir, args.host, args.port, args.storage, args.quiet)
+    print(f"Catálogo em http://{args.host}:{server.server_port}/links")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Snapshot do catálogo compartilhado por todas as sessões do processo.
+
+O app mantém um único ``Catalog`` por processo (``st.cache_resource``). Cada
+rerun pede ``snapshot()``, que só relê o armazenamento quando a versão do
+backend mudou (gravação de outro processo ou edição em tabela). O frame
+devolvido é compartilhado e deve ser tratado como somente leitura: com o
+Copy-on-Write do pandas, filtros e fatias não copiam dados, e uma mutação
+feita aqui gera um novo snapshot que só copia as colunas alteradas.
+
+Junto com o snapshot o catálogo mantém os índices derivados (tags, busca
+textual e chave de planilha), montados uma vez por versão e atualizados de
+forma incremental a cada ``commit``. O índice de busca, o de chaves e as
+facetas só são montados no primeiro uso de cada versão.
+
+Com um ``HistoryStore`` (``central/history.py``), toda gravação também
+registra a diferença das linhas afetadas: o estado anterior vem do snapshot,
+se estiver em dia, ou só dessas linhas no backend (``Storage.load_ids``), e
+o posterior sai da mesma ``apply_op`` usada para derivar o snapshot.
+"""
+import threading
+
+import pandas as pd
+
+from central.journal import apply_op
+from central.facets import Facets
+from central.history import HistoryStore, diff, op_deltas, text_rows
+from central.instrument import count, span
+from central.search import SearchIndex
+from central.sheet_key import SheetKeyIndex
+from central.merge import changes_to_ops
+from central.storage import META_COLS, Storage
+from central.tag_index import TagIndex
+
+if int(pd.__version__.split(".")[0]) < 3:
+    # pandas >= 3 já usa Copy-on-Write sempre
+    pd.set_option("mode.copy_on_write", True)
+
+
+def _affected(op: dict) -> set:
+    # IDs tocados pela operação (um lote junta os das etapas)
+    if op["op"] == "batch":
+        return set().union(*(_affected(sub) for sub in op["ops"]))
+    return {r["ID"] for r in op["rows"]} if "rows" in op else set(op["ids"])
+
+
+def _fields(op: dict) -> list[str] | None:
+    # colunas alteradas; None quando a operação inclui ou exclui linhas inteiras
+    if op["op"] == "batch":
+        subs = [_fields(sub) for sub in op["ops"]]
+        return None if any(f is None for f in subs) else sorted(set().union(*subs))
+    if op["op"] == "meta":
+        return [c for c in META_COLS if any(c in r for r in op["rows"])]
+    return list(op["values"]) if "values" in op else None
+
+
+class Catalog:
+    def __init__(self, store: Storage, history: HistoryStore | None = None):
+        self.store = store
+        self.history = history
+        if history is not None and not history.has_baseline:
+            history.baseline(store.load())  # checkpoint inicial: o estado de quando o histórico começou
+        self._lock = threading.Lock()
+        self._df: pd.DataFrame | None = None
+        self._version = None
+        self._tags: TagIndex | None = None
+        self._search: SearchIndex | None = None
+        self._keys: SheetKeyIndex | None = None
+        self._facets: Facets | None = None
+        self.loads = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    def snapshot(self) -> pd.DataFrame:
+        """Devolve o snapshot atual, relendo o backend só se a versão mudou."""
+        return self.state()[0]
+
+    def state(self) -> tuple[pd.DataFrame, object]:
+        """``(snapshot, versão)`` lidos juntos: a versão é sempre a do frame devolvido."""
+        version = self.store.version()
+        with self._lock:
+            if self._df is None or version != self._version:
+                with span("store.load"):
+                    self._df = self.store.load()
+                with span("index.tags"):
+                    self._tags = TagIndex.build(self._df)
+                count("disk.reads")
+                self._search = None
+                self._keys = None
+                self._facets = None
+                self._version = version
+                self.loads += 1
+            return self._df, self._version
+
+    @property
+    def tags(self) -> TagIndex:
+        """Índice de tags da versão atual do snapshot."""
+        self.snapshot()
+        return self._tags
+
+    @property
+    def search(self) -> SearchIndex:
+        """Índice de busca da versão atual (montado sob demanda)."""
+        df = self.snapshot()
+        with self._lock:
+            if self._search is None:
+                with span("index.search"):
+                    self._search = SearchIndex.build(df)
+            return self._search
+
+    @property
+    def keys(self) -> SheetKeyIndex:
+        """Índice chave de planilha -> IDs da versão atual (montado sob demanda)."""
+        df = self.snapshot()
+        with self._lock:
+            if self._keys is None:
+                with span("index.sheet_keys"):
+                    self._keys = SheetKeyIndex.build(df)
+            return self._keys
+
+    @property
+    def facets(self) -> Facets:
+        """Contagens de facetas da versão atual (montadas sob demanda)."""
+        df = self.snapshot()
+        with self._lock:
+            if self._facets is None:
+                with span("index.facets"):
+                    self._facets = Facets(df, self._tags)
+            return self._facets
+
+    def _prior(self, ids, fields: list[str] | None, current: bool) -> dict:
+        # linhas afetadas, em texto, antes da gravação (para o histórico)
+        with span("history.prior"):
+            if current and self._df is not None:
+                ids, col = list(ids), self._df["ID"]
+                # com strings Arrow, o isin de muitos IDs é mais rápido sobre object
+                rows = self._df[(col.astype(object) if len(ids) > 1000 else col).isin(ids)]
+            else:
+                rows = self.store.load_ids(ids, None if fields is None else ["ID", *fields])
+            return text_rows(rows, fields)
+
+    def _record(self, op: dict, prior: dict):
+        with span("history.record"):
+            self.history.record(op_deltas(prior, op), op.get("label", op["op"]))
+
+    def commit(self, op: dict, derive: bool = True, expected: dict | None = None):
+        """Persiste ``op`` e deriva o novo snapshot sem reler o backend.
+
+        ``derive=False`` descarta o snapshot em vez de derivá-lo (relido no
+        próximo ``snapshot()``): gravações em lote (importação) evitam pagar
+        a atualização do snapshot e dos índices a cada operação. Com
+        ``expected`` (ID -> Versao) a gravação só acontece se essas linhas
+        não mudaram; senão ``StaleRows`` sobe e nada é gravado.
+        """
+        with self._lock:
+            before = self.store.version()
+            if self.history is not None:
+                fields = _fields(op)
+                prior = self._prior(_affected(op), fields, before == self._version)
+            with span("store.apply"):
+                n = self.store.apply(op) if expected is None else self.store.apply_checked(op, expected)
+            count("disk.writes")
+            if self.history is not None:
+                self._record(op, prior)
+            if not derive:
+                self._df = None
+                return n
+            # (supõe um único processo gravando; gravações de outro processo
+            # entre ``before`` e ``apply`` só seriam vistas no próximo reload)
+            if self._df is not None and before == self._version:
+                # cópia rasa: só as colunas tocadas pela operação são copiadas;
+                # um lote deriva o snapshot e os índices operação a operação
+                df = self._df.copy(deep=False)
+                for sub in op["ops"] if op["op"] == "batch" else [op]:
+                    df = apply_op(df, sub)
+                    self._tags = self._tags.apply(sub, df)
+                    if self._search is not None:
+                        self._search = self._search.apply(sub, df)
+                    if self._keys is not None:
+                        self._keys = self._keys.apply(sub, df)
+                self._df = df
+                self._facets = None  # contagens da nova versão saem do crosstab
+                self._version = self.store.version()
+            return n
+
+    def commit_changes(self, changes: list[dict]) -> tuple[int, list[dict]]:
+        """Grava alterações da edição em tabela com CAS por linha (``central/merge.py``)."""
+        with self._lock:
+            if self.history is not None:
+                prior = self._prior({ch["ID"] for ch in changes}, None, self.store.version() == self._version)
+            with span("store.commit_changes"):
+                result = self.store.commit_changes(changes)
+            count("disk.writes")
+            if self.history is not None:
+                refused = {c["ID"] for c in result[1]}
+                ops = changes_to_ops([ch for ch in changes if ch["ID"] not in refused])
+                self._record({"op": "batch", "ops": ops, "label": "tabela"}, prior)
+            self._df = None
+            return result
+
+    def replace_all(self, df: pd.DataFrame):
+        with self._lock:
+            if self.history is not None:
+                current = self.store.version() == self._version and self._df is not None
+                prior = text_rows(self._df if current else self.store.load())
+            with span("store.replace_all"):
+                self.store.replace_all(df)
+            count("disk.writes")
+            if self.history is not None:
+                with span("history.record"):
+                    self.history.record(diff(prior, text_rows(df)), "substituição")
+            self._df = None
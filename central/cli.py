@@ -0,0 +1,155 @@
+"""Operações em lote no catálogo pela linha de comando (sem Streamlit).
+
+    python -m central.cli import novos.csv
+    python -m central.cli export -o lixeira.csv --escopo arquivadas
+    python -m central.cli export -o vendas.parquet --categoria Vendas
+    python -m central.cli archive --categoria Vendas --criado-antes 2023-01-01
+    python -m central.cli restore --tag Shopee --tag LPA-03
+    python -m central.cli purge --arquivado-antes 2024-01-01 --yes
+
+A pasta do catálogo vem de ``--dir`` (padrão: pasta atual) e o backend de
+``--storage`` (padrão: ``CENTRAL_STORAGE``). Os filtros combinam entre si;
+``--dry-run`` só mostra quantas linhas seriam afetadas. ``export`` grava em
+blocos (CSV, XLSX, JSON lines ou Parquet, pela extensão ou ``--formato``;
+``central/export.py``). ``purge`` só apaga
+linhas que já estão na lixeira, pede ``--yes`` e registra o que apagou no
+log de exclusões (``central/retention.py``); ``archive`` e ``restore`` sem
+filtro nenhum (o catálogo inteiro) também pedem ``--yes``. Cada comando grava uma
+única operação, então centenas de milhares de linhas saem numa transação
+(SQLite) ou numa linha do journal.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from central import actions, export, retention
+
+# escopo implícito de cada comando (archive só vê ativas, restore/purge só a lixeira)
+SCOPE = {"archive": "ativas", "restore": "arquivadas", "purge": "arquivadas"}
+
+
+def _ids(values: list[str] | None) -> list[str] | None:
+    # --ids a,b,c ou --ids @arquivo (um ID por linha)
+    if not values:
+        return None
+    out = []
+    for v in values:
+        if v.startswith("@"):
+            out += [line.strip() for line in Path(v[1:]).read_text(encoding="utf-8").splitlines() if line.strip()]
+        else:
+            out += [i.strip() for i in v.split(",") if i.strip()]
+    return out
+
+
+def _filtered(args) -> bool:
+    return any([args.ids, args.categoria, args.tag, args.busca,
+                args.criado_antes, args.criado_depois, args.arquivado_antes])
+
+
+def _selected(df, args, scope: str):
+    return actions.select(
+        df, scope=scope, ids=_ids(args.ids), categorias=args.categoria, tags=args.tag, termo=args.busca,
+        criado_antes=args.criado_antes, criado_depois=args.criado_depois, arquivado_antes=args.arquivado_antes,
+    )
+
+
+def cmd_import(catalog, args) -> int:
+    from central.importer import errors_frame, import_csv
+
+    def progress(linhas, _fracao):
+        print(f"\r{linhas} linha(s) lidas…", end="", file=sys.stderr, flush=True)
+
+    report = import_csv(catalog, args.arquivo, chunk_rows=args.bloco, on_progress=progress)
+    print(file=sys.stderr)
+    print(f"{report['linhas']} linha(s): {report['novas']} nova(s), {report['atualizadas']} atualizada(s), "
+          f"{report['iguais']} sem alteração, {len(report['erros'])} rejeitada(s).")
+    if report["erros"] and args.erros:
+        errors_frame(report["erros"]).to_csv(args.erros, index=False)
+        print(f"Relatório de erros em {args.erros}")
+    return 1 if report["erros"] and not (report["novas"] or report["atualizadas"] or report["iguais"]) else 0
+
+
+def cmd_export(catalog, args) -> int:
+    rows = _selected(catalog.store.load(), args, args.escopo)
+    to_stdout = args.output in (None, "-")
+    fmt = args.formato or ("csv" if to_stdout else export.format_for(args.output))
+    if to_stdout:
+        export.write(rows, fmt, sys.stdout.buffer)
+    else:
+        export.write(rows, fmt, args.output)
+        print(f"{len(rows)} linha(s) exportada(s) para {args.output} ({export.FORMATS[fmt][0]})")
+    return 0
+
+
+def cmd_bulk(catalog, args) -> int:
+    # só as colunas dos filtros; o snapshot completo e os índices não são montados
+    columns = actions.SELECT_COLS + (["URL"] if args.comando == "purge" else [])  # URL vai para o log
+    rows = _selected(catalog.store.load(columns=columns), args, SCOPE[args.comando])
+    verb = {"archive": "arquivada(s)", "restore": "restaurada(s)", "purge": "excluída(s) definitivamente"}
+    if args.dry_run:
+        print(f"{len(rows)} linha(s) seriam {verb[args.comando]} (--dry-run).")
+        return 0
+    if args.comando == "purge" and not args.yes:
+        print(f"{len(rows)} linha(s) da lixeira seriam apagadas sem volta; confirme com --yes.", file=sys.stderr)
+        return 2
+    if not _filtered(args) and not args.yes:
+        print(f"Sem filtro: {len(rows)} linha(s) seriam {verb[args.comando]}; confirme com --yes.", file=sys.stderr)
+        return 2
+    fn = {"archive": actions.archive, "restore": actions.restore, "purge": actions.delete}[args.comando]
+    n = fn(catalog, rows["ID"].tolist())
+    if args.comando == "purge":
+        retention.log_purge(args.dir / retention.LOG_NAME, rows, "linha de comando")
+    print(f"{n} linha(s) {verb[args.comando]}.")
+    return 0
+
+
+def _filters(p: argparse.ArgumentParser):
+    g = p.add_argument_group("filtros")
+    g.add_argument("--ids", action="append", help="IDs separados por vírgula ou @arquivo (um por linha)")
+    g.add_argument("--categoria", action="append", help="categoria (repetível)")
+    g.add_argument("--tag", action="append", help="tag (repetível; exige todas)")
+    g.add_argument("--busca", default="", help="trecho de nome, categoria ou tags")
+    g.add_argument("--criado-antes", metavar="DATA")
+    g.add_argument("--criado-depois", metavar="DATA")
+    g.add_argument("--arquivado-antes", metavar="DATA")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m central.cli", description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=Path.cwd(), help="pasta do catálogo (padrão: atual)")
+    parser.add_argument("--storage", help="backend: sqlite, csv, arrow ou journal (padrão: CENTRAL_STORAGE)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("import", help="mescla um CSV no catálogo (upsert por ID)")
+    p.add_argument("arquivo", type=Path)
+    p.add_argument("--bloco", type=int, default=5000, help="linhas por bloco")
+    p.add_argument("--erros", type=Path, help="grava as linhas rejeitadas neste CSV")
+
+    p = sub.add_parser("export", help="exporta o catálogo (ou o filtro) em CSV, XLSX, JSON lines ou Parquet")
+    p.add_argument("-o", "--output", help="arquivo de saída (padrão: stdout)")
+    p.add_argument("--formato", choices=export.available_formats(),
+                   help="padrão: pela extensão do arquivo (CSV na saída padrão)")
+    p.add_argument("--escopo", choices=actions.SCOPES, default="todas")
+    _filters(p)
+
+    for name, text in (("archive", "envia para a lixeira as ativas do filtro"),
+                       ("restore", "restaura as arquivadas do filtro"),
+                       ("purge", "apaga definitivamente as arquivadas do filtro")):
+        p = sub.add_parser(name, help=text)
+        _filters(p)
+        p.add_argument("--dry-run", action="store_true", help="só conta as linhas")
+        p.add_argument("--yes", action="store_true",
+                       help="confirma a exclusão" if name == "purge" else "confirma a operação sem filtro")
+
+    args = parser.parse_args(argv)
+    t0 = time.perf_counter()
+    catalog = actions.open_catalog(args.dir, args.storage)
+    handler = {"import": cmd_import, "export": cmd_export}.get(args.comando, cmd_bulk)
+    code = handler(catalog, args)
+    print(f"({time.perf_counter() - t0:.2f} s)", file=sys.stderr)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Formato colunar (Arrow IPC) para o catálogo.
+
+O arquivo guarda o frame já tipado (``ensure_cols``): nada de reconverter
+texto a cada sessão. A leitura usa memory-map, então as colunas de texto
+viram ``string[pyarrow]`` apontando direto para as páginas do arquivo, e
+``columns=`` lê só as colunas pedidas. O esquema vai embutido nos metadados
+do arquivo (``central.schema``) e é conferido na leitura.
+
+O CSV continua como formato de importação/exportação.
+"""
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from central.storage import COLS, CsvStorage, ensure_cols
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # sem pyarrow os backends usam CSV
+    pa = None
+
+SCHEMA_KEY = b"central.schema"
+SCHEMA_VERSION = 1
+# no Windows um arquivo mapeado não pode ser substituído por os.replace
+MEMORY_MAP = os.name != "nt"
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def write_table(df: pd.DataFrame, path: Path):
+    """Grava ``df`` tipado em ``path`` (Arrow IPC, troca atômica)."""
+    table = pa.Table.from_pandas(ensure_cols(df), preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[SCHEMA_KEY] = json.dumps({"version": SCHEMA_VERSION, "cols": COLS}).encode()
+    table = table.replace_schema_metadata(meta)
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def read_table(path: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """Lê o catálogo de ``path``; ``columns`` limita as colunas carregadas."""
+    source = pa.memory_map(str(path)) if MEMORY_MAP else pa.OSFile(str(path))
+    with source:
+        table = ipc.open_file(source).read_all()
+    schema = json.loads((table.schema.metadata or {}).get(SCHEMA_KEY, b"{}"))
+    if schema.get("version") != SCHEMA_VERSION:
+        raise ValueError(f"Esquema desconhecido em {path}: {schema.get('version')}")
+    wanted = COLS if columns is None else [c for c in COLS if c in columns]
+    table = table.select([c for c in wanted if c in table.column_names])
+    # colunas ausentes (arquivo de versão anterior) são completadas por ensure_cols
+    return ensure_cols(table.to_pandas(), wanted)
+
+
+class ArrowStorage(CsvStorage):
+    """Backend colunar: o arquivo Arrow inteiro é regravado a cada alteração.
+
+    Na primeira execução importa o ``links_db.csv`` legado, que depois fica
+    só como formato de exportação.
+    """
+
+    def __init__(self, path: Path, csv_path: Path | None = None):
+        super().__init__(path)
+        if not self.path.exists():
+            if csv_path is not None and Path(csv_path).exists():
+                base = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+            else:
+                base = pd.DataFrame(columns=COLS)
+            self._write(base)
+
+    def load(self, columns: list[str] | None = None) -> pd.DataFrame:
+        return read_table(self.path, columns)
+
+    def _write(self, df: pd.DataFrame):
+        write_table(df, self.path)
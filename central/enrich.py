@@ -0,0 +1,277 @@
+"""Enriquecimento dos links com metadados da planilha (título, dono, modificação).
+
+Um worker em segundo plano (``Enricher``) busca em lotes os metadados das
+planilhas cujo ``Metadados_em`` está vazio ou vencido (``CENTRAL_ENRICH_TTL``)
+e os grava com a operação ``meta`` (``META_COLS``, sem subir ``Versao``).
+Links que apontam para a mesma planilha compartilham uma consulta.
+
+O cliente é plugável: qualquer objeto com ``batch_size`` e
+``fetch(file_ids) -> {file_id: {"Titulo", "Dono", "Modificado_em"} | None}``
+serve (``None``: planilha inacessível). ``DriveClient`` usa o endpoint de
+lote da API do Google Drive (até 100 chamadas por requisição);
+``CENTRAL_DRIVE_URL`` troca o servidor, o que permite testar contra uma API
+falsa local. ``CENTRAL_ENRICH_CLIENT=modulo:fabrica`` usa outro cliente.
+
+O agendamento respeita a cota: um balde de fichas (``Quota``) limita as
+chamadas por janela e, quando a API responde que a cota acabou, o lote cai
+pela metade e o worker espera (``Retry-After`` ou backoff exponencial);
+lotes bem-sucedidos voltam a crescer aos poucos.
+"""
+import importlib
+import json
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from datetime import datetime
+from email.parser import BytesParser
+from urllib.parse import quote, urlencode
+from uuid import uuid4
+
+import pandas as pd
+
+from central import history
+from central.catalog import Catalog
+from central.sheet_key import sheet_keys
+from central.storage import DATE_FMT, META_COLS, serialize
+
+DRIVE_URL = os.environ.get("CENTRAL_DRIVE_URL", "https://www.googleapis.com")
+TTL = int(os.environ.get("CENTRAL_ENRICH_TTL", 24 * 3600))
+INTERVAL = int(os.environ.get("CENTRAL_ENRICH_INTERVAL", 600))
+QUOTA = os.environ.get("CENTRAL_ENRICH_QUOTA", "600/60")  # chamadas/segundos
+MAX_BACKOFF = 300
+RATE_LIMIT_REASONS = (b"rateLimitExceeded", b"userRateLimitExceeded", b"quotaExceeded")
+
+
+class QuotaExceeded(Exception):
+    """A API recusou chamadas por cota; ``partial`` traz o que voltou no lote."""
+
+    def __init__(self, retry_after: float | None = None, partial: dict | None = None):
+        super().__init__("cota da API excedida")
+        self.retry_after = retry_after
+        self.partial = partial or {}
+
+
+class Quota:
+    """Balde de fichas: no máximo ``limit`` chamadas a cada ``window`` segundos."""
+
+    def __init__(self, limit: int, window: float, clock=time.monotonic, sleep=time.sleep):
+        self.limit = limit
+        self.rate = limit / window
+        self.tokens = float(limit)
+        self.clock = clock
+        self.sleep = sleep
+        self._at = clock()
+
+    @classmethod
+    def parse(cls, spec: str = QUOTA) -> "Quota":
+        limit, window = spec.split("/")
+        return cls(int(limit), float(window))
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.limit, self.tokens + (now - self._at) * self.rate)
+        self._at = now
+
+    def acquire(self, n: int):
+        """Bloqueia até haver ``n`` fichas e as consome."""
+        n = min(n, self.limit)
+        self._refill()
+        while self.tokens < n:
+            self.sleep((n - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= n
+
+
+def _modified(value) -> str:
+    # RFC 3339 (UTC) -> horário local na forma texto do armazenamento
+    if not value:
+        return ""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone().strftime(DATE_FMT)
+
+
+class DriveClient:
+    """Metadados via lote da API do Drive v3 (``files.get`` por planilha)."""
+
+    FIELDS = "name,owners(displayName,emailAddress),modifiedTime"
+
+    def __init__(self, base_url: str = DRIVE_URL, token: str | None = None, api_key: str | None = None,
+                 batch_size: int = 100, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.api_key = api_key
+        self.batch_size = batch_size
+        self.timeout = timeout
+
+    def _request(self, file_ids: list[str]) -> tuple[str, bytes]:
+        boundary = f"batch_{uuid4().hex}"
+        query = {"fields": self.FIELDS, "supportsAllDrives": "true"}
+        if self.api_key:
+            query["key"] = self.api_key
+        parts = [f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <item{n}>\r\n\r\n"
+                 f"GET /drive/v3/files/{quote(fid)}?{urlencode(query)}\r\n\r\n"
+                 for n, fid in enumerate(file_ids)]
+        body = ("".join(parts) + f"--{boundary}--\r\n").encode()
+        headers = {"Content-Type": f"multipart/mixed; boundary={boundary}"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        req = urllib.request.Request(f"{self.base_url}/batch/drive/v3", data=body, headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return resp.headers["Content-Type"], resp.read()
+        except urllib.error.HTTPError as e:
+            text = e.read()
+            if e.code == 429 or (e.code == 403 and any(r in text for r in RATE_LIMIT_REASONS)):
+                retry = e.headers.get("Retry-After")
+                raise QuotaExceeded(float(retry) if retry and retry.isdigit() else None) from e
+            raise
+
+    def fetch(self, file_ids: list[str]) -> dict:
+        ctype, raw = self._request(file_ids)
+        msg = BytesParser().parsebytes(f"Content-Type: {ctype}\r\n\r\n".encode() + raw)
+        out, limited = {}, False
+        for part in msg.get_payload():
+            n = int(re.search(r"item(\d+)", part["Content-ID"] or "").group(1))
+            head, body = (re.split(rb"\r?\n\r?\n", part.get_payload(decode=True), maxsplit=1) + [b""])[:2]
+            status = int(head.split()[1])
+            if status == 429 or (status == 403 and any(r in body for r in RATE_LIMIT_REASONS)):
+                limited = True  # fica fora do resultado e volta para a fila
+            elif status == 200:
+                data = json.loads(body)
+                owner = (data.get("owners") or [{}])[0]
+                out[file_ids[n]] = {"Titulo": data.get("name", ""),
+                                    "Dono": owner.get("displayName") or owner.get("emailAddress", ""),
+                                    "Modificado_em": _modified(data.get("modifiedTime"))}
+            else:
+                out[file_ids[n]] = None  # sem acesso ou excluída
+        if limited:
+            raise QuotaExceeded(partial=out)
+        return out
+
+
+def get_client():
+    """Cliente configurado pelo ambiente, ou ``None`` (enriquecimento desligado)."""
+    factory = os.environ.get("CENTRAL_ENRICH_CLIENT")
+    if factory:
+        module, _, name = factory.partition(":")
+        return getattr(importlib.import_module(module), name)()
+    token, api_key = os.environ.get("CENTRAL_DRIVE_TOKEN"), os.environ.get("CENTRAL_DRIVE_API_KEY")
+    if token or api_key:
+        return DriveClient(token=token, api_key=api_key)
+    return None
+
+
+def stale(df: pd.DataFrame, ttl: int = TTL) -> pd.DataFrame:
+    """Linhas (``ID``, ``Arquivo``) sem metadados ou com metadados vencidos.
+
+    Nunca buscadas primeiro, depois das mais antigas para as mais novas.
+    """
+    limit = pd.Timestamp.now() - pd.Timedelta(seconds=ttl)
+    files = sheet_keys(df["URL"]).str.split("#").str[0]
+    due = df["Metadados_em"].isna() | (df["Metadados_em"] < limit)
+    out = pd.DataFrame({"ID": df["ID"], "Arquivo": files, "Metadados_em": df["Metadados_em"]})[due & files.notna()]
+    return out.sort_values("Metadados_em", na_position="first")[["ID", "Arquivo"]]
+
+
+class Enricher:
+    """Worker de enriquecimento: uma thread por processo, rodadas periódicas."""
+
+    def __init__(self, catalog: Catalog, client, quota: Quota | None = None, ttl: int = TTL,
+                 interval: int = INTERVAL, sleep=time.sleep):
+        self.catalog = catalog
+        self.client = client
+        self.quota = quota or Quota.parse()
+        self.ttl = ttl
+        self.interval = interval
+        self.sleep = sleep
+        self.pending = 0  # planilhas ainda na fila da rodada atual
+        self.busy = False
+        self.last_run: datetime | None = None
+        self.last_error: str | None = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> dict:
+        """Uma rodada incremental; devolve ``consultas``, ``linhas`` e ``esperas``."""
+        todo = stale(self.catalog.snapshot(), self.ttl)
+        ids_by_file = todo.groupby("Arquivo", sort=False)["ID"].agg(list).to_dict()
+        queue = deque(ids_by_file)
+        size, backoff = self.client.batch_size, 1.0
+        report = {"consultas": 0, "linhas": 0, "esperas": 0}
+        self.busy, self.pending, self.last_error = True, len(queue), None
+        try:
+            while queue and not self._stop.is_set():
+                batch = [queue.popleft() for _ in range(min(size, len(queue)))]
+                self.quota.acquire(len(batch))
+                try:
+                    result, throttled = self.client.fetch(batch), None
+                except QuotaExceeded as e:
+                    result, throttled = e.partial, e
+                except (OSError, ValueError) as e:
+                    self.last_error = str(e)  # rede/API fora: tenta na próxima rodada
+                    break
+                report["consultas"] += len(batch)
+                report["linhas"] += self._save(result, ids_by_file)
+                if throttled is not None:
+                    queue.extendleft(reversed([f for f in batch if f not in result]))
+                    size = max(1, size // 2)
+                    report["esperas"] += 1
+                    self.sleep(backoff if throttled.retry_after is None else throttled.retry_after)
+                    backoff = min(backoff * 2, MAX_BACKOFF)
+                else:
+                    size = min(self.client.batch_size, size + max(1, size // 4))
+                    backoff = 1.0
+                self.pending = len(queue)
+        finally:
+            self.busy, self.last_run = False, datetime.now()
+        return report
+
+    def _save(self, result: dict, ids_by_file: dict) -> int:
+        if not result:
+            return 0
+        now = datetime.now().strftime(DATE_FMT)
+        ids = [i for f in result for i in ids_by_file[f]]
+        # planilha inacessível: mantém os metadados anteriores e só marca a consulta
+        df = self.catalog.snapshot()
+        current = serialize(df[df["ID"].isin(ids)]).set_index("ID")
+        rows = []
+        for f, meta in result.items():
+            for i in ids_by_file[f]:
+                if i not in current.index:
+                    continue  # excluída durante a rodada
+                values = meta if meta is not None else current.loc[i, META_COLS[:-1]].to_dict()
+                rows.append({"ID": i, **values, "Metadados_em": now})
+        if rows:
+            self.catalog.commit({"op": "meta", "rows": rows})
+        return len(rows)
+
+    def _loop(self):
+        with history.author("metadados"):
+            self._rounds()
+
+    def _rounds(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:  # a thread não pode morrer com um erro inesperado
+                self.last_error = f"{type(e).__name__}: {e}"
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self) -> "Enricher":
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="enrich", daemon=True)
+            self._thread.start()
+        return self
+
+    def refresh(self):
+        """Antecipa a próxima rodada."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
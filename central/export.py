@@ -0,0 +1,208 @@
+"""Exportação do catálogo (ou de um recorte) em CSV, XLSX, JSON lines e Parquet.
+
+``chunks`` gera o arquivo em blocos de ``CENTRAL_EXPORT_CHUNK`` linhas: a
+linha de comando grava cada bloco direto no destino (``write``), sem montar
+o arquivo inteiro na memória, e a interface só chama ``payload`` quando
+alguém clica em baixar. Todos os formatos saem bloco a bloco: Parquet com
+um row group por bloco e XLSX como um zip escrito em sequência, com a
+planilha montada como XML (strings inline, tudo texto como no CSV).
+
+Parquet precisa do ``pyarrow``; sem ele o formato não aparece em
+``available_formats``.
+"""
+import json
+import os
+import re
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+import pandas as pd
+
+from central.storage import COLS, DATE_COLS, ensure_cols, serialize
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # sem pyarrow, sem Parquet
+    pa = None
+
+CHUNK = int(os.environ.get("CENTRAL_EXPORT_CHUNK", 5000))
+# formato -> (rótulo, extensão, MIME)
+FORMATS = {
+    "csv": ("CSV", ".csv", "text/csv"),
+    "xlsx": ("Excel (XLSX)", ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "jsonl": ("JSON lines", ".jsonl", "application/jsonl"),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+}
+
+
+def available_formats() -> list[str]:
+    return [f for f in FORMATS if f != "parquet" or pa is not None]
+
+
+def format_for(path) -> str:
+    """Formato pela extensão do arquivo (CSV se não reconhecer)."""
+    suffix = Path(path).suffix.lower()
+    return next((f for f, (_, ext, _) in FORMATS.items() if ext == suffix), "csv")
+
+
+def file_name(base: str, fmt: str) -> str:
+    return base + FORMATS[fmt][1]
+
+
+def _blocks(df: pd.DataFrame, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _csv(df, chunk_rows):
+    for i, block in enumerate(_blocks(serialize(df), chunk_rows)):
+        yield block.to_csv(index=False, header=i == 0).encode("utf-8")
+
+
+def _jsonl(df, chunk_rows):
+    # texto como no CSV, mas Ativo booleano, Versao inteira e datas vazias como null
+    for block in _blocks(ensure_cols(df), chunk_rows):
+        out = serialize(block).astype(object)
+        out["Ativo"] = block["Ativo"].astype(object)
+        out["Versao"] = block["Versao"].astype(object)
+        for c in DATE_COLS:
+            out[c] = out[c].mask(out[c].eq(""), None)
+        yield "".join(json.dumps(dict(zip(COLS, row)), ensure_ascii=False) + "\n"
+                      for row in out.itertuples(index=False, name=None)).encode("utf-8")
+
+
+def _parquet(df, chunk_rows):
+    # frame tipado (datas, booleano, inteiro); Categoria como texto para o esquema
+    # não depender das categorias de cada bloco
+    df = ensure_cols(df).astype({"Categoria": "string"})
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    sink = _Pipe()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for block in _blocks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(block, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+
+class _Pipe:
+    """Destino só de escrita: acumula o que foi escrito até o próximo ``drain``.
+
+    Sem ``seek``, o ``zipfile`` grava cada entrada em sequência (com data
+    descriptor) e ``tell`` conta o total já escrito, como num arquivo.
+    """
+
+    closed = False  # o pyarrow confere antes de escrever
+
+    def __init__(self):
+        self.parts: list[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.size
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+# caracteres de controle que o XML não aceita
+XML_ILLEGAL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Links" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_rows(block: pd.DataFrame) -> str:
+    # uma célula de texto inline por valor (nunca fórmula); vazio vira célula em branco
+    row = ""
+    for c in block.columns:
+        text = (block[c].astype("string").str.replace(XML_ILLEGAL, "", regex=True)
+                .str.replace("&", "&amp;").str.replace("<", "&lt;").str.replace(">", "&gt;"))
+        cell = '<c t="inlineStr"><is><t xml:space="preserve">' + text + "</t></is></c>"
+        row = row + cell.where(text.ne(""), "<c/>")
+    return "".join("<row>" + row + "</row>")
+
+
+def _xlsx(df, chunk_rows):
+    sink = _Pipe()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, xml in XLSX_PARTS.items():
+            zf.writestr(name, xml)
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                         '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                         "<sheetData>").encode())
+            sheet.write(_xlsx_rows(pd.DataFrame([COLS], columns=COLS)).encode("utf-8"))
+            for block in _blocks(serialize(df), chunk_rows):
+                sheet.write(_xlsx_rows(block).encode("utf-8"))
+                yield sink.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
+
+WRITERS = {"csv": _csv, "xlsx": _xlsx, "jsonl": _jsonl, "parquet": _parquet}
+
+
+def chunks(df: pd.DataFrame, fmt: str, chunk_rows: int = CHUNK) -> Iterator[bytes]:
+    """Bytes de ``df`` no formato ``fmt``, bloco a bloco."""
+    if fmt not in available_formats():
+        raise ValueError(f"Formato indisponível: {fmt}")
+    return (data for data in WRITERS[fmt](df, chunk_rows) if data)
+
+
+def write(df: pd.DataFrame, fmt: str, out: BinaryIO | Path | str, chunk_rows: int = CHUNK) -> int:
+    """Grava ``df`` em ``out`` (arquivo binário ou caminho) bloco a bloco; devolve os bytes gravados."""
+    if isinstance(out, (str, Path)):
+        with open(out, "wb") as fh:
+            return write(df, fmt, fh, chunk_rows)
+    size = 0
+    for data in chunks(df, fmt, chunk_rows):
+        out.write(data)
+        size += len(data)
+    return size
+
+
+def payload(df: pd.DataFrame, fmt: str, chunk_rows: int = CHUNK) -> bytes:
+    """Arquivo inteiro em memória (download na interface)."""
+    return b"".join(chunks(df, fmt, chunk_rows))
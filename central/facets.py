@@ -0,0 +1,75 @@
+"""Contagens de facetas (Categoria e Tags) por versão do catálogo.
+
+``Facets`` é montado uma vez por versão: as contagens globais por categoria
+e por tag, separadas em ativas/arquivadas, saem de um ``crosstab`` e das
+posting lists do ``TagIndex``. As contagens refinadas pela seleção atual
+(como numa busca facetada) ficam em cache por chave de filtro:
+
+- Categoria (seleção OU): conta as linhas que passam pela busca e pelas
+  tags escolhidas, ignorando a própria seleção de categorias;
+- Tags (seleção E): conta, entre as linhas que passam pela busca, pelas
+  categorias e pelas tags já escolhidas, quantas têm cada tag.
+"""
+from collections import OrderedDict
+
+import pandas as pd
+
+from central.tag_index import TagIndex
+
+CACHE_SIZE = 256
+SCOPES = {"act": ["ativas"], "arch": ["arquivadas"], "all": ["ativas", "arquivadas"]}
+
+
+class Facets:
+    def __init__(self, df: pd.DataFrame, tags: TagIndex):
+        self.tags = tags
+        active = df["Ativo"]
+        self.by_category = (
+            pd.crosstab(df["Categoria"], active)
+            .reindex(columns=[True, False], fill_value=0)
+            .set_axis(["ativas", "arquivadas"], axis=1)
+        )
+        active_ids = set(df.loc[active, "ID"])
+        rows = []
+        for code, post in tags.postings.items():
+            if post:
+                n_act = len(post & active_ids)
+                rows.append((tags.names[code], n_act, len(post) - n_act))
+        self.by_tag = pd.DataFrame(rows, columns=["tag", "ativas", "arquivadas"]).set_index("tag").sort_index()
+        self._cache: OrderedDict = OrderedDict()
+
+    def categories(self, scope: str = "all") -> list[str]:
+        """Categorias com ao menos um link no escopo (``act``, ``arch``, ``all``)."""
+        n = self.by_category[SCOPES[scope]].sum(axis=1)
+        return sorted(c for c in n.index[n > 0] if isinstance(c, str) and c.strip())
+
+    def tag_names(self, scope: str = "all") -> list[str]:
+        n = self.by_tag[SCOPES[scope]].sum(axis=1)
+        return list(n.index[n > 0])
+
+    def refine(self, key, base: pd.DataFrame, cat_sel: list[str], tag_sel: list[str]) -> tuple[dict, dict]:
+        """Contagens ``(categoria -> n, tag -> n)`` para a seleção atual.
+
+        ``base`` são as linhas do escopo que passam pela busca; ``key`` deve
+        identificar o escopo e a busca (o cache vale só para esta versão).
+        """
+        key = (key, tuple(cat_sel), tuple(tag_sel))
+        hit = self._cache.get(key)
+        if hit is not None:
+            self._cache.move_to_end(key)
+            return hit
+        by_tags = base[base["ID"].isin(self.tags.match_all(tag_sel))] if tag_sel else base
+        cat_counts = by_tags["Categoria"].value_counts().to_dict()
+        rows = by_tags[by_tags["Categoria"].isin(cat_sel)] if cat_sel else by_tags
+        ids = set(rows["ID"])
+        tag_counts = {}
+        if ids:
+            for code, post in self.tags.postings.items():
+                n = len(ids & post) if len(post) > len(ids) else len(post & ids)
+                if n:
+                    tag_counts[self.tags.names[code]] = n
+        result = (cat_counts, tag_counts)
+        self._cache[key] = result
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return result
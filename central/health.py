@@ -0,0 +1,295 @@
+"""Verificação de saúde dos links (planilha acessível, sem permissão, excluída).
+
+Um cliente HTTP/1.1 mínimo sobre ``asyncio`` faz ``HEAD`` em cada URL:
+
+- concorrência limitada por um semáforo (``concurrency``);
+- conexões keep-alive reaproveitadas por host (``ConnectionPool``);
+- intervalo mínimo entre requisições ao mesmo host (``per_host_rate``);
+- novas tentativas com backoff exponencial para timeouts, 429 e 5xx.
+
+O cliente não depende do Google: qualquer URL ``http``/``https`` serve, o
+que permite testar contra um servidor HTTP local. Os resultados ficam por ID
+em ``links_health.sqlite`` (fora do catálogo, sem mexer em ``Versao``) e
+valem por ``CENTRAL_HEALTH_TTL`` segundos ou até a URL da linha mudar.
+"""
+import asyncio
+import os
+import sqlite3
+import ssl
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+HEALTH_NAME = "links_health.sqlite"
+TTL = int(os.environ.get("CENTRAL_HEALTH_TTL", 6 * 3600))
+STATUS_LABELS = {
+    "ok": "✅ Acessível",
+    "denied": "🔒 Sem permissão",
+    "not_found": "❌ Não encontrada",
+    "error": "⚠️ Erro",
+    "unchecked": "⏳ Não verificada",  # sem resultado válido (nunca verificada ou vencida)
+}
+LOGIN_HOSTS = ("accounts.google.com",)
+RETRY_CODES = (429, 500, 502, 503, 504)
+USER_AGENT = "central-planilhas-health/1.0"
+
+
+class ConnectionPool:
+    """Conexões keep-alive por (esquema, host, porta) e limite de taxa por host."""
+
+    def __init__(self, timeout: float = 10.0, per_host_rate: float = 5.0, max_idle: int = 4):
+        self.timeout = timeout
+        self.interval = 1.0 / per_host_rate if per_host_rate else 0.0
+        self.max_idle = max_idle
+        self._idle: dict[tuple, list] = defaultdict(list)
+        self._next_slot: dict[str, float] = {}
+        self._ssl = ssl.create_default_context()
+        self.opened = 0  # conexões abertas (reuso = requisições - opened)
+
+    async def _throttle(self, host: str):
+        # reserva o próximo horário livre do host (sem await entre ler e gravar)
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot.get(host, 0.0))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _connect(self, key: tuple):
+        scheme, host, port = key
+        self.opened += 1
+        if scheme == "https":
+            return await asyncio.open_connection(host, port, ssl=self._ssl, server_hostname=host)
+        return await asyncio.open_connection(host, port)
+
+    def _release(self, key: tuple, conn, reusable: bool):
+        if reusable and len(self._idle[key]) < self.max_idle:
+            self._idle[key].append(conn)
+        else:
+            conn[1].close()
+
+    async def request(self, url: str, method: str = "HEAD") -> tuple[int, dict]:
+        """Faz a requisição e devolve ``(status, cabeçalhos)`` (sem seguir redirects)."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"URL não suportada: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        head = (f"{method} {target} HTTP/1.1\r\nHost: {parts.netloc}\r\nUser-Agent: {USER_AGENT}\r\n"
+                "Accept: */*\r\nConnection: keep-alive\r\n\r\n").encode()
+        await self._throttle(parts.hostname)
+        while True:
+            reused = bool(self._idle[key])
+            conn = self._idle[key].pop() if reused else await asyncio.wait_for(self._connect(key), self.timeout)
+            try:
+                status, headers, reusable = await asyncio.wait_for(self._exchange(conn, head, method), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                conn[1].close()
+                if reused:
+                    continue  # keep-alive fechado pelo servidor: tenta numa conexão nova
+                raise
+            except BaseException:
+                conn[1].close()
+                raise
+            self._release(key, conn, reusable)
+            return status, headers
+
+    @staticmethod
+    async def _exchange(conn, head: bytes, method: str) -> tuple[int, dict, bool]:
+        reader, writer = conn
+        writer.write(head)
+        await writer.drain()
+        status_line = (await reader.readuntil(b"\r\n")).decode("latin-1")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = (await reader.readuntil(b"\r\n")).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        reusable = headers.get("connection", "").lower() != "close"
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            return status, headers, reusable
+        if "content-length" in headers:
+            await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await reader.read()  # corpo até o fim da conexão
+            reusable = False
+        return status, headers, reusable
+
+    def close(self):
+        for conns in self._idle.values():
+            for _, writer in conns:
+                writer.close()
+        self._idle.clear()
+
+
+def classify(code: int | None, headers: dict) -> str:
+    """Traduz a resposta HTTP num status de ``STATUS_LABELS``."""
+    if code is None:
+        return "error"
+    if 200 <= code < 300:
+        return "ok"
+    if 300 <= code < 400:
+        # planilha privada: o Google redireciona para a tela de login
+        host = urlsplit(headers.get("location", "")).hostname or ""
+        return "denied" if host in LOGIN_HOSTS else "ok"
+    if code in (401, 403):
+        return "denied"
+    if code in (404, 410):
+        return "not_found"
+    return "error"
+
+
+async def probe(pool: ConnectionPool, url: str, retries: int = 2, backoff: float = 0.5) -> dict:
+    """Status, código HTTP e latência (ms) de ``url``, com novas tentativas."""
+    code, headers, latency = None, {}, None
+    for attempt in range(retries + 1):
+        t0 = time.perf_counter()
+        try:
+            code, headers = await pool.request(url, "HEAD")
+            if code == 405:  # servidor sem HEAD
+                code, headers = await pool.request(url, "GET")
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ValueError):  # LimitOverrunError: linha de cabeçalho maior que o buffer do stream
+            code, headers = None, {}
+        latency = round((time.perf_counter() - t0) * 1000, 1)
+        if code is not None and code not in RETRY_CODES:
+            break
+        if attempt < retries:
+            wait = backoff * 2 ** attempt
+            if headers.get("retry-after", "").isdigit():
+                wait = max(wait, min(int(headers["retry-after"]), 30))
+            await asyncio.sleep(wait)
+    return {"status": classify(code, headers), "code": code, "latency_ms": latency}
+
+
+async def check_urls(items: list[tuple[str, str]], concurrency: int = 10, per_host_rate: float = 5.0,
+                     timeout: float = 10.0, retries: int = 2, on_result=None) -> list[dict]:
+    """Verifica ``items`` (``(ID, URL)``) e devolve um resultado por ID.
+
+    ``on_result(resultado)`` é chamado assim que cada verificação termina.
+    """
+    pool = ConnectionPool(timeout=timeout, per_host_rate=per_host_rate)
+    sem = asyncio.Semaphore(concurrency)
+
+    def done(res):
+        if on_result is not None:
+            on_result(res)
+        return res
+
+    async def one(id_, url):
+        async with sem:
+            res = {"ID": id_, "URL": url, **await probe(pool, url, retries), "checked_at": time.time()}
+        return done(res)
+
+    try:
+        results = await asyncio.gather(*(one(i, u) for i, u in items), return_exceptions=True)
+    finally:
+        pool.close()
+    # um erro inesperado numa verificação não derruba as outras: vira resultado com falha
+    for n, ((id_, url), res) in enumerate(zip(items, results)):
+        if isinstance(res, BaseException) and not isinstance(res, Exception):
+            raise res  # cancelamento
+        if isinstance(res, Exception):
+            results[n] = done({"ID": id_, "URL": url, "status": "error", "code": None, "latency_ms": None,
+                               "checked_at": time.time()})
+    return results
+
+
+class HealthStore:
+    """Resultados por ID (SQLite próprio), com cache em memória no processo."""
+
+    def __init__(self, path: Path, ttl: int = TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.version = 0  # muda a cada gravação (chave de cache da interface)
+        self._lock = threading.Lock()
+        with self._connect() as con:
+            con.execute("CREATE TABLE IF NOT EXISTS health (ID TEXT PRIMARY KEY, URL TEXT, status TEXT, "
+                        "code INTEGER, latency_ms REAL, checked_at REAL)")
+            rows = con.execute("SELECT ID, URL, status, code, latency_ms, checked_at FROM health").fetchall()
+        self._cache = {r[0]: dict(zip(("ID", "URL", "status", "code", "latency_ms", "checked_at"), r))
+                       for r in rows}
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def save(self, results: list[dict]):
+        if not results:
+            return
+        with self._lock, self._connect() as con:
+            con.executemany("INSERT OR REPLACE INTO health VALUES (?, ?, ?, ?, ?, ?)",
+                            [(r["ID"], r["URL"], r["status"], r["code"], r["latency_ms"], r["checked_at"])
+                             for r in results])
+            self._cache = {**self._cache, **{r["ID"]: r for r in results}}
+            self.version += 1
+
+    def current(self, ids, urls) -> dict:
+        """ID -> resultado ainda válido (dentro do TTL e com a mesma URL)."""
+        cache, limit = self._cache, time.time() - self.ttl
+        out = {}
+        for id_, url in zip(ids, urls):
+            r = cache.get(id_)
+            if r is not None and r["URL"] == url and r["checked_at"] >= limit:
+                out[id_] = r
+        return out
+
+    def stale(self, df) -> list[tuple[str, str]]:
+        """``(ID, URL)`` das linhas de ``df`` sem resultado válido."""
+        fresh = self.current(df["ID"], df["URL"])
+        return [(i, u) for i, u in zip(df["ID"], df["URL"]) if i not in fresh]
+
+
+class HealthChecker:
+    """Executa ``check_urls`` numa thread, uma rodada por vez no processo."""
+
+    SAVE_EVERY = 25
+
+    def __init__(self, store: HealthStore, **options):
+        self.store = store
+        self.options = options
+        self.total = 0
+        self.done = 0
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, items: list[tuple[str, str]]) -> bool:
+        """Dispara a verificação de ``items``; ``False`` se já houver uma rodando."""
+        with self._lock:
+            if self.running or not items:
+                return False
+            self.total, self.done = len(items), 0
+            self._thread = threading.Thread(target=self._run, args=(list(items),), name="health-check",
+                                            daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self, items):
+        pending = []
+
+        def on_result(res):
+            self.done += 1
+            pending.append(res)
+            if len(pending) >= self.SAVE_EVERY:
+                self.store.save(pending[:])
+                pending.clear()
+
+        try:
+            asyncio.run(check_urls(items, on_result=on_result, **self.options))
+        finally:
+            self.store.save(pending)
@@ -0,0 +1,326 @@
+"""Histórico de alterações por linha, com checkpoints e restauração no tempo.
+
+Cada gravação do ``Catalog`` vira uma linha por link alterado em
+``links_history.sqlite``: horário, autor, operação e só os campos que
+mudaram, como ``{campo: [antes, depois]}`` (``antes`` nulo numa inclusão,
+``depois`` nulo numa exclusão). ``Versao`` e ``Metadados_em`` são controle
+e ficam de fora; uma rodada de metadados que não mudou nada não grava nada.
+
+Para não reaplicar o histórico inteiro, um checkpoint (catálogo inteiro,
+JSON comprimido com zlib) é gravado no começo e, numa thread à parte,
+a cada ``CENTRAL_HISTORY_CHECKPOINT`` alterações. ``at(quando)`` parte do último
+checkpoint anterior a ``quando`` e reaplica só as alterações seguintes;
+``restore`` transforma a diferença entre esse estado e o atual numa única
+operação ``batch`` (que também entra no histórico).
+
+O autor vem de ``author()`` (contexto por thread, usado pelos workers),
+senão do provedor registrado pela interface (``set_author_provider``),
+senão de ``CENTRAL_AUTHOR`` ou do usuário do sistema.
+"""
+import getpass
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from central.storage import COLS, DATE_COLS, DATE_FMT, serialize
+
+HISTORY_NAME = "links_history.sqlite"
+ENABLED = os.environ.get("CENTRAL_HISTORY", "1").lower() not in ("0", "false", "")
+CHECKPOINT_EVERY = int(os.environ.get("CENTRAL_HISTORY_CHECKPOINT", 2000))
+# campos versionados (Versao e Metadados_em são controle)
+FIELDS = [c for c in COLS if c not in ("Versao", "Metadados_em")]
+DATA_FIELDS = FIELDS[1:]  # sem o ID
+KINDS = {"add": "Inclusão", "edit": "Alteração", "delete": "Exclusão"}
+# operação gravada (``op`` ou o ``label`` de um lote) -> texto da interface
+OP_LABELS = {"add": "inclusão/importação", "archive": "arquivar", "restore": "restaurar da lixeira",
+             "delete": "excluir", "edit": "editar", "meta": "metadados", "batch": "lote", "lote": "lote",
+             "tabela": "edição em tabela", "historico": "volta no histórico", "substituição": "substituição"}
+
+_local = threading.local()
+_provider = None
+
+
+@contextmanager
+def author(name: str):
+    """Atribui as gravações desta thread a ``name`` (workers, scripts)."""
+    previous = getattr(_local, "author", None)
+    _local.author = name
+    try:
+        yield
+    finally:
+        _local.author = previous
+
+
+def set_author_provider(fn):
+    """Registra ``fn() -> str | None`` (ex.: usuário da sessão da interface)."""
+    global _provider
+    _provider = fn
+
+
+def current_author() -> str:
+    name = getattr(_local, "author", None)
+    if not name and _provider is not None:
+        try:
+            name = _provider()
+        except Exception:  # fora de uma sessão (thread sem contexto)
+            name = None
+    return name or os.environ.get("CENTRAL_AUTHOR") or getpass.getuser()
+
+
+def text_rows(df: pd.DataFrame, fields: list[str] | None = None) -> dict:
+    """``ID -> {campo: texto}`` de ``df`` (tipado), na forma do armazenamento.
+
+    Conversão coluna a coluna só dos ``fields`` pedidos: barata para as
+    poucas linhas de uma operação, sem o ``ensure_cols`` de ``serialize``.
+    """
+    fields = [c for c in (fields or DATA_FIELDS) if c in DATA_FIELDS]
+    values = []
+    for c in fields:
+        s = df[c]
+        if c in DATE_COLS:
+            values.append(s.dt.strftime(DATE_FMT).fillna("").tolist())
+        elif c == "Ativo":
+            values.append(["True" if v else "False" for v in s.tolist()])
+        else:
+            values.append(s.astype(str).tolist())
+    return {id_: dict(zip(fields, row)) for id_, *row in zip(df["ID"].astype(str).tolist(), *values)}
+
+
+def _apply(rows: dict, op: dict):
+    # a operação sobre as linhas em texto (mesma semântica de journal.apply_op)
+    kind = op["op"]
+    if kind == "batch":
+        for sub in op["ops"]:
+            _apply(rows, sub)
+    elif kind == "add":
+        for r in op["rows"]:
+            rows[r["ID"]] = {c: str(r.get(c, "")) for c in DATA_FIELDS}
+    elif kind == "delete":
+        for id_ in op["ids"]:
+            rows.pop(id_, None)
+    elif kind == "meta":
+        for r in op["rows"]:
+            if r["ID"] in rows:
+                rows[r["ID"]].update({c: v for c, v in r.items() if c in DATA_FIELDS})
+    else:
+        values = {c: v for c, v in op["values"].items() if c in DATA_FIELDS}
+        for id_ in op["ids"]:
+            if id_ in rows:
+                rows[id_].update(values)
+
+
+def diff(old: dict, new: dict) -> list[tuple]:
+    """``(ID, tipo, {campo: [antes, depois]})`` das linhas que mudaram entre ``old`` e ``new``.
+
+    Um ID ausente de ``new`` foi excluído, ausente de ``old`` foi incluído;
+    linhas presentes nos dois são comparadas nos campos que ambos têm.
+    """
+    out = []
+    for id_, row in new.items():
+        prev = old.get(id_)
+        if prev is None:
+            out.append((id_, "add", {c: [None, v] for c, v in row.items() if v != ""}))
+        else:
+            changed = {c: [prev[c], v] for c, v in row.items() if c in prev and prev[c] != v}
+            if changed:
+                out.append((id_, "edit", changed))
+    for id_, row in old.items():
+        if id_ not in new:
+            out.append((id_, "delete", {c: [v, None] for c, v in row.items() if v != ""}))
+    return out
+
+
+def op_deltas(before: dict, op: dict) -> list[tuple]:
+    """Alterações que ``op`` faz nas linhas ``before`` (de ``text_rows``)."""
+    after = {i: dict(r) for i, r in before.items()}
+    _apply(after, op)
+    return diff(before, after)
+
+
+class HistoryStore:
+    """Alterações por linha e checkpoints num SQLite próprio."""
+
+    def __init__(self, path: Path, checkpoint_every: int = CHECKPOINT_EVERY):
+        self.path = Path(path)
+        self.checkpoint_every = checkpoint_every
+        self.version = 0  # muda a cada gravação (chave de cache da interface)
+        self._lock = threading.Lock()
+        self._checkpointing = False
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                        "ts TEXT, author TEXT, op TEXT, ID TEXT, kind TEXT, delta TEXT)")
+            con.execute("CREATE INDEX IF NOT EXISTS changes_id ON changes (ID, seq)")
+            con.execute("CREATE INDEX IF NOT EXISTS changes_ts ON changes (ts)")
+            con.execute("CREATE TABLE IF NOT EXISTS checkpoints (seq INTEGER PRIMARY KEY, ts TEXT, data BLOB)")
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, timeout=30)
+        con.execute("PRAGMA synchronous=NORMAL")
+        return con
+
+    # -- gravação ------------------------------------------------------------
+    @property
+    def has_baseline(self) -> bool:
+        with self._connect() as con:
+            return con.execute("SELECT 1 FROM checkpoints LIMIT 1").fetchone() is not None
+
+    def baseline(self, df: pd.DataFrame):
+        """Checkpoint inicial (o estado de quando o histórico começou)."""
+        with self._lock, self._connect() as con:
+            if con.execute("SELECT 1 FROM checkpoints LIMIT 1").fetchone() is None:
+                self._write_checkpoint(con, 0, datetime.now().strftime(DATE_FMT), text_rows(df))
+
+    def record(self, items: list[tuple], op: str) -> int:
+        """Grava as alterações ``items`` (de ``op_deltas``/``diff``); devolve quantas."""
+        if not items:
+            return 0
+        ts, who = datetime.now().strftime(DATE_FMT), current_author()
+        with self._lock, self._connect() as con:
+            con.executemany("INSERT INTO changes (ts, author, op, ID, kind, delta) VALUES (?, ?, ?, ?, ?, ?)",
+                            [(ts, who, op, id_, kind, json.dumps(d, ensure_ascii=False)) for id_, kind, d in items])
+            last = con.execute("SELECT MAX(seq) FROM checkpoints").fetchone()[0] or 0
+            head = con.execute("SELECT MAX(seq) FROM changes").fetchone()[0]
+            self.version += 1
+        if head - last >= self.checkpoint_every:
+            self._checkpoint_soon()
+        return len(items)
+
+    def _checkpoint_soon(self):
+        # remontar e comprimir o catálogo inteiro leva tempo: fica fora do caminho da gravação
+        with self._lock:
+            if self._checkpointing:
+                return
+            self._checkpointing = True
+        threading.Thread(target=self.checkpoint, name="history-checkpoint", daemon=True).start()
+
+    def checkpoint(self):
+        """Grava um checkpoint com o estado na última alteração registrada."""
+        try:
+            with self._connect() as con:
+                head, ts = con.execute("SELECT seq, ts FROM changes ORDER BY seq DESC LIMIT 1").fetchone()
+                state = self._state(con, head, None)
+            with self._lock, self._connect() as con:
+                self._write_checkpoint(con, head, ts, state)
+        finally:
+            self._checkpointing = False
+
+    @staticmethod
+    def _write_checkpoint(con, seq: int, ts: str, state: dict):
+        # ts é o da última alteração incluída, para que at() o escolha pelo horário
+        data = {"fields": DATA_FIELDS, "rows": {i: [r[c] for c in DATA_FIELDS] for i, r in state.items()}}
+        blob = zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"), 6)
+        con.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)", (seq, ts, blob))
+
+    # -- leitura -------------------------------------------------------------
+    @staticmethod
+    def _state(con, seq: int | None, ts: str | None) -> dict:
+        # último checkpoint até seq/ts + as alterações seguintes
+        if seq is not None:
+            cp = con.execute("SELECT seq, data FROM checkpoints WHERE seq <= ? ORDER BY seq DESC LIMIT 1",
+                             (seq,)).fetchone()
+        else:
+            cp = con.execute("SELECT seq, data FROM checkpoints WHERE ts <= ? ORDER BY seq DESC LIMIT 1",
+                             (ts,)).fetchone()
+        if cp is None:
+            first = con.execute("SELECT MIN(ts) FROM checkpoints").fetchone()[0]
+            raise ValueError(f"Sem histórico antes de {first}." if first else "Histórico vazio.")
+        data = json.loads(zlib.decompress(cp[1]))
+        state = {i: dict(zip(data["fields"], v)) for i, v in data["rows"].items()}
+        query = "SELECT ID, kind, delta FROM changes WHERE seq > ?"
+        args = [cp[0]]
+        if seq is not None:
+            query += " AND seq <= ?"
+            args.append(seq)
+        else:
+            query += " AND ts <= ?"
+            args.append(ts)
+        for id_, kind, delta in con.execute(query + " ORDER BY seq", args):
+            if kind == "delete":
+                state.pop(id_, None)
+                continue
+            row = state.setdefault(id_, dict.fromkeys(DATA_FIELDS, ""))
+            for c, (_, value) in json.loads(delta).items():
+                row[c] = value
+        return state
+
+    def at(self, when) -> pd.DataFrame:
+        """Catálogo (forma texto, campos versionados) como estava em ``when``."""
+        ts = pd.Timestamp(when).strftime(DATE_FMT)
+        with self._connect() as con:
+            state = self._state(con, None, ts)
+        return pd.DataFrame([{"ID": i, **r} for i, r in state.items()], columns=FIELDS)
+
+    def log(self, id_: str, limit: int = 200) -> pd.DataFrame:
+        """Quem alterou o link ``id_``: uma linha por campo, mais recentes primeiro."""
+        with self._connect() as con:
+            rows = con.execute("SELECT ts, author, op, kind, delta FROM changes WHERE ID = ? "
+                               "ORDER BY seq DESC LIMIT ?", (id_, limit)).fetchall()
+        out = [[ts, who, OP_LABELS.get(op, op), KINDS[kind], c, old, new]
+               for ts, who, op, kind, delta in rows for c, (old, new) in json.loads(delta).items()]
+        return pd.DataFrame(out, columns=["Quando", "Autor", "Operação", "Tipo", "Campo", "Antes", "Depois"])
+
+    def recent(self, limit: int = 50) -> pd.DataFrame:
+        """Últimas alterações do catálogo (um link por linha)."""
+        with self._connect() as con:
+            rows = con.execute("SELECT ts, author, op, ID, kind, delta FROM changes ORDER BY seq DESC LIMIT ?",
+                               (limit,)).fetchall()
+        out = []
+        for ts, who, op, id_, kind, delta in rows:
+            d = json.loads(delta)
+            name = (d.get("Nome") or [None, None])[1 if kind == "add" else 0]
+            out.append([ts, who, OP_LABELS.get(op, op), KINDS[kind], id_, name or "", ", ".join(d)])
+        return pd.DataFrame(out, columns=["Quando", "Autor", "Operação", "Tipo", "ID", "Nome", "Campos"])
+
+    def first_ts(self) -> str | None:
+        with self._connect() as con:
+            return con.execute("SELECT MIN(ts) FROM checkpoints").fetchone()[0]
+
+
+def open_history(base_dir: Path) -> HistoryStore | None:
+    """Histórico da pasta ``base_dir`` (``None`` com ``CENTRAL_HISTORY=0``)."""
+    return HistoryStore(Path(base_dir) / HISTORY_NAME) if ENABLED else None
+
+
+def restore_ops(current: pd.DataFrame, past: pd.DataFrame, ids=None) -> tuple[list[dict], pd.DataFrame]:
+    """Operações que levam ``current`` (tipado) ao estado ``past`` (de ``at``).
+
+    Com ``ids`` só essas linhas voltam. Linhas que não existiam em ``past``
+    são excluídas; as demais são regravadas (``add``, upsert por ID) com a
+    ``Versao`` seguinte à atual. Devolve também a prévia (``ID``, ``Nome``,
+    ``Ação``).
+    """
+    cols = [*FIELDS, "Versao", "Metadados_em"]
+    cur = {r["ID"]: r for r in serialize(current)[cols].astype(object).to_dict("records")}
+    then = {r["ID"]: r for r in past[FIELDS].astype(object).to_dict("records")}
+    if ids is not None:
+        wanted = set(ids)
+        cur = {i: r for i, r in cur.items() if i in wanted}
+        then = {i: r for i, r in then.items() if i in wanted}
+    gone = [i for i in cur if i not in then]
+    rows, preview = [], [[i, cur[i]["Nome"], "Excluída (não existia)"] for i in gone]
+    for id_, row in then.items():
+        now = cur.get(id_)
+        if now is None:
+            rows.append({**row, "Versao": "1", "Metadados_em": ""})
+            preview.append([id_, row["Nome"], "Recriada"])
+        elif any(now[c] != row[c] for c in DATA_FIELDS):
+            rows.append({**row, "Versao": str(int(now["Versao"]) + 1), "Metadados_em": now["Metadados_em"]})
+            preview.append([id_, row["Nome"], "Volta ao estado anterior"])
+    ops = ([{"op": "delete", "ids": gone}] if gone else []) + ([{"op": "add", "rows": rows}] if rows else [])
+    return ops, pd.DataFrame(preview, columns=["ID", "Nome", "Ação"])
+
+
+def restore(catalog, when, ids=None) -> int:
+    """Volta o catálogo (ou só ``ids``) ao estado de ``when``; devolve as linhas gravadas."""
+    ops, preview = restore_ops(catalog.snapshot(), catalog.history.at(when), ids)
+    if ops:
+        catalog.commit({"op": "batch", "ops": ops, "label": "historico"})
+    return len(preview)
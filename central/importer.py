@@ -0,0 +1,119 @@
+"""Importação/mescla de CSV em blocos.
+
+O arquivo é lido em blocos de ``CHUNK_ROWS`` linhas; cada bloco é validado
+de forma vetorizada e comparado com um índice ``ID -> hash da linha``
+montado uma vez a partir do snapshot. Só as linhas novas ou diferentes
+viram uma operação ``add`` (upsert por ID) por bloco, então reimportar o
+mesmo arquivo não grava nada. Linhas inválidas não interrompem a
+importação: voltam no relatório com o número da linha e o motivo. Links
+de uma planilha/aba já cadastrada com outro ID são recusados pelo índice de
+chaves (``central/sheet_key.py``) e as URLs aceitas são gravadas na forma
+canônica.
+"""
+from uuid import NAMESPACE_URL, uuid5
+
+import pandas as pd
+
+from central.catalog import Catalog
+from central.instrument import traced
+from central.merge import DATA_COLS
+from central.sheet_key import SheetKeyIndex, canonical_urls, sheet_key, sheet_keys
+from central.storage import COLS, DATE_COLS, META_COLS, TRUE_VALUES, convert, ensure_cols, serialize
+
+CHUNK_ROWS = 5000
+BOOL_VALUES = TRUE_VALUES + ("false", "0", "não", "nao", "no")
+
+
+def _row_hashes(df: pd.DataFrame) -> dict:
+    # ID -> hash do conteúdo (forma texto); a última ocorrência de um ID vence
+    ids = df["ID"].astype(object)
+    return dict(zip(ids, pd.util.hash_pandas_object(df[DATA_COLS], index=False).tolist()))
+
+
+def validate(chunk: pd.DataFrame, keys: SheetKeyIndex | None = None) -> pd.Series:
+    """Motivo do erro por linha, em forma texto (vazio = linha válida).
+
+    Com ``keys`` também recusa links de planilhas já cadastradas com outro ID.
+    """
+    reason = pd.Series("", index=chunk.index)
+
+    def flag(mask, msg):
+        reason[mask & reason.eq("")] = msg
+
+    flag(chunk["Nome"].str.strip().eq(""), "Nome vazio")
+    sheet = sheet_keys(chunk["URL"])
+    flag(sheet.isna(), "URL inválida")
+    flag(~chunk["Ativo"].str.strip().str.lower().isin(BOOL_VALUES), "Ativo inválido")
+    for c in DATE_COLS:
+        txt = chunk[c].str.strip()
+        flag(txt.ne("") & convert(c, txt).isna(), f"{c} inválido")
+    if keys is not None:
+        ok = reason.eq("")
+        reason[ok] = keys.duplicates(chunk.loc[ok, "ID"], sheet[ok])
+    return reason
+
+
+@traced("import_csv")
+def import_csv(catalog: Catalog, source, chunk_rows: int = CHUNK_ROWS, on_progress=None) -> dict:
+    """Mescla o CSV ``source`` (caminho ou arquivo) no catálogo.
+
+    Linhas sem ``ID`` recebem um ID derivado de Nome e planilha, para que a
+    reimportação as reconheça. ``on_progress(linhas, fração)`` é chamado a
+    cada bloco. Devolve as contagens (``linhas``, ``novas``,
+    ``atualizadas``, ``iguais``) e a lista de ``erros``.
+    """
+    current = serialize(catalog.snapshot())
+    # índice de chaves próprio, atualizado a cada bloco: o snapshot do catálogo
+    # só é relido ao fim (commit com derive=False)
+    keys = catalog.keys.copy()
+    index = _row_hashes(current)
+    versions = dict(zip(current["ID"], current["Versao"].astype(int)))
+    meta = {c: dict(zip(current["ID"], current[c])) for c in META_COLS}
+    size = getattr(source, "size", None)
+    report = {"linhas": 0, "novas": 0, "atualizadas": 0, "iguais": 0, "erros": []}
+    reader = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+    for chunk in reader:
+        first = report["linhas"] + 2  # linha 1 do arquivo é o cabeçalho
+        chunk.index = range(first, first + len(chunk))
+        report["linhas"] += len(chunk)
+        for c in COLS:
+            if c not in chunk.columns:
+                # metadados ausentes no arquivo ficam como estão no catálogo
+                chunk[c] = chunk["ID"].map(meta[c]).fillna("") if c in META_COLS else ""
+        chunk["Ativo"] = chunk["Ativo"].mask(chunk["Ativo"].eq(""), "True")
+        no_id = chunk["ID"].str.strip().eq("")
+        chunk.loc[no_id, "ID"] = [str(uuid5(NAMESPACE_URL, f"{n}|{sheet_key(u) or u}"))
+                                  for n, u in zip(chunk.loc[no_id, "Nome"], chunk.loc[no_id, "URL"])]
+
+        reason = validate(chunk, keys)
+        bad = reason.ne("")
+        report["erros"] += [{"linha": i, "ID": id_, "motivo": m}
+                            for i, id_, m in zip(chunk.index[bad], chunk.loc[bad, "ID"], reason[bad])]
+        chunk = chunk[~bad].assign(URL=lambda c: canonical_urls(sheet_keys(c["URL"])))
+        rows = serialize(ensure_cols(chunk)).drop_duplicates("ID", keep="last")
+
+        hashes = _row_hashes(rows)
+        is_new = [index.get(i) is None for i in hashes]
+        same = [index.get(i) == h for i, h in hashes.items()]
+        report["iguais"] += sum(same)
+        report["novas"] += sum(is_new)
+        report["atualizadas"] += len(rows) - sum(same) - sum(is_new)
+        rows = rows[[not s for s in same]]
+        if len(rows):
+            # linha substituída ganha a versão seguinte à gravada (CAS da edição em tabela)
+            rows["Versao"] = [str(versions.get(i, 0) + 1) for i in rows["ID"]]
+            op = {"op": "add", "rows": rows.astype(object).to_dict("records")}
+            catalog.commit(op, derive=False)
+            keys.update(op, rows)
+            index.update(_row_hashes(rows))
+            versions.update(zip(rows["ID"], rows["Versao"].astype(int)))
+        if on_progress is not None:
+            pos = source.tell() if size and hasattr(source, "tell") else None
+            on_progress(report["linhas"], min(pos / size, 1.0) if pos is not None else None)
+    return report
+
+
+def errors_frame(errors: list[dict]) -> pd.DataFrame:
+    """Relatório de erros da importação, uma linha por linha rejeitada."""
+    return pd.DataFrame([{"Linha": e["linha"], "ID": e["ID"], "Motivo": e["motivo"]} for e in errors],
+                        columns=["Linha", "ID", "Motivo"])
@@ -0,0 +1,172 @@
+"""Instrumentação por rerun: spans nomeados, contadores e cProfile opcional.
+
+Ligada por ``CENTRAL_TRACE`` (``1`` para spans e contadores, ``profile``
+para também rodar o cProfile no rerun inteiro). Desligada, ``span()`` devolve
+um context manager nulo compartilhado e ``count()`` só consulta uma variável
+de thread: o custo é desprezível.
+
+Cada rerun do Streamlit roda numa thread própria; ``begin()`` associa um
+``Trace`` à thread atual, e o código de ``central/`` marca as fases com
+``span("nome")``/``count("nome")`` sem conhecer o Streamlit. ``end()`` fecha
+o registro e o grava como uma linha JSON no log rotativo
+(``CENTRAL_TRACE_LOG``, ``CENTRAL_TRACE_MAX_BYTES``).
+
+Fragmentos (``st.fragment``) que rerodam sozinhos não passam por
+``begin``/``end`` do script: ``fragment_trace`` abre um registro próprio
+(rótulo ``script#fragmento``) quando não há rerun completo em andamento, e
+dentro do rerun completo só deixa as fases contarem no registro dele.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+MODE = os.environ.get("CENTRAL_TRACE", "").lower()
+ENABLED = MODE in ("1", "true", "profile")
+PROFILE = MODE == "profile"
+LOG_NAME = "central_trace.jsonl"
+MAX_BYTES = int(os.environ.get("CENTRAL_TRACE_MAX_BYTES", 5 << 20))
+BACKUPS = 3
+PROFILE_TOP = 25
+
+_local = threading.local()
+_NULL = nullcontext()
+_loggers: dict[str, logging.Logger] = {}
+_loggers_lock = threading.Lock()
+
+
+class Trace:
+    def __init__(self, label: str):
+        self.label = label
+        self.started = time.perf_counter()
+        self.spans: dict[str, float] = defaultdict(float)  # nome -> segundos (soma)
+        self.calls: Counter = Counter()
+        self.counters: Counter = Counter()
+        self.profiler = cProfile.Profile() if PROFILE else None
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    @contextmanager
+    def span(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name] += time.perf_counter() - t0
+            self.calls[name] += 1
+
+    def record(self, **extra) -> dict:
+        rec = {
+            "at": datetime.now().isoformat(timespec="milliseconds"),
+            "label": self.label,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "spans": {k: round(v * 1000, 2) for k, v in self.spans.items()},
+            "calls": dict(self.calls),
+            "counters": {**self.counters, **extra},
+        }
+        if self.profiler is not None:
+            self.profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            rec["profile"] = out.getvalue()
+        return rec
+
+
+def current() -> Trace | None:
+    return getattr(_local, "trace", None)
+
+
+def begin(label: str) -> Trace | None:
+    """Abre o registro do rerun na thread atual (``None`` se desligado)."""
+    if not ENABLED:
+        return None
+    _local.trace = Trace(label)
+    return _local.trace
+
+
+def span(name: str):
+    """Mede o bloco ``with`` no registro da thread (nulo se não houver)."""
+    trace = getattr(_local, "trace", None)
+    return _NULL if trace is None else trace.span(name)
+
+
+def count(name: str, n: int = 1):
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.counters[name] += n
+
+
+def traced(name: str):
+    """Decorador: a função inteira vira o span ``name``."""
+    def wrap(fn):
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            trace = getattr(_local, "trace", None)
+            if trace is None:
+                return fn(*args, **kwargs)
+            with trace.span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def fragment_trace(label: str, log_dir: Path, on_record=None):
+    """Decorador para fragmentos: um registro por rerun só do fragmento.
+
+    ``on_record(registro)`` recebe o registro fechado (ex.: para o painel de
+    debug). No rerun completo o fragmento roda dentro do registro aberto.
+    """
+    def wrap(fn):
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            if not ENABLED or current() is not None:
+                return fn(*args, **kwargs)
+            trace = begin(label)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                rec = end(trace, log_dir)
+                if on_record is not None:
+                    on_record(rec)
+        return inner
+    return wrap
+
+
+def _logger(path: Path) -> logging.Logger:
+    key = str(Path(path).resolve())
+    with _loggers_lock:
+        if key not in _loggers:
+            log = logging.getLogger(f"central.trace.{len(_loggers)}")
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            handler = RotatingFileHandler(key, maxBytes=MAX_BYTES, backupCount=BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            log.addHandler(handler)
+            _loggers[key] = log
+        return _loggers[key]
+
+
+def end(trace: Trace | None, log_dir: Path, **extra) -> dict | None:
+    """Fecha o registro, grava a linha JSON no log e a devolve.
+
+    ``extra`` entra nos contadores (ex.: widgets criados no rerun). O log
+    não leva o texto do cProfile, só o registro do painel.
+    """
+    if trace is None:
+        return None
+    _local.trace = None
+    rec = trace.record(**extra)
+    path = os.environ.get("CENTRAL_TRACE_LOG") or Path(log_dir) / LOG_NAME
+    line = {k: v for k, v in rec.items() if k != "profile"}
+    _logger(path).info(json.dumps(line, ensure_ascii=False))
+    return rec
@@ -0,0 +1,258 @@
+"""Journal append-only de operações sobre o catálogo.
+
+Cada mutação (``add``, ``archive``, ``restore``, ``delete``, ``edit``, ``meta``) vira
+uma linha JSON em ``links_db.journal``; um lote (``batch``) vira uma única
+linha, então entra inteiro ou não entra. O estado é o snapshot mais o replay
+do journal; quando o journal passa de ``max_bytes`` ele é selado e uma
+thread em segundo plano o incorpora a um novo snapshot. Assim o custo de
+gravação acompanha o tamanho da alteração e não o tamanho do catálogo.
+
+Formato de uma operação::
+
+    {"op": "archive", "ids": ["..."], "values": {"Ativo": "False", ...}}
+    {"op": "add", "rows": [{...}, ...]}
+    {"op": "delete", "ids": ["..."]}
+    {"op": "meta", "rows": [{"ID": "...", "Titulo": "...", ...}, ...]}
+    {"op": "batch", "ops": [{"op": "archive", ...}, {"op": "edit", ...}]}
+
+O snapshot é Arrow IPC (``central/columnar.py``) quando o caminho termina em
+``.arrow`` e CSV nos demais casos.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from central import columnar
+from central.storage import COLS, META_COLS, TEXT_DTYPE, Storage, _wanted, convert, ensure_cols, serialize
+
+OPS = ("add", "archive", "restore", "delete", "edit")
+
+
+def apply_op(df: pd.DataFrame, op: dict) -> pd.DataFrame:
+    """Aplica ``op`` a ``df`` e devolve o resultado.
+
+    ``df`` é o frame tipado (``ensure_cols``) e os valores da operação vêm na
+    forma texto do armazenamento; a conversão é feita aqui. Atualizações são
+    feitas no próprio ``df``; ``add`` e ``delete`` devolvem um novo frame.
+    Todas as operações são idempotentes (``add`` é upsert por ID), então
+    reaplicar um trecho do journal não altera o estado.
+    """
+    kind = op["op"]
+    if kind == "batch":
+        for sub in op["ops"]:
+            df = apply_op(df, sub)
+    elif kind == "add":
+        new = ensure_cols(pd.DataFrame(op["rows"]))
+        df = pd.concat([df[~df["ID"].isin(new["ID"])], new], ignore_index=True)
+        df["Categoria"] = df["Categoria"].astype(TEXT_DTYPE).astype("category")  # une as categorias
+    elif kind == "delete":
+        df = df[~df["ID"].isin(op["ids"])].reset_index(drop=True)
+    elif kind == "meta":
+        # valores diferentes por linha; metadados não sobem a Versao
+        rows = pd.DataFrame(op["rows"])
+        cols = [c for c in META_COLS if c in rows.columns]
+        rows = ensure_cols(rows, ["ID", *cols])
+        pos = pd.Index(df["ID"]).get_indexer(rows["ID"])
+        found = pos >= 0
+        for c in cols:
+            df.loc[df.index[pos[found]], c] = rows[c].to_numpy()[found]
+    elif kind in OPS:
+        mask = df["ID"].isin(op["ids"])
+        for col, val in op["values"].items():
+            val = convert(col, pd.Series([val]))[0]
+            if col == "Categoria" and val not in df[col].cat.categories:
+                df[col] = df[col].cat.add_categories([val])
+            df.loc[mask, col] = val
+        df.loc[mask, "Versao"] += 1
+    else:
+        raise ValueError(f"Operação desconhecida no journal: {kind}")
+    return df
+
+
+class JournalStorage(Storage):
+    """Backend snapshot (Arrow ou CSV) + journal append-only com compactação."""
+
+    def __init__(self, snapshot_path: Path, journal_path: Path,
+                 csv_path: Path | None = None, max_bytes: int = 1 << 20):
+        super().__init__()
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = Path(journal_path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._compacting = False
+        # IDs do estado atual, para contar linhas afetadas sem replay do journal;
+        # refeito (uma leitura) quando os arquivos mudam fora deste objeto
+        self._ids: set[str] | None = None
+        self._ids_stamp = None
+        if not self.snapshot_path.exists():
+            if csv_path is not None and Path(csv_path).exists():
+                base = ensure_cols(pd.read_csv(csv_path, dtype=str, keep_default_na=False))
+            else:
+                base = ensure_cols(pd.DataFrame(columns=COLS))
+            self._write_snapshot(base)
+
+    # -- arquivos ---------------------------------------------------------
+    def _sealed(self) -> list[Path]:
+        # segmentos selados aguardando compactação, em ordem de criação
+        return sorted(self.journal_path.parent.glob(self.journal_path.name + ".*"))
+
+    @property
+    def _arrow(self) -> bool:
+        return self.snapshot_path.suffix == ".arrow"
+
+    def _write_snapshot(self, df: pd.DataFrame):
+        if self._arrow:
+            columnar.write_table(df, self.snapshot_path)
+            return
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        serialize(df).to_csv(tmp, index=False)
+        os.replace(tmp, self.snapshot_path)
+
+    def _read_snapshot(self, columns: list[str] | None = None) -> pd.DataFrame:
+        if self._arrow:
+            return columnar.read_table(self.snapshot_path, columns)
+        wanted = _wanted(columns)
+        df = pd.read_csv(self.snapshot_path, dtype=str, keep_default_na=False, usecols=lambda c: c in wanted)
+        return ensure_cols(df, wanted)
+
+    @staticmethod
+    def _replay(df: pd.DataFrame, path: Path) -> pd.DataFrame:
+        if not path.exists():
+            return df
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    df = apply_op(df, json.loads(line))
+        return df
+
+    def _read_state(self, segments: list[Path]) -> pd.DataFrame:
+        df = self._read_snapshot()
+        for seg in segments:
+            df = self._replay(df, seg)
+        return df
+
+    # -- Storage ----------------------------------------------------------
+    def load(self, columns: list[str] | None = None) -> pd.DataFrame:
+        with self._lock:
+            return self._load(columns)
+
+    def _load(self, columns: list[str] | None = None) -> pd.DataFrame:
+        # chamado com o lock
+        segments = [p for p in self._sealed() + [self.journal_path] if p.exists() and p.stat().st_size]
+        if not segments:  # recém-compactado: só as colunas pedidas saem do snapshot
+            return self._read_snapshot(columns)
+        return self._read_state(segments)[_wanted(columns)]
+
+    def _stamp(self):
+        # chamado com o lock
+        snap = self.snapshot_path.stat().st_mtime_ns
+        size = self.journal_path.stat().st_size if self.journal_path.exists() else 0
+        return (snap, size, len(self._sealed()))
+
+    def _current_ids(self) -> set[str]:
+        # chamado com o lock; só relê o estado se outro processo gravou
+        if self._ids is None or self._ids_stamp != self._stamp():
+            self._ids = set(self._load(["ID"])["ID"])
+        return self._ids
+
+    def _affected(self, ops: list[dict]) -> tuple[int, set[str], set[str]]:
+        # linhas afetadas como no SQLite: exclusão e edição só contam IDs que
+        # existiam. Devolve também os IDs que entram e saem, aplicados ao
+        # conjunto em memória só depois da gravação.
+        ids = self._current_ids()
+        added, removed = set(), set()
+        n = 0
+        for o in ops:
+            if o["op"] == "add":
+                new = {r.get("ID") for r in o["rows"]}
+                added |= new
+                removed -= new
+                n += len(o["rows"])
+                continue
+            keys = [r["ID"] for r in o["rows"]] if o["op"] == "meta" else set(o["ids"])
+            hit = [i for i in keys if (i in ids or i in added) and i not in removed]
+            n += len(hit)
+            if o["op"] == "delete":
+                added -= set(hit)
+                removed |= set(hit)
+        return n, added, removed
+
+    def version(self):
+        with self._lock:
+            return self._stamp()
+
+    def apply(self, op: dict):
+        entry = dict(op, at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            n, added, removed = self._affected(op.get("ops", [op]))
+            with open(self.journal_path, "a", encoding="utf-8") as fh:
+                fh.write(line)
+                fh.flush()
+                os.fsync(fh.fileno())
+            # linha sem ID ganha um gerado no replay: o conjunto é refeito na próxima vez
+            if None in added:
+                self._ids = None
+            else:
+                self._ids |= added
+                self._ids -= removed
+            size = self.journal_path.stat().st_size
+            if size >= self.max_bytes and not self._compacting:
+                self._seal()
+                self._compacting = True
+                threading.Thread(target=self.compact, name="journal-compact", daemon=True).start()
+            self._ids_stamp = self._stamp()
+        return n
+
+    def insert(self, rows: list[dict]):
+        self.apply({"op": "add", "rows": rows})
+
+    def update(self, ids: list[str], values: dict, op: str = "edit"):
+        self.apply({"op": op, "ids": list(ids), "values": values})
+
+    def delete(self, ids: list[str]) -> int:
+        return self.apply({"op": "delete", "ids": list(ids)})
+
+    def annotate(self, rows: list[dict]):
+        self.apply({"op": "meta", "rows": rows})
+
+    def replace_all(self, df: pd.DataFrame):
+        df = ensure_cols(df)
+        with self._lock:
+            self._write_snapshot(df)
+            for seg in self._sealed() + [self.journal_path]:
+                seg.unlink(missing_ok=True)
+            self._ids, self._ids_stamp = set(df["ID"]), self._stamp()
+
+    # -- compactação ------------------------------------------------------
+    def _seal(self):
+        # chamado com o lock: novas operações passam a ir para um journal novo
+        if self.journal_path.exists():
+            stamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
+            os.replace(self.journal_path, self.journal_path.with_name(f"{self.journal_path.name}.{stamp}"))
+
+    def compact(self):
+        """Incorpora os segmentos selados a um novo snapshot."""
+        try:
+            with self._lock:
+                segments = self._sealed()
+            if segments:
+                # trabalho pesado fora do lock; só a troca de arquivos é exclusiva
+                df = self._read_state(segments)
+                with self._lock:
+                    if not all(seg.exists() for seg in segments):
+                        return  # replace_all() rodou no meio; o snapshot já é mais novo
+                    # o estado não muda: o conjunto de IDs continua valendo
+                    fresh = self._ids_stamp == self._stamp()
+                    self._write_snapshot(df)
+                    for seg in segments:
+                        seg.unlink(missing_ok=True)
+                    if fresh:
+                        self._ids_stamp = self._stamp()
+        finally:
+            self._compacting = False
@@ -0,0 +1,164 @@
+"""Controle de concorrência otimista para edições em tabela.
+
+Cada linha tem um carimbo ``Versao`` que sobe a cada alteração. Uma sessão
+que edita a tabela guarda o snapshot em que começou (``base``); ao salvar,
+``diff_frames`` gera só as linhas alteradas e o backend faz um
+compare-and-swap por linha (``Storage.commit_changes``):
+
+- versão igual à da base: aplica;
+- versão diferente, mas os campos editados não mudaram desde a base
+  (outra sessão mexeu em outros campos): aplica por cima (rebase);
+- caso contrário: conflito, devolvido campo a campo para a interface.
+
+Alterações em linhas diferentes nunca conflitam entre si. URLs editadas na
+tabela são gravadas na forma canônica, como no cadastro e na importação.
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from central.sheet_key import canonical_url, sheet_key
+from central.storage import COLS, DATE_FMT, META_COLS, serialize
+
+# campos comparados no diff (ID identifica a linha, Versao é controle e os
+# metadados vêm do enriquecimento, não da edição)
+DATA_COLS = [c for c in COLS if c not in ("ID", "Versao", *META_COLS)]
+
+
+def _canonical(url: str) -> str:
+    # URL inválida fica como digitada: a validação a recusa com o motivo certo
+    key = sheet_key(url)
+    return canonical_url(key) if key else url
+
+
+def diff_frames(base: pd.DataFrame, edited: pd.DataFrame) -> list[dict]:
+    """Lista as alterações de ``edited`` em relação a ``base``.
+
+    Cada alteração é um dict com ``kind`` (``insert``, ``update`` ou
+    ``delete``), ``ID``, ``expected`` (versão vista na base) e, conforme o
+    tipo, ``row`` (linha nova) ou ``values``/``base`` (campos alterados e
+    seus valores originais).
+    """
+    # comparação na forma texto do armazenamento (mesma das operações)
+    base = serialize(base).set_index("ID")
+    edited = serialize(edited)
+    changes = []
+
+    new = edited[~edited["ID"].isin(base.index)]
+    for row in new.to_dict("records"):
+        changes.append({"kind": "insert", "ID": row["ID"], "expected": None, "row": row})
+
+    for id_ in base.index[~base.index.isin(edited["ID"])]:
+        changes.append({"kind": "delete", "ID": id_, "expected": base.at[id_, "Versao"]})
+
+    common = edited[edited["ID"].isin(base.index)].drop_duplicates("ID", keep="last").set_index("ID")
+    if len(common):
+        old = base.loc[common.index, DATA_COLS]
+        cur = common[DATA_COLS]
+        neq = cur.ne(old)
+        for id_ in neq.index[neq.any(axis=1)]:
+            cols = [c for c in DATA_COLS if neq.at[id_, c]]
+            changes.append({
+                "kind": "update", "ID": id_, "expected": base.at[id_, "Versao"],
+                "values": {c: cur.at[id_, c] for c in cols},
+                "base": {c: old.at[id_, c] for c in cols},
+            })
+    return changes
+
+
+def editor_changes(base: pd.DataFrame, state: dict) -> list[dict]:
+    """Alterações a partir do estado do ``st.data_editor`` que exibiu ``base``.
+
+    ``state`` traz ``edited_rows`` (posição -> coluna -> valor),
+    ``added_rows`` e ``deleted_rows`` (posições). Só essas linhas são
+    convertidas e comparadas, no mesmo formato de ``diff_frames``; colunas
+    fora de ``COLS`` (ex.: ``Selecionar``) são ignoradas.
+    """
+    base = serialize(base).reset_index(drop=True)
+    changes = []
+    for pos, values in (state.get("edited_rows") or {}).items():
+        old = base.iloc[int(pos)]
+        cells = {c: v for c, v in values.items() if c in DATA_COLS}
+        if not cells:
+            continue
+        row = serialize(pd.DataFrame([{**old.to_dict(), **cells}])).iloc[0]
+        if "URL" in cells:
+            row["URL"] = _canonical(row["URL"])
+        cols = [c for c in cells if row[c] != old[c]]
+        if cols:
+            changes.append({
+                "kind": "update", "ID": old["ID"], "expected": old["Versao"],
+                "values": {c: row[c] for c in cols}, "base": {c: old[c] for c in cols},
+            })
+    added = [{c: v for c, v in r.items() if c in DATA_COLS} for r in state.get("added_rows") or []]
+    if added:
+        now = datetime.now().strftime(DATE_FMT)
+        for row in serialize(pd.DataFrame(added)).to_dict("records"):
+            row["Criado_em"] = row["Criado_em"] or now
+            row["URL"] = _canonical(row["URL"])
+            changes.append({"kind": "insert", "ID": row["ID"], "expected": None, "row": row})
+    for pos in state.get("deleted_rows") or []:
+        old = base.iloc[int(pos)]
+        changes.append({"kind": "delete", "ID": old["ID"], "expected": old["Versao"]})
+    return changes
+
+
+def changed_rows(changes: list[dict], base: pd.DataFrame) -> pd.DataFrame:
+    """Linhas resultantes (forma texto) das inserções e atualizações, para validação."""
+    base = serialize(base).drop_duplicates("ID", keep="last").set_index("ID", drop=False)
+    rows = [c["row"] if c["kind"] == "insert" else {**base.loc[c["ID"]].to_dict(), **c["values"]}
+            for c in changes if c["kind"] != "delete"]
+    return pd.DataFrame(rows, columns=COLS)
+
+
+def check_conflict(change: dict, current: dict | None) -> dict | None:
+    """Compara uma alteração com a linha atual; devolve o conflito ou ``None``."""
+    kind = change["kind"]
+    if kind == "insert":
+        if current is None:
+            return None
+        return {"ID": change["ID"], "motivo": "ID já existe", "campos": {}}
+    if current is None:
+        if kind == "delete":
+            return None  # já excluída por outra sessão
+        return {"ID": change["ID"], "motivo": "excluída por outra sessão", "campos": {}}
+    if str(current.get("Versao", "")) == str(change["expected"]):
+        return None
+    if kind == "delete":
+        return {"ID": change["ID"], "motivo": "alterada por outra sessão", "campos": {}}
+    changed = {
+        c: (change["base"][c], change["values"][c], str(current.get(c, "")))
+        for c in change["values"]
+        if str(current.get(c, "")) != change["base"][c]
+    }
+    if not changed:
+        return None  # outra sessão mexeu em outros campos: aplica por cima
+    return {"ID": change["ID"], "motivo": "campo alterado por outra sessão", "campos": changed}
+
+
+def changes_to_ops(changes: list[dict]) -> list[dict]:
+    """Converte alterações aceitas em operações do journal."""
+    ops = []
+    rows = [c["row"] for c in changes if c["kind"] == "insert"]
+    if rows:
+        ops.append({"op": "add", "rows": rows})
+    ids = [c["ID"] for c in changes if c["kind"] == "delete"]
+    if ids:
+        ops.append({"op": "delete", "ids": ids})
+    for c in changes:
+        if c["kind"] == "update":
+            ops.append({"op": "edit", "ids": [c["ID"]], "values": c["values"]})
+    return ops
+
+
+def conflicts_frame(conflicts: list[dict]) -> pd.DataFrame:
+    """Uma linha por campo em conflito, para exibir como diff."""
+    rows = []
+    for c in conflicts:
+        if not c["campos"]:
+            rows.append({"ID": c["ID"], "Motivo": c["motivo"], "Campo": "",
+                         "Original": "", "Seu valor": "", "Valor atual": ""})
+        for campo, (orig, mine, theirs) in c["campos"].items():
+            rows.append({"ID": c["ID"], "Motivo": c["motivo"], "Campo": campo,
+                         "Original": orig, "Seu valor": mine, "Valor atual": theirs})
+    return pd.DataFrame(rows, columns=["ID", "Motivo", "Campo", "Original", "Seu valor", "Valor atual"])
@@ -0,0 +1,50 @@
+"""Filtro e ordenação das listagens (abas Ativas e Lixeira).
+
+Função pura sobre o snapshot e os índices do ``Catalog``: a interface só
+lê os widgets e chama ``filter_view``; o benchmark e outros consumidores
+sem Streamlit usam o mesmo caminho.
+"""
+import pandas as pd
+
+from central.catalog import Catalog
+from central.instrument import traced
+
+ORDERS = ["Relevância", "Mais recentes", "Mais antigas", "Nome (A→Z)", "Nome (Z→A)",
+          "Planilha modificada recentemente", "Planilha parada há mais tempo"]
+
+
+@traced("filter_view")
+def filter_view(df: pd.DataFrame, catalog: Catalog, termo: str = "", categorias=None, tags=None,
+                order: str = ORDERS[0], scores: dict | None = None, status=None,
+                health: dict | None = None) -> pd.DataFrame:
+    """Linhas de ``df`` que casam com a busca, categorias, tags e status do link, já ordenadas.
+
+    ``scores`` é o resultado de ``catalog.search.search(termo)`` quando quem
+    chama já o calculou (as facetas usam o mesmo resultado). ``health`` é o
+    ``HealthStore.current`` (ID -> resultado); sem resultado conta como
+    ``unchecked``.
+    """
+    view = df
+    if termo:
+        if scores is None:
+            scores = catalog.search.search(termo)
+        view = view[view["ID"].isin(list(scores))]
+    if categorias:
+        view = view[view["Categoria"].isin(categorias)]
+    if tags:
+        # interseção das posting lists das tags escolhidas
+        view = view[view["ID"].isin(catalog.tags.match_all(tags))]
+    if status:
+        by_id = {i: r["status"] for i, r in (health or {}).items()}
+        view = view[view["ID"].map(by_id).fillna("unchecked").isin(status)]
+    if order == "Relevância" and termo:
+        return view.iloc[view["ID"].map(scores).argsort()[::-1]]
+    if order in ("Relevância", "Mais recentes"):
+        # sem busca, "Relevância" equivale a "Mais recentes"
+        return view.sort_values("Criado_em", ascending=False, na_position="last")
+    if order == "Mais antigas":
+        return view.sort_values("Criado_em", ascending=True, na_position="last")
+    if order.startswith("Planilha"):
+        # Modificado_em vem do enriquecimento (central/enrich.py); sem metadados vai para o fim
+        return view.sort_values("Modificado_em", ascending=order.endswith("tempo"), na_position="last")
+    return view.sort_values("Nome", ascending=order == "Nome (A→Z)", na_position="last")
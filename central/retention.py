@@ -0,0 +1,142 @@
+"""Retenção da lixeira: exclusão automática das arquivadas antigas.
+
+Com ``CENTRAL_RETENTION_DAYS`` definido, um worker em segundo plano
+(``Purger``, uma thread por processo) apaga de tempos em tempos
+(``CENTRAL_RETENTION_INTERVAL``) as linhas arquivadas há mais de N dias
+(``Arquivado_em``). A exclusão sai em lotes de ``CENTRAL_RETENTION_BATCH``
+linhas, cada um uma operação ``delete`` curta, e um balde de fichas
+(``enrich.Quota``, ``CENTRAL_RETENTION_RATE`` em linhas/segundos) espaça os
+lotes: o lock do catálogo fica livre entre eles e as sessões interativas
+não esperam por uma exclusão grande.
+
+Cada lote vira uma linha no log de exclusões (``links_purge.jsonl``):
+horário, regra e ``[ID, Nome, URL, Arquivado_em]`` de cada linha apagada,
+o suficiente para recadastrar algo removido por engano. ``python -m
+central.cli purge`` grava no mesmo log.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from central import actions, history
+from central.catalog import Catalog
+from central.enrich import Quota
+from central.storage import DATE_FMT, serialize
+
+DAYS = int(os.environ.get("CENTRAL_RETENTION_DAYS") or 0)  # 0: desligada
+INTERVAL = int(os.environ.get("CENTRAL_RETENTION_INTERVAL", 3600))
+BATCH = int(os.environ.get("CENTRAL_RETENTION_BATCH", 200))
+RATE = os.environ.get("CENTRAL_RETENTION_RATE", "1000/60")  # linhas/segundos
+LOG_NAME = "links_purge.jsonl"
+LOG_COLS = ["ID", "Nome", "URL", "Arquivado_em"]
+
+_log_lock = threading.Lock()
+
+
+def due(df: pd.DataFrame, days: int, now: datetime | None = None) -> pd.DataFrame:
+    """Arquivadas há mais de ``days`` dias, das mais antigas para as mais novas."""
+    limit = pd.Timestamp(now or datetime.now()) - pd.Timedelta(days=days)
+    return actions.select(df, "arquivadas", arquivado_antes=limit).sort_values("Arquivado_em")
+
+
+def log_purge(path: Path, rows: pd.DataFrame, rule: str):
+    """Acrescenta ao log de exclusões uma linha com o lote ``rows``."""
+    if not len(rows):
+        return
+    items = serialize(rows)[LOG_COLS].astype(object).values.tolist()
+    line = {"em": datetime.now().strftime(DATE_FMT), "regra": rule, "n": len(items), "linhas": items}
+    with _log_lock, open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+
+def read_log(path: Path, limit: int = 50) -> pd.DataFrame:
+    """Últimas ``limit`` linhas excluídas (as mais recentes primeiro)."""
+    path = Path(path)
+    rows = []
+    if path.exists():
+        for raw in reversed(path.read_text(encoding="utf-8").splitlines()):
+            entry = json.loads(raw)
+            rows += [[entry["em"], entry["regra"], *item] for item in entry["linhas"]]
+            if len(rows) >= limit:
+                break
+    return pd.DataFrame(rows[:limit], columns=["Excluída em", "Regra", *LOG_COLS])
+
+
+class Purger:
+    """Worker de retenção: rodadas periódicas, exclusão em lotes com limite de taxa."""
+
+    def __init__(self, catalog: Catalog, log_path: Path, days: int = DAYS, interval: int = INTERVAL,
+                 batch: int = BATCH, quota: Quota | None = None):
+        self.catalog = catalog
+        self.log_path = Path(log_path)
+        self.days = days
+        self.interval = interval
+        self.batch = batch
+        self.quota = quota or Quota.parse(RATE)
+        self.busy = False
+        self.removed = 0  # total excluído desde que o processo subiu
+        self.last_run: datetime | None = None
+        self.last_error: str | None = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def rule(self) -> str:
+        return f"arquivada há mais de {self.days} dia(s)"
+
+    def run_once(self) -> dict:
+        """Uma rodada; devolve ``linhas`` excluídas e ``lotes`` gravados."""
+        todo = due(self.catalog.snapshot(), self.days)
+        report = {"linhas": 0, "lotes": 0}
+        self.busy, self.last_error = True, None
+        try:
+            for start in range(0, len(todo), self.batch):
+                if self._stop.is_set():
+                    break
+                chunk = todo.iloc[start:start + self.batch]
+                self.quota.acquire(len(chunk))
+                # restaurada durante a rodada: fica fora do lote
+                current = self.catalog.snapshot()
+                chunk = chunk[chunk["ID"].isin(current.loc[~current["Ativo"], "ID"])]
+                if not len(chunk):
+                    continue
+                actions.delete(self.catalog, chunk["ID"].tolist())
+                log_purge(self.log_path, chunk, self.rule)
+                report["linhas"] += len(chunk)
+                report["lotes"] += 1
+                self.removed += len(chunk)
+        finally:
+            self.busy, self.last_run = False, datetime.now()
+        return report
+
+    def _loop(self):
+        with history.author("retenção"):
+            self._rounds()
+
+    def _rounds(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:  # a thread não pode morrer com um erro inesperado
+                self.last_error = f"{type(e).__name__}: {e}"
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self) -> "Purger":
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="retention", daemon=True)
+            self._thread.start()
+        return self
+
+    def refresh(self):
+        """Antecipa a próxima rodada."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
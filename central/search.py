@@ -0,0 +1,137 @@
+"""Busca textual com índice de trigramas sobre Nome, Categoria e Tags.
+
+O texto é normalizado (sem acentos, caixa ignorada: "Operações" casa com
+"operacoes") e quebrado em palavras; cada palavra gera trigramas com
+preenchimento ("  op", " op", ...). A consulta usa os trigramas da última
+palavra sem o preenchimento final, então funciona como busca por prefixo
+enquanto se digita, e a similaridade por trigramas tolera erros de
+digitação. O custo de uma consulta depende só das posting lists dos seus
+trigramas, não do tamanho do catálogo.
+
+Relevância: cada trigrama vale o peso do campo em que aparece (Nome > Tags >
+Categoria), com bônus quando a consulta é prefixo de uma palavra do nome ou
+repete palavras inteiras dele.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+import pandas as pd
+
+WEIGHTS = {"Nome": 3.0, "Tags": 2.0, "Categoria": 1.0}
+MIN_SIMILARITY = 0.45  # fração mínima de trigramas da consulta encontrados
+PREFIX_BONUS = 0.5
+EXACT_BONUS = 0.25  # por palavra da consulta idêntica a uma palavra do nome
+
+_WORD = re.compile(r"\w+")
+
+
+def fold(text) -> str:
+    """Remove acentos e normaliza a caixa."""
+    text = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+
+
+def words(text) -> list[str]:
+    if not isinstance(text, str):
+        return []
+    return _WORD.findall(fold(text))
+
+
+def trigrams(word: str, prefix: bool = False) -> set[str]:
+    w = f"  {word}" if prefix else f"  {word} "
+    return {w[i:i + 3] for i in range(len(w) - 2)}
+
+
+def query_trigrams(query: str) -> set[str]:
+    ws = words(query)
+    out = set()
+    for i, w in enumerate(ws):
+        out |= trigrams(w, prefix=(i == len(ws) - 1))
+    return out
+
+
+class SearchIndex:
+    def __init__(self):
+        self.postings: dict[str, dict] = {}   # trigrama -> {ID: peso}
+        self.docs: dict[str, tuple] = {}      # ID -> (palavras do nome, trigramas)
+        self._owned: set[str] | None = None   # postings próprias (None: todas)
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "SearchIndex":
+        idx = cls()
+        for id_, nome, cat, tags in zip(df["ID"], df["Nome"], df["Categoria"], df["Tags"]):
+            idx._add(id_, nome, cat, tags)
+        return idx
+
+    def _posting(self, tri: str) -> dict:
+        # copy-on-write, como em TagIndex
+        if self._owned is not None and tri not in self._owned:
+            self.postings[tri] = dict(self.postings.get(tri, {}))
+            self._owned.add(tri)
+        return self.postings.setdefault(tri, {})
+
+    def _add(self, id_, nome, cat, tags):
+        weights: dict[str, float] = {}
+        for field, text in (("Nome", nome), ("Categoria", cat), ("Tags", tags)):
+            w = WEIGHTS[field]
+            for word in words(text):
+                for t in trigrams(word):
+                    if weights.get(t, 0) < w:
+                        weights[t] = w
+        self.docs[id_] = (tuple(words(nome)), tuple(weights))
+        for t, w in weights.items():
+            self._posting(t)[id_] = w
+
+    def _remove(self, id_):
+        doc = self.docs.pop(id_, None)
+        if doc is not None:
+            for t in doc[1]:
+                self._posting(t).pop(id_, None)
+
+    def apply(self, op: dict, df: pd.DataFrame) -> "SearchIndex":
+        """Devolve o índice após ``op`` (``df`` já atualizado), como em TagIndex."""
+        if op["op"] == "add":
+            ids = [r.get("ID") for r in op["rows"]]
+        elif op["op"] == "delete" or set(op.get("values", {})) & set(WEIGHTS):
+            ids = list(op["ids"])
+        else:
+            return self
+        new = SearchIndex()
+        new.postings, new.docs = dict(self.postings), dict(self.docs)
+        new._owned = set()
+        for i in ids:
+            new._remove(i)
+        rows = df[df["ID"].isin(ids)]
+        for id_, nome, cat, tags in zip(rows["ID"], rows["Nome"], rows["Categoria"], rows["Tags"]):
+            new._add(id_, nome, cat, tags)
+        return new
+
+    def search(self, query: str, ids=None) -> dict:
+        """IDs que casam com ``query`` -> relevância (maior é melhor).
+
+        ``ids`` restringe o resultado (por exemplo, às linhas ativas).
+        """
+        qtris = query_trigrams(query)
+        if not qtris:
+            return {}
+        hits: dict = defaultdict(int)
+        score: dict = defaultdict(float)
+        for t in qtris:
+            for id_, w in self.postings.get(t, {}).items():
+                hits[id_] += 1
+                score[id_] += w
+        need = MIN_SIMILARITY * len(qtris)
+        top = max(WEIGHTS.values()) * len(qtris)
+        qwords = words(query)
+        out = {}
+        for id_, n in hits.items():
+            if n < need or (ids is not None and id_ not in ids):
+                continue
+            s = score[id_] / top
+            name_words = self.docs[id_][0]
+            if qwords and any(nw.startswith(qwords[-1]) for nw in name_words):
+                s += PREFIX_BONUS
+            s += EXACT_BONUS * len(set(qwords) & set(name_words))
+            out[id_] = s
+        return out
@@ -0,0 +1,150 @@
+"""Chave canônica de planilha e índice único por chave.
+
+Links diferentes (``/edit#gid=0``, ``?usp=sharing``, ``/view``...) podem
+apontar para a mesma aba. A chave canônica é ``<id da planilha>#<gid>``
+(gid ausente vale ``0``, a primeira aba) e a URL canônica é montada a partir
+dela. O índice ``chave -> IDs`` é mantido por versão do catálogo como os
+índices de tags e de busca; cadastro, importação e edição em tabela o
+consultam para recusar duplicatas em O(1). Duplicatas antigas (de antes do
+índice) continuam no índice e aparecem em ``clusters()``.
+"""
+import re
+
+import pandas as pd
+
+SHEET_URL = r"^https://docs\.google\.com/spreadsheets/d/([^/\s?#]+)"
+GID = r"[#?&]gid=(\d+)"
+
+
+def sheet_key(url) -> str | None:
+    """Chave ``id#gid`` de uma URL do Google Sheets, ou ``None`` se inválida."""
+    if not isinstance(url, str):
+        return None
+    m = re.match(SHEET_URL, url.strip())
+    if m is None:
+        return None
+    gid = re.search(GID, url)
+    return f"{m.group(1)}#{gid.group(1) if gid else '0'}"
+
+
+def sheet_keys(urls: pd.Series) -> pd.Series:
+    """``sheet_key`` vetorizado (``<NA>`` para URLs inválidas)."""
+    urls = urls.astype("string").str.strip()
+    ids = urls.str.extract(SHEET_URL, expand=False)
+    gids = urls.str.extract(GID, expand=False).fillna("0")
+    return ids + "#" + gids
+
+
+def canonical_url(key: str) -> str:
+    sheet, gid = key.split("#")
+    return f"https://docs.google.com/spreadsheets/d/{sheet}/edit#gid={gid}"
+
+
+def canonical_urls(keys: pd.Series) -> pd.Series:
+    """``canonical_url`` vetorizado (``<NA>`` onde não há chave)."""
+    parts = keys.astype("string").str.split("#", n=1, expand=True)
+    return "https://docs.google.com/spreadsheets/d/" + parts[0] + "/edit#gid=" + parts[1]
+
+
+class SheetKeyIndex:
+    def __init__(self):
+        self.ids: dict[str, set] = {}  # chave -> IDs
+        self.keys: dict[str, str] = {}  # ID -> chave
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "SheetKeyIndex":
+        idx = cls()
+        for id_, key in zip(df["ID"], sheet_keys(df["URL"])):
+            idx._add(id_, key)
+        return idx
+
+    def _add(self, id_: str, key):
+        if pd.isna(key):
+            return
+        self.keys[id_] = key
+        self.ids[key] = self.ids.get(key, set()) | {id_}
+
+    def _remove(self, id_: str):
+        key = self.keys.pop(id_, None)
+        if key is not None:
+            rest = self.ids[key] - {id_}
+            if rest:
+                self.ids[key] = rest
+            else:
+                del self.ids[key]
+
+    @staticmethod
+    def _touched(op: dict) -> list | None:
+        # IDs cuja chave pode mudar com ``op`` (None: nenhum)
+        if op["op"] == "add":
+            return [r.get("ID") for r in op["rows"]]
+        if op["op"] == "delete" or "URL" in op.get("values", {}):
+            return list(op["ids"])
+        return None
+
+    def copy(self) -> "SheetKeyIndex":
+        new = SheetKeyIndex()
+        # os conjuntos são substituídos (nunca alterados), então a cópia rasa basta
+        new.ids, new.keys = dict(self.ids), dict(self.keys)
+        return new
+
+    def update(self, op: dict, df: pd.DataFrame):
+        """Aplica ``op`` neste índice (``df``: linhas já atualizadas, basta conter as tocadas)."""
+        ids = self._touched(op)
+        if not ids:
+            return
+        for i in ids:
+            self._remove(i)
+        rows = df[df["ID"].isin(ids)]
+        for id_, key in zip(rows["ID"], sheet_keys(rows["URL"])):
+            self._add(id_, key)
+
+    def apply(self, op: dict, df: pd.DataFrame) -> "SheetKeyIndex":
+        """Devolve o índice após ``op`` (``df`` já atualizado), como em TagIndex."""
+        if self._touched(op) is None:
+            return self
+        new = self.copy()
+        new.update(op, df)
+        return new
+
+    def owner(self, key, exclude=None) -> str | None:
+        """Um ID já cadastrado com ``key`` (ignorando ``exclude``), ou ``None``."""
+        if key is None or pd.isna(key):
+            return None
+        for id_ in self.ids.get(key, ()):
+            if id_ != exclude:
+                return id_
+        return None
+
+    def duplicates(self, ids: pd.Series, keys: pd.Series) -> pd.Series:
+        """Motivo por linha para linhas cuja chave já pertence a outro ID.
+
+        ``ids``/``keys`` são as linhas a gravar; repetições dentro do próprio
+        lote também contam (a primeira ocorrência vence). Uma linha que já
+        existe e mantém a chave gravada passa: duplicatas antigas continuam
+        editáveis e reimportáveis.
+        """
+        reason = pd.Series("", index=ids.index)
+        seen: dict[str, str] = {}
+        for pos, id_, key in zip(ids.index, ids, keys):
+            if pd.isna(key) or self.keys.get(id_) == key:
+                continue
+            other = self.owner(key, exclude=id_)
+            if other is None:
+                first = seen.setdefault(key, id_)
+                other = first if first != id_ else None
+            if other is not None:
+                reason[pos] = f"Planilha já cadastrada (ID {other})"
+        return reason
+
+    def clusters(self) -> list[tuple[str, list[str]]]:
+        """Grupos de IDs que apontam para a mesma planilha/aba."""
+        return sorted((k, sorted(v)) for k, v in self.ids.items() if len(v) > 1)
+
+
+def duplicates_frame(df: pd.DataFrame, index: SheetKeyIndex) -> pd.DataFrame:
+    """Relatório de duplicatas: uma linha por link, agrupadas por chave."""
+    rows = df.set_index("ID", drop=False)
+    out = [{"Grupo": n, "Chave": key, "ID": i, "Nome": rows.at[i, "Nome"], "URL": rows.at[i, "URL"]}
+           for n, (key, ids) in enumerate(index.clusters(), start=1) for i in ids if i in rows.index]
+    return pd.DataFrame(out, columns=["Grupo", "Chave", "ID", "Nome", "URL"])
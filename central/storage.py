@@ -0,0 +1,552 @@
+"""Armazenamento do catálogo de links com backends plugáveis.
+
+O backend padrão é SQLite (``links_db.sqlite``): inserções e atualizações
+de linhas são transacionais e ``ID`` é chave primária. O ``links_db.csv``
+legado é importado uma única vez e depois serve apenas como formato de
+exportação. ``CENTRAL_STORAGE`` escolhe outro backend: ``csv`` (arquivo
+CSV reescrito a cada alteração), ``arrow`` (arquivo colunar Arrow IPC lido
+com memory-map, ver ``central/columnar.py``) ou ``journal`` (snapshot +
+journal append-only, ver ``central/journal.py``).
+
+Em memória o catálogo é tipado (``ensure_cols``): ``Ativo`` booleano,
+datas ``datetime64``, ``Categoria`` categórica, textos (inclusive ``ID``)
+em ``string`` compacta e ``Versao`` inteira. Os backends guardam texto; a
+conversão acontece só aqui, ao carregar (``ensure_cols``) e ao gravar
+(``serialize``). As operações do journal também usam a forma texto.
+``load(columns=...)`` carrega só as colunas pedidas.
+
+As colunas de ``META_COLS`` (título, dono e modificação da planilha) vêm do
+enriquecimento automático (``central/enrich.py``) pela operação ``meta``,
+que não mexe em ``Versao``: não são dados do usuário e não entram no
+compare-and-swap da edição em tabela.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from uuid import uuid4
+
+import pandas as pd
+
+from central.instrument import traced
+
+# Colunas do "banco" (Versao: carimbo por linha, sobe a cada alteração)
+COLS = [
+    "ID", "Nome", "URL", "Categoria", "Tags",
+    "Ativo", "Criado_em", "Arquivado_em", "Versao",
+    "Titulo", "Dono", "Modificado_em", "Metadados_em",
+]
+# metadados da planilha (Metadados_em: quando foram buscados)
+META_COLS = ["Titulo", "Dono", "Modificado_em", "Metadados_em"]
+# valor de colunas ausentes (as demais ficam vazias)
+COL_DEFAULTS = {"Ativo": "True", "Versao": "1"}
+TEXT_COLS = ["ID", "Nome", "URL", "Tags", "Titulo", "Dono"]
+DATE_COLS = ["Criado_em", "Arquivado_em", "Modificado_em", "Metadados_em"]
+DATE_FMT = "%Y-%m-%d %H:%M:%S"
+TRUE_VALUES = ("true", "1", "sim", "yes", "")
+
+try:  # strings em buffer Arrow contíguo quando o pyarrow está disponível
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    TEXT_DTYPE = pd.StringDtype()
+
+CSV_NAME = "links_db.csv"
+SQLITE_NAME = "links_db.sqlite"
+ARROW_NAME = "links_db.arrow"
+SNAPSHOT_NAME = "links_db.snapshot.csv"
+ARROW_SNAPSHOT_NAME = "links_db.snapshot.arrow"
+JOURNAL_NAME = "links_db.journal"
+
+
+def convert(col: str, s: pd.Series) -> pd.Series:
+    """Converte uma coluna (texto ou já tipada) para o tipo em memória."""
+    if col in TEXT_COLS:
+        return s if s.dtype == TEXT_DTYPE and not s.hasnans else s.astype(TEXT_DTYPE).fillna("")
+    if col == "Categoria":
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            return s
+        return s.astype(TEXT_DTYPE).fillna("").astype("category")
+    if col == "Ativo":
+        if s.dtype == bool:
+            return s
+        return s.astype(TEXT_DTYPE).fillna("").str.strip().str.lower().isin(TRUE_VALUES).astype(bool)
+    if col in DATE_COLS:
+        if pd.api.types.is_datetime64_any_dtype(s):
+            return s
+        txt = s.astype(TEXT_DTYPE).fillna("").str.strip()
+        out = pd.to_datetime(txt, format=DATE_FMT, errors="coerce")
+        retry = out.isna() & txt.ne("")
+        if retry.any():  # formatos antigos/importados
+            out[retry] = pd.to_datetime(txt[retry], format="mixed", errors="coerce")
+        return out
+    if col == "Versao":
+        if pd.api.types.is_integer_dtype(s):
+            return s
+        return pd.to_numeric(s, errors="coerce").fillna(1).astype("int64")
+    return s
+
+
+@traced("ensure_cols")
+def ensure_cols(df: pd.DataFrame, cols: list[str] = COLS) -> pd.DataFrame:
+    """Completa colunas, gera IDs faltantes e aplica os tipos em memória.
+
+    ``cols`` restringe o resultado a um subconjunto de ``COLS`` (carga
+    parcial de colunas).
+    """
+    df = df.copy(deep=False)
+    for c in cols:
+        if c not in df.columns:
+            df[c] = COL_DEFAULTS.get(c, "")
+    # IDs
+    if "ID" in cols:
+        mask_no_id = (df["ID"].isna()) | (df["ID"].astype(str).str.strip() == "")
+        if mask_no_id.any():
+            df["ID"] = df["ID"].astype(object)
+            df.loc[mask_no_id, "ID"] = [str(uuid4()) for _ in range(mask_no_id.sum())]
+    for c in cols:
+        df[c] = convert(c, df[c])
+    return df[cols]
+
+
+def _wanted(columns: list[str] | None) -> list[str]:
+    # colunas pedidas na ordem de COLS (None = todas)
+    return COLS if columns is None else [c for c in COLS if c in columns]
+
+
+@traced("serialize")
+def serialize(df: pd.DataFrame) -> pd.DataFrame:
+    """Forma texto de armazenamento (CSV/SQLite/journal) de um frame tipado."""
+    df = ensure_cols(df)
+    out = {c: df[c].astype(str) for c in TEXT_COLS}
+    out["Categoria"] = df["Categoria"].astype(str)
+    out["Ativo"] = df["Ativo"].map({True: "True", False: "False"})
+    for c in DATE_COLS:
+        out[c] = df[c].dt.strftime(DATE_FMT).fillna("")
+    out["Versao"] = df["Versao"].astype(str)
+    return pd.DataFrame(out, index=df.index)[COLS]
+
+
+class StaleRows(Exception):
+    """Linhas alteradas ou excluídas depois do snapshot em que a gravação se baseou."""
+
+    def __init__(self, ids: list[str]):
+        super().__init__(f"{len(ids)} linha(s) alterada(s) por outra sessão")
+        self.ids = ids
+
+
+def _stale(current: dict, expected: dict) -> list[str]:
+    # IDs cuja Versao atual (ausente = excluída) difere da esperada
+    return sorted(i for i, v in expected.items() if str(current.get(i, "")) != str(v))
+
+
+def _records(df: pd.DataFrame) -> list[tuple]:
+    # object antes de iterar: percorrer strings Arrow elemento a elemento é lento
+    return list(serialize(df).astype(object).itertuples(index=False, name=None))
+
+
+class Storage:
+    """Interface comum dos backends de armazenamento."""
+
+    def __init__(self):
+        # serializa o compare-and-swap genérico de commit_changes neste backend
+        self._commit_lock = threading.Lock()
+
+    def load(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """Catálogo tipado; ``columns`` limita as colunas carregadas."""
+        raise NotImplementedError
+
+    def load_ids(self, ids, columns: list[str] | None = None) -> pd.DataFrame:
+        """Só as linhas com os ``ids`` dados (histórico de quem não tem o snapshot)."""
+        df = self.load(columns)
+        return df[df["ID"].isin(list(ids))].reset_index(drop=True)
+
+    def version(self):
+        """Marca barata que muda a cada gravação (invalida snapshots em cache)."""
+        raise NotImplementedError
+
+    def replace_all(self, df: pd.DataFrame):
+        """Substitui o catálogo inteiro (edição em tabela, importação)."""
+        raise NotImplementedError
+
+    def insert(self, rows: list[dict]):
+        """Insere ``rows``; um ID já existente é substituído (upsert)."""
+        raise NotImplementedError
+
+    def update(self, ids: list[str], values: dict, op: str = "edit"):
+        """Aplica ``values`` (coluna -> valor) às linhas com os ``ids`` dados.
+
+        ``op`` nomeia a operação (``archive``, ``restore``, ``edit``) para os
+        backends que registram o tipo de mutação.
+        """
+        raise NotImplementedError
+
+    def delete(self, ids: list[str]) -> int:
+        raise NotImplementedError
+
+    def annotate(self, rows: list[dict]):
+        """Grava ``META_COLS`` por linha (``rows``: ID + colunas), sem subir ``Versao``."""
+        raise NotImplementedError
+
+    def apply(self, op: dict):
+        """Executa uma operação no formato do journal (ver ``central/journal.py``)."""
+        if op["op"] == "batch":
+            return self.apply_batch(op["ops"])
+        if op["op"] == "add":
+            return self.insert(op["rows"])
+        if op["op"] == "delete":
+            return self.delete(op["ids"])
+        if op["op"] == "meta":
+            return self.annotate(op["rows"])
+        return self.update(op["ids"], op["values"], op=op["op"])
+
+    def apply_batch(self, ops: list[dict]):
+        """Executa ``ops`` em ordem como uma única gravação.
+
+        Esta implementação genérica só encadeia ``apply``; os backends
+        gravam o lote de uma vez (transação SQLite, uma linha do journal,
+        uma regravação do arquivo).
+        """
+        for op in ops:
+            self.apply(op)
+
+    def apply_checked(self, op: dict, expected: dict):
+        """``apply`` só se as linhas de ``expected`` (ID -> Versao) não mudaram.
+
+        Senão levanta ``StaleRows`` sem gravar nada. Como em
+        ``commit_changes``, esta implementação serializa as chamadas no
+        backend e o SQLite confere e grava na mesma transação.
+        """
+        with self._commit_lock:
+            rows = self.load_ids(list(expected), ["ID", "Versao"])
+            stale = _stale(dict(zip(rows["ID"], rows["Versao"])), expected)
+            if stale:
+                raise StaleRows(stale)
+            return self.apply(op)
+
+    def commit_changes(self, changes: list[dict]) -> tuple[int, list[dict]]:
+        """Compare-and-swap por linha das alterações de ``merge.diff_frames``.
+
+        Aplica as alterações sem conflito e devolve ``(aplicadas, conflitos)``.
+        Esta implementação genérica serializa as chamadas no backend e grava
+        tudo como uma operação ``batch`` (uma linha no journal, uma
+        regravação do arquivo); o SQLite faz a verificação e a gravação numa
+        única transação curta.
+        """
+        from central.merge import changes_to_ops, check_conflict
+        with self._commit_lock:
+            current = serialize(self.load()).drop_duplicates("ID", keep="last").set_index("ID", drop=False)
+            ok, conflicts = [], []
+            for ch in changes:
+                row = current.loc[ch["ID"]].to_dict() if ch["ID"] in current.index else None
+                conflict = check_conflict(ch, row)
+                if conflict:
+                    conflicts.append(conflict)
+                else:
+                    ok.append(ch)
+            ops = changes_to_ops(ok)
+            if ops:
+                self.apply({"op": "batch", "ops": ops})
+            return len(ok), conflicts
+
+    def export_csv(self, path=None):
+        """Exporta o catálogo em CSV; sem ``path`` devolve os bytes."""
+        df = serialize(self.load())
+        if path is None:
+            return df.to_csv(index=False).encode("utf-8")
+        df.to_csv(path, index=False)
+
+
+class CsvStorage(Storage):
+    """Backend legado: reescreve o arquivo CSV inteiro a cada alteração."""
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def load(self, columns: list[str] | None = None) -> pd.DataFrame:
+        wanted = _wanted(columns)
+        if self.path.exists():
+            df = pd.read_csv(self.path, dtype=str, keep_default_na=False, usecols=lambda c: c in wanted)
+            return ensure_cols(df, wanted)
+        df = ensure_cols(pd.DataFrame(columns=COLS))
+        self._write(df)
+        return df[wanted]
+
+    def _write(self, df: pd.DataFrame):
+        serialize(df).to_csv(self.path, index=False)
+
+    def version(self):
+        if not self.path.exists():
+            return None
+        st = self.path.stat()
+        return (st.st_mtime_ns, st.st_size)
+
+    def replace_all(self, df: pd.DataFrame):
+        with self._lock:
+            self._write(df)
+
+    def insert(self, rows: list[dict]):
+        from central.journal import apply_op
+        with self._lock:
+            self._write(apply_op(self.load(), {"op": "add", "rows": rows}))
+
+    def update(self, ids: list[str], values: dict, op: str = "edit"):
+        from central.journal import apply_op
+        with self._lock:
+            self._write(apply_op(self.load(), {"op": op, "ids": list(ids), "values": values}))
+
+    def annotate(self, rows: list[dict]):
+        from central.journal import apply_op
+        with self._lock:
+            self._write(apply_op(self.load(), {"op": "meta", "rows": rows}))
+
+    def delete(self, ids: list[str]) -> int:
+        with self._lock:
+            df = self.load()
+            keep = ~df["ID"].isin(ids)
+            self._write(df[keep])
+            return int((~keep).sum())
+
+    def apply_batch(self, ops: list[dict]):
+        from central.journal import apply_op
+        with self._lock:
+            self._write(apply_op(self.load(), {"op": "batch", "ops": ops}))
+
+
+class SqliteStorage(Storage):
+    """Backend SQLite: uma linha por link, ``ID`` como chave primária."""
+
+    def __init__(self, path: Path, csv_path: Path | None = None):
+        super().__init__()
+        self.path = Path(path)
+        self.csv_path = Path(csv_path) if csv_path else None
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        return con
+
+    @contextmanager
+    def _tx(self, bump: bool = True):
+        # bump=False: transação sem mexer na versão (DDL idempotente na abertura)
+        con = self._connect()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            yield con
+            if bump:
+                con.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'versao'")
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        finally:
+            con.close()
+
+    @staticmethod
+    def _col_def(c: str) -> str:
+        return f'"{c}" TEXT NOT NULL DEFAULT \'{COL_DEFAULTS.get(c, "")}\''
+
+    def _init_schema(self):
+        cols = ", ".join(self._col_def(c) for c in COLS if c != "ID")
+        # abrir o banco não é uma gravação: a versão (e os snapshots em cache
+        # dos outros processos) só muda se o CSV legado for importado aqui
+        with self._tx(bump=False) as con:
+            con.execute(f'CREATE TABLE IF NOT EXISTS links ("ID" TEXT PRIMARY KEY, {cols})')
+            have = {r[1] for r in con.execute("PRAGMA table_info(links)")}
+            for c in COLS:
+                if c not in have:  # bancos criados antes da coluna existir
+                    con.execute(f"ALTER TABLE links ADD COLUMN {self._col_def(c)}")
+            con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            con.execute("INSERT OR IGNORE INTO meta VALUES ('versao', '0')")
+            done = con.execute("SELECT value FROM meta WHERE key='csv_importado'").fetchone()
+            if done is None and self.csv_path is not None and self.csv_path.exists():
+                # importação única do CSV legado; o arquivo fica como exportação
+                legacy = pd.read_csv(self.csv_path, dtype=str, keep_default_na=False)
+                legacy = legacy.drop_duplicates(subset=["ID"], keep="last") if "ID" in legacy else legacy
+                self._insert_records(con, _records(legacy), replace=True)
+                con.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'versao'")
+            if done is None:
+                con.execute("INSERT INTO meta VALUES ('csv_importado', '1')")
+
+    @staticmethod
+    def _insert_records(con, records: list[tuple], replace: bool = False):
+        verb = "INSERT OR REPLACE" if replace else "INSERT"
+        names = ", ".join(f'"{c}"' for c in COLS)
+        marks = ", ".join("?" for _ in COLS)
+        con.executemany(f"{verb} INTO links ({names}) VALUES ({marks})", records)
+
+    def version(self) -> int:
+        con = self._connect()
+        try:
+            return int(con.execute("SELECT value FROM meta WHERE key = 'versao'").fetchone()[0])
+        finally:
+            con.close()
+
+    def load(self, columns: list[str] | None = None) -> pd.DataFrame:
+        wanted = _wanted(columns)
+        con = self._connect()
+        try:
+            names = ", ".join(f'"{c}"' for c in wanted)
+            df = pd.read_sql_query(f"SELECT {names} FROM links ORDER BY rowid", con)
+        finally:
+            con.close()
+        return ensure_cols(df, wanted)
+
+    def load_ids(self, ids, columns: list[str] | None = None) -> pd.DataFrame:
+        wanted = _wanted(columns)
+        names = ", ".join(f'"{c}"' for c in wanted)
+        ids, parts = list(ids), []
+        con = self._connect()
+        try:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ", ".join("?" for _ in chunk)
+                parts.append(pd.read_sql_query(f'SELECT {names} FROM links WHERE "ID" IN ({marks})', con,
+                                               params=chunk))
+        finally:
+            con.close()
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=wanted)
+        return ensure_cols(df, wanted)
+
+    def replace_all(self, df: pd.DataFrame):
+        records = _records(df)
+        with self._tx() as con:
+            con.execute("DELETE FROM links")
+            self._insert_records(con, records, replace=True)
+
+    def insert(self, rows: list[dict]):
+        with self._tx() as con:
+            self._run(con, {"op": "add", "rows": rows})
+
+    def update(self, ids: list[str], values: dict, op: str = "edit"):
+        if not ids or not values:
+            return
+        with self._tx() as con:
+            self._run(con, {"op": op, "ids": ids, "values": values})
+
+    def annotate(self, rows: list[dict]):
+        if not rows:
+            return
+        with self._tx() as con:
+            self._run(con, {"op": "meta", "rows": rows})
+
+    @staticmethod
+    def _sets(values: dict) -> str:
+        sets = [f'"{c}" = ?' for c in values]
+        return ", ".join(sets + ['"Versao" = CAST("Versao" AS INTEGER) + 1'])
+
+    def delete(self, ids: list[str]) -> int:
+        with self._tx() as con:
+            return self._run(con, {"op": "delete", "ids": ids})
+
+    def apply_batch(self, ops: list[dict]) -> int:
+        # o lote inteiro numa transação: ou grava tudo ou nada
+        with self._tx() as con:
+            return sum(self._run(con, op) for op in ops)
+
+    def apply_checked(self, op: dict, expected: dict) -> int:
+        # conferência e gravação na mesma transação; StaleRows desfaz tudo
+        with self._tx() as con:
+            ids, current = list(expected), {}
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ", ".join("?" for _ in chunk)
+                current.update(con.execute(f'SELECT "ID", "Versao" FROM links WHERE "ID" IN ({marks})', chunk))
+            stale = _stale(current, expected)
+            if stale:
+                raise StaleRows(stale)
+            return sum(self._run(con, sub) for sub in op.get("ops", [op]))
+
+    def _run(self, con, op: dict) -> int:
+        # uma operação na transação ``con`` já aberta; devolve as linhas afetadas
+        if op["op"] == "add":
+            self._insert_records(con, _records(pd.DataFrame(op["rows"])), replace=True)
+            return len(op["rows"])
+        if op["op"] == "delete":
+            return con.executemany('DELETE FROM links WHERE "ID" = ?', [(i,) for i in op["ids"]]).rowcount
+        if op["op"] == "meta":
+            if not op["rows"]:
+                return 0
+            cols = [c for c in META_COLS if c in op["rows"][0]]
+            sets = ", ".join(f'"{c}" = ?' for c in cols)
+            params = [(*(str(r.get(c) or "") for c in cols), r["ID"]) for r in op["rows"]]
+            return con.executemany(f'UPDATE links SET {sets} WHERE "ID" = ?', params).rowcount
+        values = op["values"]
+        params = [(*map(str, values.values()), i) for i in op["ids"]]
+        return con.executemany(f'UPDATE links SET {self._sets(values)} WHERE "ID" = ?', params).rowcount
+
+    def commit_changes(self, changes: list[dict]) -> tuple[int, list[dict]]:
+        # leitura das versões + gravação na mesma transação: CAS por linha
+        from central.merge import check_conflict
+        names = ", ".join(f'"{c}"' for c in COLS)
+        ok, conflicts = [], []
+        with self._tx() as con:
+            current = {}
+            ids = [ch["ID"] for ch in changes]
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ", ".join("?" for _ in chunk)
+                for r in con.execute(f'SELECT {names} FROM links WHERE "ID" IN ({marks})', chunk):
+                    current[r[0]] = dict(zip(COLS, r))
+            for ch in changes:
+                conflict = check_conflict(ch, current.get(ch["ID"]))
+                if conflict:
+                    conflicts.append(conflict)
+                else:
+                    ok.append(ch)
+            inserts = [ch["row"] for ch in ok if ch["kind"] == "insert"]
+            if inserts:
+                self._insert_records(con, _records(pd.DataFrame(inserts)))
+            con.executemany('DELETE FROM links WHERE "ID" = ?',
+                            [(ch["ID"],) for ch in ok if ch["kind"] == "delete"])
+            for ch in ok:
+                if ch["kind"] == "update":
+                    con.execute(f'UPDATE links SET {self._sets(ch["values"])} WHERE "ID" = ?',
+                                (*ch["values"].values(), ch["ID"]))
+        return len(ok), conflicts
+
+
+_instances: dict[tuple, Storage] = {}
+_instances_lock = threading.Lock()
+
+
+def get_storage(base_dir: Path, kind: str | None = None) -> Storage:
+    """Devolve o backend (único por processo) para a pasta ``base_dir``.
+
+    ``kind`` vem de ``CENTRAL_STORAGE`` quando omitido: ``sqlite`` (padrão),
+    ``csv``, ``arrow`` ou ``journal``. O limite do journal antes da
+    compactação vem de ``CENTRAL_JOURNAL_MAX_BYTES``; com pyarrow instalado o
+    snapshot do journal é gravado em Arrow IPC.
+    """
+    kind = (kind or os.environ.get("CENTRAL_STORAGE") or "sqlite").lower()
+    key = (kind, str(Path(base_dir).resolve()))
+    with _instances_lock:
+        if key not in _instances:
+            base_dir = Path(base_dir)
+            if kind == "csv":
+                _instances[key] = CsvStorage(base_dir / CSV_NAME)
+            elif kind == "arrow":
+                from central.columnar import ArrowStorage, available
+                if not available():
+                    raise RuntimeError("CENTRAL_STORAGE=arrow requer o pacote pyarrow")
+                _instances[key] = ArrowStorage(base_dir / ARROW_NAME, base_dir / CSV_NAME)
+            elif kind == "journal":
+                from central.columnar import available
+                from central.journal import JournalStorage
+                max_bytes = int(os.environ.get("CENTRAL_JOURNAL_MAX_BYTES", 1 << 20))
+                legacy = base_dir / SNAPSHOT_NAME
+                snapshot = base_dir / ARROW_SNAPSHOT_NAME if available() else legacy
+                # snapshot CSV de versões anteriores vira a base do snapshot Arrow
+                source = legacy if snapshot != legacy and legacy.exists() else base_dir / CSV_NAME
+                _instances[key] = JournalStorage(snapshot, base_dir / JOURNAL_NAME,
+                                                 source, max_bytes=max_bytes)
+            elif kind == "sqlite":
+                _instances[key] = SqliteStorage(base_dir / SQLITE_NAME, base_dir / CSV_NAME)
+            else:
+                raise ValueError(f"Backend de armazenamento desconhecido: {kind}")
+        return _instances[key]
@@ -0,0 +1,103 @@
+"""Índice invertido de tags.
+
+Cada tag distinta recebe um código inteiro (interning) e uma posting list
+com os IDs das linhas que a possuem. O índice é montado uma vez por versão
+do catálogo e atualizado de forma incremental pelas operações do journal;
+o filtro de várias tags vira interseção de conjuntos e a lista de opções
+do multiselect sai direto do índice.
+"""
+import pandas as pd
+
+
+def parse_tags(tags_str: str) -> list[str]:
+    if not isinstance(tags_str, str) or not tags_str.strip():
+        return []
+    return [t.strip() for t in tags_str.split(",") if t.strip()]
+
+
+class TagIndex:
+    def __init__(self):
+        self.codes: dict[str, int] = {}        # tag -> código
+        self.names: list[str] = []             # código -> tag
+        self.postings: dict[int, set] = {}     # código -> IDs
+        self.row_codes: dict[str, tuple] = {}  # ID -> códigos da linha
+        self._owned: set[int] | None = None    # postings próprias (None: todas)
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "TagIndex":
+        idx = cls()
+        for id_, tags in zip(df["ID"], df["Tags"]):
+            idx._add(id_, tags)
+        return idx
+
+    def _code(self, tag: str) -> int:
+        code = self.codes.get(tag)
+        if code is None:
+            code = self.codes[tag] = len(self.names)
+            self.names.append(tag)
+        return code
+
+    def _posting(self, code: int) -> set:
+        # copy-on-write: postings herdadas de outro índice são copiadas na 1ª escrita
+        if self._owned is not None and code not in self._owned:
+            self.postings[code] = set(self.postings.get(code, ()))
+            self._owned.add(code)
+        return self.postings.setdefault(code, set())
+
+    def _add(self, id_: str, tags: str):
+        codes = tuple(dict.fromkeys(self._code(t) for t in parse_tags(tags)))
+        self.row_codes[id_] = codes
+        for c in codes:
+            self._posting(c).add(id_)
+
+    def _remove(self, id_: str):
+        for c in self.row_codes.pop(id_, ()):
+            self._posting(c).discard(id_)
+
+    def apply(self, op: dict, df: pd.DataFrame) -> "TagIndex":
+        """Devolve o índice após ``op``; ``df`` é o snapshot já atualizado.
+
+        As posting lists não tocadas são compartilhadas com o índice anterior,
+        que continua válido para quem ainda o estiver lendo.
+        """
+        if op["op"] == "add":
+            ids = [r.get("ID") for r in op["rows"]]
+        elif op["op"] == "delete" or "Tags" in op.get("values", {}):
+            ids = list(op["ids"])
+        else:
+            return self  # archive/restore não mexem em tags
+        new = TagIndex()
+        new.codes, new.names = dict(self.codes), list(self.names)
+        new.postings, new.row_codes = dict(self.postings), dict(self.row_codes)
+        new._owned = set()
+        for i in ids:
+            new._remove(i)
+        rows = df[df["ID"].isin(ids)]
+        for id_, tags in zip(rows["ID"], rows["Tags"]):
+            new._add(id_, tags)
+        return new
+
+    def tags(self, ids=None) -> list[str]:
+        """Tags em uso (opcionalmente só nas linhas de ``ids``), em ordem."""
+        if ids is None:
+            return sorted(self.names[c] for c, p in self.postings.items() if p)
+        ids = ids if isinstance(ids, (set, frozenset)) else set(ids)
+        return sorted(self.names[c] for c, p in self.postings.items() if p and not p.isdisjoint(ids))
+
+    def match_all(self, tags: list[str]) -> set:
+        """IDs que possuem todas as ``tags`` (interseção das posting lists)."""
+        posts = []
+        for t in tags:
+            code = self.codes.get(t)
+            if code is None:
+                return set()
+            posts.append(self.postings.get(code, set()))
+        if not posts:
+            return set()
+        posts.sort(key=len)
+        out = set(posts[0])
+        for p in posts[1:]:
+            out &= p
+            if not out:
+                break
+        return out
@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from central.catalog import Catalog  # noqa: E402
+from central.storage import ensure_cols, get_storage  # noqa: E402
+
+
+def sheet(n: int, gid: int = 0) -> str:
+    return f"https://docs.google.com/spreadsheets/d/planilha{n:04d}/edit#gid={gid}"
+
+
+def links(rows: list[dict]) -> pd.DataFrame:
+    """Catálogo tipado a partir de dicts só com as colunas relevantes."""
+    base = {"Nome": "", "URL": "", "Categoria": "Geral", "Tags": "", "Ativo": True,
+            "Criado_em": pd.Timestamp("2024-01-01 10:00:00"), "Versao": 1}
+    return ensure_cols(pd.DataFrame([{**base, **r} for r in rows]))
+
+
+@pytest.fixture
+def make_catalog(tmp_path):
+    """``make_catalog(rows, kind="sqlite")``: catálogo numa pasta temporária."""
+
+    def make(rows: list[dict], kind: str = "sqlite", folder: str = "cat") -> Catalog:
+        (tmp_path / folder).mkdir(exist_ok=True)
+        store = get_storage(tmp_path / folder, kind)
+        store.replace_all(links(rows))
+        return Catalog(store)
+
+    return make
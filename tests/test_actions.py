@@ -0,0 +1,90 @@
+"""Fila de ações em lote: prévia, lote misto numa gravação e conflito de versão."""
+import pytest
+
+from central import actions
+from central.storage import StaleRows
+
+from conftest import sheet
+
+ROWS = [
+    {"ID": "a1", "Nome": "Ativa 1", "URL": sheet(1), "Tags": "x", "Categoria": "Vendas"},
+    {"ID": "a2", "Nome": "Ativa 2", "URL": sheet(2), "Tags": "x, y", "Categoria": "RH"},
+    {"ID": "z1", "Nome": "Arquivada 1", "URL": sheet(3), "Ativo": False},
+    {"ID": "z2", "Nome": "Arquivada 2", "URL": sheet(4), "Ativo": False},
+]
+KINDS = ["sqlite", "csv", "journal"]
+
+
+def test_preview_counts(make_catalog):
+    df = make_catalog(ROWS).snapshot()
+    staged = [
+        {"kind": "archive", "ids": ["a1", "z1", "sumiu"]},   # z1 já arquivada, "sumiu" não existe
+        {"kind": "retag", "ids": ["a1", "a2"], "add": ["y"], "remove": ["x"]},
+        {"kind": "recategorize", "ids": ["a1", "a2"], "category": "RH"},  # a2 já é RH
+        {"kind": "delete", "ids": ["a2", "z2"]},             # a2 ativa: fica de fora
+    ]
+    ops, preview = actions.plan(df, staged)
+    assert preview.groupby("Ação", sort=False).size().to_dict() == {
+        actions.STAGE_LABELS["archive"]: 1,
+        actions.STAGE_LABELS["retag"]: 2,
+        actions.STAGE_LABELS["recategorize"]: 1,
+        actions.STAGE_LABELS["delete"]: 1,
+    }
+    assert preview["ID"].nunique() == 3
+    assert preview.set_index(["ID", "Ação"]).loc[("a2", actions.STAGE_LABELS["retag"]), "Alteração"] == "Tags: x, y → y"
+    # a1 e a2 terminam com as mesmas tags: uma única edição
+    assert [op["op"] for op in ops] == ["archive", "edit", "edit", "delete"]
+    assert ops[1] == {"op": "edit", "ids": ["a1", "a2"], "values": {"Tags": "y"}}
+
+
+def test_steps_see_earlier_steps(make_catalog):
+    df = make_catalog(ROWS).snapshot()
+    ops, preview = actions.plan(df, [{"kind": "archive", "ids": ["a1"]}, {"kind": "delete", "ids": ["a1"]}])
+    assert [op["op"] for op in ops] == ["archive", "delete"] and len(preview) == 2
+    ops, preview = actions.plan(df, [{"kind": "delete", "ids": ["z1"]}, {"kind": "restore", "ids": ["z1"]}])
+    assert [op["op"] for op in ops] == ["delete"] and len(preview) == 1
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_mixed_batch_is_one_write(make_catalog, kind):
+    catalog = make_catalog(ROWS, kind=kind)
+    df = catalog.snapshot()
+    ops, _ = actions.plan(df, [
+        {"kind": "archive", "ids": ["a1"]},
+        {"kind": "restore", "ids": ["z1"]},
+        {"kind": "delete", "ids": ["z2"]},
+    ])
+    version = catalog.store.version()
+    assert actions.commit_batch(catalog, ops, df) == 3
+    after = catalog.store.load().set_index("ID")
+    assert sorted(after.index) == ["a1", "a2", "z1"]
+    assert not after.at["a1", "Ativo"] and after.at["z1", "Ativo"]
+    assert after.at["a1", "Versao"] == 2 and after.at["a2", "Versao"] == 1
+    assert catalog.store.version() != version
+    if kind == "journal":
+        assert len(catalog.store.journal_path.read_text().splitlines()) == 1
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_version_conflict_writes_nothing(make_catalog, kind):
+    catalog = make_catalog(ROWS, kind=kind)
+    df = catalog.snapshot()
+    ops, _ = actions.plan(df, [
+        {"kind": "archive", "ids": ["a1", "a2"]},
+        {"kind": "delete", "ids": ["z1"]},
+    ])
+    # outra sessão restaura z1 e edita a2 entre o plano e a gravação
+    catalog.commit({"op": "restore", "ids": ["z1"], "values": {"Ativo": "True", "Arquivado_em": ""}})
+    catalog.commit({"op": "edit", "ids": ["a2"], "values": {"Nome": "Outra"}})
+    before = catalog.store.load()
+    version = catalog.store.version()
+    with pytest.raises(StaleRows) as err:
+        actions.commit_batch(catalog, ops, df)
+    assert err.value.ids == ["a2", "z1"]
+    assert catalog.store.version() == version
+    assert catalog.store.load().equals(before)
+    # replanejado sobre o snapshot novo, o lote passa e não exclui a z1 restaurada
+    df = catalog.snapshot()
+    ops, _ = actions.plan(df, [{"kind": "archive", "ids": ["a1", "a2"]}, {"kind": "delete", "ids": ["z1"]}])
+    assert actions.commit_batch(catalog, ops, df) == 1
+    assert sorted(catalog.snapshot()["ID"]) == ["a1", "a2", "z1", "z2"]
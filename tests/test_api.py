@@ -0,0 +1,99 @@
+import gzip
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from central.api import CatalogAPI, serve
+
+from conftest import sheet
+
+ROWS = [{"ID": f"id{i}", "Nome": f"Planilha {i}", "URL": sheet(i), "Categoria": "Vendas" if i % 2 else "RH"}
+        for i in range(10)]
+
+
+def test_conditional_request_skips_filter_and_encoding(make_catalog, monkeypatch):
+    api = CatalogAPI(make_catalog(ROWS))
+    status, body, tag = api.respond("/links", "categoria=Vendas")
+    assert status == 200 and json.loads(body)["total"] == 5
+
+    def boom(*args):
+        raise AssertionError("304 não deveria filtrar nem serializar")
+
+    monkeypatch.setattr(api, "links", boom)
+    monkeypatch.setattr(api, "_cached", boom)
+    assert api.respond("/links", "categoria=Vendas", [tag]) == (304, b"", tag)
+    assert api.respond("/links", "categoria=Vendas", ["*"])[0] == 304
+
+
+def test_etag_changes_with_catalog_version(make_catalog):
+    catalog = make_catalog(ROWS)
+    api = CatalogAPI(catalog)
+    _, _, tag = api.respond("/links/id1", "")
+    catalog.commit({"op": "edit", "ids": ["id1"], "values": {"Nome": "Outro"}})
+    status, body, new_tag = api.respond("/links/id1", "", [tag])
+    assert status == 200 and new_tag != tag and json.loads(body)["Nome"] == "Outro"
+
+
+def test_unknown_link_is_404_even_with_if_none_match(make_catalog):
+    api = CatalogAPI(make_catalog(ROWS))
+    _, _, tag = api.respond("/links/id1", "")
+    assert api.respond("/links/nada", "", [tag, "*"]) == (404, None, None)
+
+
+@pytest.fixture
+def server(make_catalog, tmp_path):
+    make_catalog(ROWS)
+    srv = serve(tmp_path / "cat", port=0, kind="sqlite", quiet=True)
+    threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+
+
+def get(url: str, **headers):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as r:
+            return r.status, r.headers, r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_http_304(server):
+    status, headers, body = get(server + "/links?tag=&limit=3")
+    assert status == 200 and len(json.loads(body)["items"]) == 3
+    status, headers2, body = get(server + "/links?tag=&limit=3", **{"If-None-Match": headers["ETag"]})
+    assert (status, body, headers2["ETag"]) == (304, b"", headers["ETag"])
+    assert get(server + "/links/nada", **{"If-None-Match": "*"})[0] == 404
+
+
+def test_body_is_built_from_the_snapshot_of_the_etag(make_catalog, monkeypatch):
+    catalog = make_catalog(ROWS)
+    api = CatalogAPI(catalog)
+    build = api.link
+
+    def write_then_build(id_, df):
+        # outra gravação entre o cálculo do ETag e a montagem do corpo
+        catalog.commit({"op": "edit", "ids": ["id1"], "values": {"Nome": "Outro"}})
+        return build(id_, df)
+
+    monkeypatch.setattr(api, "link", write_then_build)
+    _, body, tag = api.respond("/links/id1", "")
+    assert json.loads(body)["Nome"] == "Planilha 1"
+    monkeypatch.undo()
+    status, body, new_tag = api.respond("/links/id1", "", [tag])
+    assert status == 200 and new_tag != tag and json.loads(body)["Nome"] == "Outro"
+
+
+def test_gzip_body_has_its_own_etag(server):
+    url = server + "/links?limit=10"
+    _, plain, body = get(url)
+    _, zipped, gz_body = get(url, **{"Accept-Encoding": "gzip"})
+    assert zipped["Content-Encoding"] == "gzip" and gzip.decompress(gz_body) == body
+    assert zipped["ETag"] == plain["ETag"][:-1] + '-gz"'
+    status, headers, _ = get(url, **{"Accept-Encoding": "gzip", "If-None-Match": zipped["ETag"]})
+    assert (status, headers["ETag"]) == (304, zipped["ETag"])
+    # sem aceitar gzip, o ETag do corpo comprimido não vale para o corpo sem compressão
+    assert get(url, **{"If-None-Match": zipped["ETag"]})[0] == 200
+    assert get(url, **{"If-None-Match": plain["ETag"]})[0] == 304
@@ -0,0 +1,90 @@
+"""Linha de comando: filtros, --dry-run, confirmação com --yes, export e import."""
+import pandas as pd
+import pytest
+
+from central import retention
+from central.cli import main
+from central.storage import get_storage
+
+from conftest import sheet
+
+ROWS = [
+    {"ID": "v1", "Nome": "Vendas 1", "URL": sheet(1), "Categoria": "Vendas", "Tags": "Shopee"},
+    {"ID": "v2", "Nome": "Vendas 2", "URL": sheet(2), "Categoria": "Vendas"},
+    {"ID": "r1", "Nome": "RH 1", "URL": sheet(3), "Categoria": "RH"},
+    {"ID": "z1", "Nome": "Lixo 1", "URL": sheet(4), "Ativo": False,
+     "Arquivado_em": pd.Timestamp("2023-06-01 10:00:00")},
+    {"ID": "z2", "Nome": "Lixo 2", "URL": sheet(5), "Ativo": False,
+     "Arquivado_em": pd.Timestamp("2024-06-01 10:00:00")},
+]
+
+
+@pytest.fixture
+def folder(make_catalog, tmp_path):
+    make_catalog(ROWS, folder="cat")
+    return tmp_path / "cat"
+
+
+def run(folder, *args) -> int:
+    return main(["--dir", str(folder), "--storage", "sqlite", *args])
+
+
+def active(folder) -> dict:
+    df = get_storage(folder, "sqlite").load()
+    return dict(zip(df["ID"], df["Ativo"]))
+
+
+def test_archive_with_filter(folder, capsys):
+    assert run(folder, "archive", "--categoria", "Vendas", "--dry-run") == 0
+    assert "2 linha(s) seriam arquivada(s)" in capsys.readouterr().out
+    assert all(active(folder)[i] for i in ("v1", "v2"))
+    assert run(folder, "archive", "--categoria", "Vendas", "--tag", "Shopee") == 0
+    assert "1 linha(s) arquivada(s)." in capsys.readouterr().out
+    assert active(folder) == {"v1": False, "v2": True, "r1": True, "z1": False, "z2": False}
+
+
+@pytest.mark.parametrize("command, untouched", [("archive", ["v1", "v2", "r1"]), ("restore", ["z1", "z2"])])
+def test_bulk_without_filter_needs_yes(folder, capsys, command, untouched):
+    before = active(folder)
+    assert run(folder, command) == 2
+    assert "Sem filtro" in capsys.readouterr().err
+    assert active(folder) == before
+    # --dry-run só conta, sem pedir confirmação
+    assert run(folder, command, "--dry-run") == 0
+    assert f"{len(untouched)} linha(s) seriam" in capsys.readouterr().out
+    assert run(folder, command, "--yes") == 0
+    assert all(active(folder)[i] == (command == "restore") for i in untouched)
+
+
+def test_purge_needs_yes_and_logs(folder, capsys):
+    assert run(folder, "purge", "--arquivado-antes", "2024-01-01") == 2
+    assert "confirme com --yes" in capsys.readouterr().err
+    assert "z1" in active(folder)
+    assert run(folder, "purge", "--arquivado-antes", "2024-01-01", "--yes") == 0
+    assert sorted(active(folder)) == ["r1", "v1", "v2", "z2"]
+    log = retention.read_log(folder / retention.LOG_NAME)
+    assert log[["Regra", "ID", "URL"]].values.tolist() == [["linha de comando", "z1", sheet(4)]]
+
+
+def test_purge_never_touches_active_rows(folder):
+    assert run(folder, "purge", "--ids", "v1,z2", "--yes") == 0
+    assert sorted(active(folder)) == ["r1", "v1", "v2", "z1"]
+
+
+def test_ids_from_file(folder, tmp_path):
+    ids = tmp_path / "ids.txt"
+    ids.write_text("v2\n\nr1\n", encoding="utf-8")
+    assert run(folder, "archive", "--ids", f"@{ids}") == 0
+    assert not active(folder)["v2"] and not active(folder)["r1"] and active(folder)["v1"]
+
+
+def test_export_then_import_round_trip(folder, tmp_path, capsys, make_catalog):
+    out = tmp_path / "lixeira.csv"
+    assert run(folder, "export", "-o", str(out), "--escopo", "arquivadas") == 0
+    assert "2 linha(s) exportada(s)" in capsys.readouterr().out
+    assert pd.read_csv(out, dtype=str)["ID"].tolist() == ["z1", "z2"]
+
+    make_catalog([], folder="vazio")
+    assert run(tmp_path / "vazio", "import", str(out)) == 0
+    assert "2 nova(s)" in capsys.readouterr().out
+    assert active(tmp_path / "vazio") == {"z1": False, "z2": False}
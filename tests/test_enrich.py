@@ -0,0 +1,173 @@
+"""Enriquecimento contra uma API de lote do Drive falsa (servidor HTTP local)."""
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from central.enrich import DriveClient, Enricher, Quota, QuotaExceeded, _modified
+
+from conftest import sheet
+
+FILES = {
+    "planilha0001": {"name": "Frota 2024", "modifiedTime": "2024-05-02T12:30:00Z",
+                     "owners": [{"displayName": "Ana", "emailAddress": "ana@x.com"}]},
+    "planilha0002": {"name": "Vendas", "modifiedTime": "2024-06-01T08:00:00.000Z",
+                     "owners": [{"emailAddress": "bia@x.com"}]},
+    "planilha0003": {"name": "RH", "modifiedTime": "2023-12-31T23:59:59Z", "owners": []},
+    "planilha0004": {"name": "Metas", "modifiedTime": "2024-01-10T00:00:00Z",
+                     "owners": [{"displayName": "Caio"}]},
+}
+
+
+class FakeDrive(BaseHTTPRequestHandler):
+    """``POST /batch/drive/v3``: uma resposta por parte, como a API real.
+
+    ``limited``: IDs que recebem 429 na primeira vez; ``reject``: quantas
+    requisições inteiras recebem 429 com ``Retry-After``.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        s = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        ids = re.findall(r"GET /drive/v3/files/([^?\s]+)", body)
+        s.batches.append(ids)
+        if s.reject:
+            s.reject -= 1
+            return self._send(429, b"", {"Retry-After": "3"})
+        boundary = "batch_fake"
+        parts = []
+        for n, fid in enumerate(ids):
+            if fid in s.limited:
+                s.limited.discard(fid)
+                status, data = "429 Too Many Requests", {"error": {"errors": [{"reason": "rateLimitExceeded"}]}}
+            elif fid in FILES:
+                status, data = "200 OK", FILES[fid]
+            else:
+                status, data = "404 Not Found", {"error": {"code": 404}}
+            parts.append(f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-item{n}>\r\n\r\n"
+                         f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n\r\n{json.dumps(data)}\r\n")
+        out = ("".join(parts) + f"--{boundary}--\r\n").encode()
+        self._send(200, out, {"Content-Type": f"multipart/mixed; boundary={boundary}"})
+
+    def _send(self, code, body, headers):
+        self.send_response(code)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def drive():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), FakeDrive)
+    srv.daemon_threads = True
+    srv.batches, srv.limited, srv.reject = [], set(), 0
+    threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def client(srv, batch_size=100) -> DriveClient:
+    return DriveClient(f"http://127.0.0.1:{srv.server_address[1]}", token="t", batch_size=batch_size)
+
+
+def test_fetch_parses_batch(drive):
+    out = client(drive).fetch(["planilha0001", "planilha0002", "planilha0003", "sumiu"])
+    assert out["planilha0001"] == {"Titulo": "Frota 2024", "Dono": "Ana",
+                                   "Modificado_em": _modified("2024-05-02T12:30:00Z")}
+    assert out["planilha0002"]["Dono"] == "bia@x.com"  # sem nome: e-mail
+    assert out["planilha0003"]["Dono"] == ""
+    assert out["sumiu"] is None  # sem acesso ou excluída
+    assert drive.batches == [["planilha0001", "planilha0002", "planilha0003", "sumiu"]]
+
+
+def test_fetch_partial_429_keeps_the_rest(drive):
+    drive.limited = {"planilha0002"}
+    with pytest.raises(QuotaExceeded) as e:
+        client(drive).fetch(["planilha0001", "planilha0002", "planilha0003"])
+    assert set(e.value.partial) == {"planilha0001", "planilha0003"}
+
+
+def test_fetch_whole_batch_429_has_retry_after(drive):
+    drive.reject = 1
+    with pytest.raises(QuotaExceeded) as e:
+        client(drive).fetch(["planilha0001"])
+    assert e.value.retry_after == 3.0 and e.value.partial == {}
+
+
+ROWS = [
+    {"ID": "a", "Nome": "Frota", "URL": sheet(1)},
+    {"ID": "a2", "Nome": "Frota (outra aba)", "URL": sheet(1, 5)},  # mesma planilha: uma consulta
+    {"ID": "b", "Nome": "Vendas", "URL": sheet(2)},
+    {"ID": "c", "Nome": "RH", "URL": sheet(3)},
+    {"ID": "d", "Nome": "Metas", "URL": sheet(4)},
+    {"ID": "x", "Nome": "Sumiu", "URL": sheet(9), "Titulo": "Título antigo"},
+]
+
+
+def enricher(catalog, srv, batch_size=4):
+    sleeps = []
+    quota = Quota(1000, 1, sleep=sleeps.append)
+    return Enricher(catalog, client(srv, batch_size), quota=quota, sleep=sleeps.append), sleeps
+
+
+def test_run_once_retries_throttled_items_and_writes_metadata(make_catalog, drive):
+    catalog = make_catalog(ROWS)
+    drive.limited = {"planilha0002", "planilha0004"}
+    worker, sleeps = enricher(catalog, drive)
+    report = worker.run_once()
+
+    assert report == {"consultas": 7, "linhas": 6, "esperas": 1}
+    first, *rest = drive.batches
+    assert len(first) == 4  # lote inteiro
+    assert sorted(i for b in rest for i in b) == ["planilha0002", "planilha0004", "planilha0009"]
+    assert max(len(b) for b in rest) <= 2  # lote cai pela metade após o 429
+    assert sleeps == [1.0]  # backoff inicial, sem Retry-After
+
+    df = catalog.snapshot().set_index("ID")
+    assert df.loc[["a", "a2"], "Titulo"].tolist() == ["Frota 2024", "Frota 2024"]
+    assert df.at["b", "Dono"] == "bia@x.com"
+    assert df.at["d", "Titulo"] == "Metas"
+    assert df.at["c", "Modificado_em"] == pd.Timestamp(_modified("2023-12-31T23:59:59Z"))
+    assert df.at["x", "Titulo"] == "Título antigo"  # inacessível: mantém os anteriores
+    assert df["Metadados_em"].notna().all()
+    assert (df["Versao"] == 1).all()  # metadados não sobem a versão
+
+    drive.batches.clear()
+    assert worker.run_once() == {"consultas": 0, "linhas": 0, "esperas": 0}
+    assert drive.batches == []
+
+
+def test_run_once_waits_retry_after_on_whole_batch_429(make_catalog, drive):
+    catalog = make_catalog(ROWS[:3])
+    drive.reject = 1
+    worker, sleeps = enricher(catalog, drive)
+    report = worker.run_once()
+    assert sleeps == [3.0]
+    assert report["esperas"] == 1 and report["linhas"] == 3
+    assert len(drive.batches) == 2
+
+
+def test_quota_token_bucket():
+    now, sleeps = [0.0], []
+
+    def sleep(s):
+        sleeps.append(s)
+        now[0] += s
+
+    quota = Quota(10, 10, clock=lambda: now[0], sleep=sleep)
+    quota.acquire(10)
+    assert sleeps == []
+    quota.acquire(4)
+    assert sleeps == [pytest.approx(4.0)]
+    now[0] += 100
+    quota.acquire(50)  # nunca pede mais que o limite
+    assert len(sleeps) == 1
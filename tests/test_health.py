@@ -0,0 +1,181 @@
+"""Verificador de links contra um servidor HTTP local (sem rede, sem Google)."""
+import asyncio
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from central import health
+from central.health import ConnectionPool, check_urls, classify, probe
+
+
+class Stub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como o Google
+    hits: Counter
+    lock: threading.Lock
+    in_flight = 0
+    max_in_flight = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, code: int, headers: dict | None = None, body: bytes = b""):
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command == "GET":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        with self.lock:
+            self.hits[url.path] += 1
+            hits = self.hits[url.path]
+        if url.path == "/ok":
+            return self._reply(200)
+        if url.path == "/private":
+            return self._reply(302, {"Location": "https://accounts.google.com/ServiceLogin?continue=x"})
+        if url.path == "/moved":
+            return self._reply(302, {"Location": "https://docs.google.com/spreadsheets/d/x/edit"})
+        if url.path == "/forbidden":
+            return self._reply(403)
+        if url.path in ("/404", "/410"):
+            return self._reply(int(url.path[1:]))
+        if url.path == "/slow":
+            time.sleep(1.0)
+            return self._reply(200)
+        if url.path == "/flaky":  # 503 nas primeiras ``n`` requisições
+            return self._reply(503 if hits <= int(query["n"][0]) else 200)
+        if url.path == "/huge":  # cabeçalho maior que o limite de linha do StreamReader (64 KiB)
+            return self._reply(200, {"X-Big": "x" * 70_000})
+        if url.path == "/nohead":
+            return self._reply(405) if self.command == "HEAD" else self._reply(200, body=b"planilha")
+        if url.path == "/busy":
+            cls = type(self)
+            with self.lock:
+                cls.in_flight += 1
+                cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            time.sleep(0.1)
+            with self.lock:
+                cls.in_flight -= 1
+            return self._reply(200)
+        return self._reply(500)
+
+    do_GET = do_HEAD
+
+
+@pytest.fixture
+def stub():
+    handler = type("Handler", (Stub,), {"hits": Counter(), "lock": threading.Lock()})
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}", handler
+    srv.shutdown()
+    srv.server_close()
+
+
+def run_probe(url: str, **options) -> dict:
+    async def go():
+        pool = ConnectionPool(timeout=options.pop("timeout", 2.0), per_host_rate=0)
+        try:
+            return await probe(pool, url, **options)
+        finally:
+            pool.close()
+
+    return asyncio.run(go())
+
+
+@pytest.mark.parametrize("path, status, code", [
+    ("/ok", "ok", 200),
+    ("/private", "denied", 302),
+    ("/moved", "ok", 302),
+    ("/forbidden", "denied", 403),
+    ("/404", "not_found", 404),
+    ("/410", "not_found", 410),
+    ("/nohead", "ok", 200),
+])
+def test_probe_status(stub, path, status, code):
+    base, _ = stub
+    res = run_probe(base + path, retries=0)
+    assert (res["status"], res["code"]) == (status, code)
+    assert res["latency_ms"] >= 0
+
+
+def test_classify():
+    assert classify(None, {}) == "error"
+    assert classify(500, {}) == "error"
+    assert classify(301, {"location": "https://accounts.google.com/x"}) == "denied"
+    assert classify(301, {}) == "ok"
+
+
+def test_timeout_is_error_after_retries(stub):
+    base, handler = stub
+    t0 = time.perf_counter()
+    res = run_probe(base + "/slow", retries=1, backoff=0.01, timeout=0.2)
+    assert (res["status"], res["code"]) == ("error", None)
+    assert handler.hits["/slow"] == 2
+    assert time.perf_counter() - t0 < 1.0
+
+
+def test_retry_with_backoff_recovers(stub):
+    base, handler = stub
+    res = run_probe(base + "/flaky?n=2", retries=2, backoff=0.01)
+    assert (res["status"], res["code"]) == ("ok", 200)
+    assert handler.hits["/flaky"] == 3
+
+
+def test_retries_exhausted(stub):
+    base, handler = stub
+    res = run_probe(base + "/flaky?n=5", retries=1, backoff=0.01)
+    assert (res["status"], res["code"]) == ("error", 503)
+    assert handler.hits["/flaky"] == 2
+
+
+def test_check_urls_respects_concurrency_and_reuses_connections(stub):
+    base, handler = stub
+    items = [(f"id{i}", f"{base}/busy?i={i}") for i in range(12)]
+    seen = []
+    results = asyncio.run(check_urls(items, concurrency=3, per_host_rate=0, on_result=seen.append))
+    assert [r["ID"] for r in results] == [i for i, _ in items]
+    assert {r["status"] for r in results} == {"ok"}
+    assert len(seen) == 12
+    assert handler.max_in_flight == 3
+
+
+def test_check_urls_mixed(stub):
+    base, _ = stub
+    items = [("a", base + "/ok"), ("b", base + "/private"), ("c", base + "/404"), ("d", "ftp://x/y")]
+    results = asyncio.run(check_urls(items, retries=0, per_host_rate=0))
+    assert {r["ID"]: r["status"] for r in results} == {"a": "ok", "b": "denied", "c": "not_found", "d": "error"}
+
+
+def test_oversized_header_is_error(stub):
+    base, _ = stub
+    res = run_probe(base + "/huge", retries=0)
+    assert (res["status"], res["code"]) == ("error", None)
+
+
+def test_unexpected_failure_does_not_drop_the_batch(stub, monkeypatch):
+    base, _ = stub
+    real = health.probe
+
+    async def broken(pool, url, retries=2, backoff=0.5):
+        if url.endswith("/boom"):
+            raise RuntimeError("falha inesperada")
+        return await real(pool, url, retries, backoff)
+
+    monkeypatch.setattr(health, "probe", broken)
+    items = [("a", base + "/ok"), ("b", base + "/boom"), ("c", base + "/huge"), ("d", base + "/404")]
+    seen = []
+    results = asyncio.run(check_urls(items, retries=0, per_host_rate=0, on_result=seen.append))
+    assert [(r["ID"], r["status"]) for r in results] == [("a", "ok"), ("b", "error"), ("c", "error"),
+                                                         ("d", "not_found")]
+    assert results[1]["code"] is None and results[1]["checked_at"] > 0
+    assert sorted(r["ID"] for r in seen) == ["a", "b", "c", "d"]
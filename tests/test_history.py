@@ -0,0 +1,125 @@
+"""Histórico: reconstrução por checkpoint + deltas com ``at`` e volta no tempo com ``restore_ops``."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from central import history
+from central.catalog import Catalog
+from central.history import HistoryStore, restore, restore_ops, text_rows
+from central.storage import get_storage
+
+from conftest import links, sheet
+
+ROWS = [
+    {"ID": "a", "Nome": "A", "URL": sheet(1), "Tags": "x"},
+    {"ID": "b", "Nome": "B", "URL": sheet(2), "Categoria": "RH"},
+]
+STEPS = [
+    {"op": "add", "rows": [{"ID": "c", "Nome": "C", "URL": sheet(3), "Categoria": "Geral", "Tags": "",
+                            "Ativo": "True", "Criado_em": "2024-01-02 09:00:00", "Versao": "1"}]},
+    {"op": "edit", "ids": ["a"], "values": {"Nome": "A2", "Tags": "x, y"}},
+    {"op": "archive", "ids": ["b"], "values": {"Ativo": "False", "Arquivado_em": "2024-01-03 10:00:00"}},
+    {"op": "delete", "ids": ["c"]},
+    {"op": "batch", "ops": [
+        {"op": "restore", "ids": ["b"], "values": {"Ativo": "True", "Arquivado_em": ""}},
+        {"op": "edit", "ids": ["a"], "values": {"Categoria": "Vendas"}},
+    ]},
+]
+START = datetime(2024, 3, 1, 9, 0)
+
+
+class Clock(datetime):
+    """``datetime`` cujo ``now()`` é o horário ajustado pelo teste."""
+
+    at = START
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.at
+
+
+@pytest.fixture
+def timeline(tmp_path, monkeypatch):
+    """Catálogo com histórico; ``STEPS[i]`` gravado às ``START + (i + 1)`` minutos.
+
+    Devolve ``(catalog, states)``, com ``states[i]`` o catálogo em texto
+    depois do passo ``i`` (``states[0]``: o inicial).
+    """
+    monkeypatch.setattr(history, "datetime", Clock)
+    Clock.at = START
+    store = get_storage(tmp_path, "sqlite")
+    store.replace_all(links(ROWS))
+    catalog = Catalog(store, HistoryStore(tmp_path / history.HISTORY_NAME, checkpoint_every=10**6))
+    states = [text_rows(catalog.snapshot())]
+    for i, op in enumerate(STEPS, 1):
+        Clock.at = START + timedelta(minutes=i)
+        catalog.commit(op)
+        states.append(text_rows(catalog.snapshot()))
+        if i == 2:
+            catalog.history.checkpoint()
+    Clock.at = START + timedelta(hours=1)
+    return catalog, states
+
+
+def as_rows(df) -> dict:
+    return {r["ID"]: {c: r[c] for c in history.DATA_FIELDS} for r in df.astype(object).to_dict("records")}
+
+
+def test_at_rebuilds_every_step(timeline):
+    catalog, states = timeline
+    for i, expected in enumerate(states):
+        assert as_rows(catalog.history.at(START + timedelta(minutes=i, seconds=30))) == expected, i
+
+
+def test_before_the_first_checkpoint_is_an_error(timeline):
+    catalog, _ = timeline
+    with pytest.raises(ValueError, match="Sem histórico antes de"):
+        catalog.history.at(START - timedelta(days=1))
+
+
+def test_checkpoint_replaces_the_deltas_before_it(timeline):
+    catalog, states = timeline
+    with catalog.history._connect() as con:
+        assert [s for s, in con.execute("SELECT seq FROM checkpoints ORDER BY seq")] == [0, 2]
+        # sem as alterações já contidas no checkpoint, a reconstrução continua igual
+        con.execute("DELETE FROM changes WHERE seq <= 2")
+    for i in range(2, len(states)):
+        assert as_rows(catalog.history.at(START + timedelta(minutes=i, seconds=30))) == states[i], i
+
+
+def test_log_keeps_only_changed_fields(timeline):
+    catalog, _ = timeline
+    log = catalog.history.log("a")
+    assert log[["Operação", "Campo", "Antes", "Depois"]].values.tolist() == [
+        ["lote", "Categoria", "Geral", "Vendas"],
+        ["editar", "Nome", "A", "A2"],
+        ["editar", "Tags", "x", "x, y"],
+    ]
+
+
+@pytest.mark.parametrize("step", range(len(STEPS)))
+def test_restore_ops_returns_to_earlier_state(timeline, step):
+    catalog, states = timeline
+    before = catalog.snapshot().set_index("ID")["Versao"]
+    past = catalog.history.at(START + timedelta(minutes=step, seconds=30))
+    ops, preview = restore_ops(catalog.snapshot(), past)
+    catalog.commit({"op": "batch", "ops": ops, "label": "historico"})
+    after = catalog.snapshot()
+    assert text_rows(after) == states[step]
+    changed = {i for i in states[step].keys() | states[-1].keys() if states[step].get(i) != states[-1].get(i)}
+    assert set(preview["ID"]) == changed
+    # linhas regravadas ganham a Versao seguinte à atual; as outras não mudam
+    for id_, version in after.set_index("ID")["Versao"].items():
+        if id_ in before:
+            assert version == before[id_] + (id_ in changed), id_
+    # de volta ao estado atual, nada a fazer
+    assert restore_ops(after, catalog.history.at(datetime.now() + timedelta(days=1)))[0] == []
+
+
+def test_restore_only_some_ids(timeline):
+    catalog, states = timeline
+    assert restore(catalog, START + timedelta(minutes=1, seconds=30), ids=["c"]) == 1
+    now = text_rows(catalog.snapshot())
+    assert now["c"] == states[1]["c"]
+    assert {i: r for i, r in now.items() if i != "c"} == states[-1]
+    assert catalog.history.recent(1)["Operação"].tolist() == ["volta no histórico"]
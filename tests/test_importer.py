@@ -0,0 +1,97 @@
+"""Importação de CSV em blocos: reimportação, IDs estáveis, duplicatas e limites de bloco."""
+import io
+from uuid import NAMESPACE_URL, uuid5
+
+import pandas as pd
+
+from central.importer import import_csv, validate
+from central.storage import COLS, serialize
+
+from conftest import links, sheet
+
+ROWS = [{"ID": f"id{i}", "Nome": f"Planilha {i}", "URL": sheet(i), "Tags": "a"} for i in range(3)]
+
+
+def csv(rows: list[dict], cols=("ID", "Nome", "URL", "Categoria", "Tags", "Ativo")) -> io.BytesIO:
+    return io.BytesIO(pd.DataFrame(rows, columns=list(cols)).fillna("").to_csv(index=False).encode("utf-8"))
+
+
+def counts(report: dict) -> tuple:
+    return report["novas"], report["atualizadas"], report["iguais"], len(report["erros"])
+
+
+def test_reimporting_the_same_file_writes_nothing(make_catalog):
+    catalog = make_catalog(ROWS)
+    data = serialize(links(ROWS + [{"ID": "id9", "Nome": "Nova", "URL": sheet(9)}]))[COLS]
+    payload = data.to_csv(index=False).encode("utf-8")
+    assert counts(import_csv(catalog, io.BytesIO(payload))) == (1, 0, 3, 0)
+    version = catalog.store.version()
+    assert counts(import_csv(catalog, io.BytesIO(payload))) == (0, 0, 4, 0)
+    assert catalog.store.version() == version
+
+
+def test_changed_row_is_updated_with_next_version(make_catalog):
+    catalog = make_catalog(ROWS)
+    rows = [{"ID": "id1", "Nome": "Renomeada", "URL": sheet(1), "Tags": "a", "Ativo": "True"}]
+    assert counts(import_csv(catalog, csv(rows))) == (0, 1, 0, 0)
+    row = catalog.snapshot().set_index("ID").loc["id1"]
+    assert row["Nome"] == "Renomeada" and row["Versao"] == 2
+
+
+def test_rows_without_id_get_a_stable_uuid5(make_catalog):
+    catalog = make_catalog([])
+    rows = [{"ID": "", "Nome": "Sem ID", "URL": sheet(5, gid=3), "Ativo": "True"}]
+    assert counts(import_csv(catalog, csv(rows))) == (1, 0, 0, 0)
+    expected = str(uuid5(NAMESPACE_URL, "Sem ID|planilha0005#3"))
+    assert catalog.snapshot()["ID"].tolist() == [expected]
+    # outra forma de link para a mesma aba gera o mesmo ID: reimportação reconhece a linha
+    again = [{"ID": "", "Nome": "Sem ID",
+              "URL": "https://docs.google.com/spreadsheets/d/planilha0005/edit?usp=sharing&gid=3", "Ativo": "True"}]
+    assert counts(import_csv(catalog, csv(again))) == (0, 0, 1, 0)
+    assert len(catalog.snapshot()) == 1
+
+
+def test_validate_rejects_sheet_already_registered(make_catalog):
+    catalog = make_catalog(ROWS)
+    chunk = pd.DataFrame({
+        "ID": ["novo", "id0", "outro", "mais"],
+        "Nome": ["Cópia", "Planilha 0", "Nova", "Nova de novo"],
+        "URL": [sheet(1) + "&usp=sharing", sheet(0), sheet(7), sheet(7)],
+        "Ativo": ["True"] * 4,
+        **{c: [""] * 4 for c in ("Criado_em", "Arquivado_em", "Modificado_em", "Metadados_em")},
+    })
+    reason = validate(chunk, catalog.keys)
+    assert reason.tolist() == ["Planilha já cadastrada (ID id1)", "", "", "Planilha já cadastrada (ID outro)"]
+    assert validate(chunk).eq("").all()
+
+
+def test_validate_reports_each_problem():
+    chunk = pd.DataFrame({
+        "ID": ["a", "b", "c", "d"],
+        "Nome": ["", "B", "C", "D"],
+        "URL": [sheet(1), "https://example.com", sheet(3), sheet(4)],
+        "Ativo": ["True", "True", "talvez", "sim"],
+        "Criado_em": ["", "", "", "ontem"],
+        **{c: [""] * 4 for c in ("Arquivado_em", "Modificado_em", "Metadados_em")},
+    })
+    assert validate(chunk).tolist() == ["Nome vazio", "URL inválida", "Ativo inválido", "Criado_em inválido"]
+
+
+def test_chunk_boundaries(make_catalog):
+    catalog = make_catalog(ROWS)
+    rows = [
+        {"ID": "n1", "Nome": "N1", "URL": sheet(11)},                    # linha 2, bloco 1
+        {"ID": "n2", "Nome": "", "URL": sheet(12)},                      # linha 3: inválida
+        {"ID": "n3", "Nome": "N3", "URL": sheet(13)},                    # linha 4, bloco 2
+        {"ID": "dup", "Nome": "Dup", "URL": sheet(11) + "&usp=sharing"},  # linha 5: planilha do bloco 1
+        {"ID": "n1", "Nome": "N1 revisada", "URL": sheet(11)},           # linha 6, bloco 3: mesmo ID
+    ]
+    progress = []
+    report = import_csv(catalog, csv(rows), chunk_rows=2, on_progress=lambda n, f: progress.append(n))
+    assert progress == [2, 4, 5] and report["linhas"] == 5
+    assert counts(report) == (2, 1, 0, 2)
+    assert [(e["linha"], e["ID"]) for e in report["erros"]] == [(3, "n2"), (5, "dup")]
+    df = catalog.snapshot().set_index("ID")
+    assert sorted(df.index) == ["id0", "id1", "id2", "n1", "n3"]
+    assert df.at["n1", "Nome"] == "N1 revisada" and df.at["n1", "Versao"] == 2
+    assert df.at["n3", "URL"] == sheet(13)
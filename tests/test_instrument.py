@@ -0,0 +1,64 @@
+"""Registro próprio para reruns só de fragmento (``fragment_trace``)."""
+import json
+
+import pytest
+
+from central import instrument
+
+
+@pytest.fixture
+def records(monkeypatch, tmp_path):
+    monkeypatch.setattr(instrument, "ENABLED", True)
+    monkeypatch.setattr(instrument, "PROFILE", False)
+    monkeypatch.delenv("CENTRAL_TRACE_LOG", raising=False)
+    seen = []
+
+    @instrument.fragment_trace("app.py#grade", tmp_path, seen.append)
+    def grade(n):
+        with instrument.span("cards"):
+            instrument.count("cards", n)
+        return n
+
+    def logged():
+        path = tmp_path / instrument.LOG_NAME
+        return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+    return grade, seen, logged
+
+
+def test_fragment_rerun_gets_own_record(records):
+    grade, seen, logged = records
+    assert grade(3) == 3
+    assert [r["label"] for r in logged()] == ["app.py#grade"]
+    assert seen[0]["counters"] == {"cards": 3} and "cards" in seen[0]["spans"]
+    assert instrument.current() is None
+
+
+def test_full_run_keeps_fragment_inside_its_record(records, tmp_path):
+    grade, seen, logged = records
+    trace = instrument.begin("app.py")
+    grade(2)
+    rec = instrument.end(trace, tmp_path)
+    assert seen == [] and [r["label"] for r in logged()] == ["app.py"]
+    assert rec["counters"] == {"cards": 2}
+
+
+def test_record_closed_when_fragment_raises(records, tmp_path):
+    _, seen, logged = records
+
+    # st.rerun() dentro do fragmento sai por exceção; o registro fecha mesmo assim
+    @instrument.fragment_trace("app.py#lote", tmp_path, seen.append)
+    def lote():
+        instrument.count("widgets")
+        raise RuntimeError("rerun")
+
+    with pytest.raises(RuntimeError):
+        lote()
+    assert [r["label"] for r in logged()] == ["app.py#lote"]
+    assert seen[0]["counters"] == {"widgets": 1} and instrument.current() is None
+
+
+def test_disabled_runs_plain(records, monkeypatch):
+    grade, seen, logged = records
+    monkeypatch.setattr(instrument, "ENABLED", False)
+    assert grade(1) == 1 and seen == [] and logged() == []
@@ -0,0 +1,125 @@
+"""Compare-and-swap por linha (``Versao``) da edição em tabela, por backend."""
+import threading
+
+import pytest
+
+from central import columnar
+from central.merge import diff_frames
+from central.storage import get_storage
+
+from conftest import links, sheet
+
+ROWS = [{"ID": f"id{i}", "Nome": f"Planilha {i}", "URL": sheet(i), "Tags": "a"} for i in range(5)]
+NEEDS_PYARROW = pytest.mark.skipif(not columnar.available(), reason="pyarrow não instalado")
+
+
+@pytest.fixture(params=["sqlite", "csv", "journal", pytest.param("arrow", marks=NEEDS_PYARROW)])
+def store(request, tmp_path):
+    store = get_storage(tmp_path, request.param)
+    store.replace_all(links(ROWS))
+    return store
+
+
+def session(store):
+    """Snapshot em que uma sessão começou a editar, e uma cópia para editar."""
+    base = store.load()
+    return base, base.copy()
+
+
+def edit(df, id_, **values):
+    for c, v in values.items():
+        df.loc[df["ID"] == id_, c] = v
+    return df
+
+
+def row(store, id_):
+    df = store.load().set_index("ID")
+    return df.loc[id_] if id_ in df.index else None
+
+
+def test_same_row_same_field_conflicts_and_keeps_first_write(store):
+    base_a, a = session(store)
+    base_b, b = session(store)
+    assert store.commit_changes(diff_frames(base_a, edit(a, "id1", Nome="Da sessão A"))) == (1, [])
+    saved, conflicts = store.commit_changes(diff_frames(base_b, edit(b, "id1", Nome="Da sessão B")))
+    assert saved == 0
+    assert conflicts == [{"ID": "id1", "motivo": "campo alterado por outra sessão",
+                          "campos": {"Nome": ("Planilha 1", "Da sessão B", "Da sessão A")}}]
+    assert row(store, "id1")["Nome"] == "Da sessão A"
+    assert row(store, "id1")["Versao"] == 2
+
+
+def test_same_row_other_fields_are_rebased(store):
+    base_a, a = session(store)
+    base_b, b = session(store)
+    store.commit_changes(diff_frames(base_a, edit(a, "id1", Nome="Novo nome")))
+    assert store.commit_changes(diff_frames(base_b, edit(b, "id1", Tags="b, c"))) == (1, [])
+    r = row(store, "id1")
+    assert (r["Nome"], r["Tags"], r["Versao"]) == ("Novo nome", "b, c", 3)
+
+
+def test_different_rows_both_saved(store):
+    base_a, a = session(store)
+    base_b, b = session(store)
+    assert store.commit_changes(diff_frames(base_a, edit(a, "id1", Nome="A"))) == (1, [])
+    assert store.commit_changes(diff_frames(base_b, edit(b, "id2", Nome="B"))) == (1, [])
+    assert (row(store, "id1")["Nome"], row(store, "id2")["Nome"]) == ("A", "B")
+
+
+def test_edit_after_delete_is_refused(store):
+    base_a, a = session(store)
+    base_b, b = session(store)
+    assert store.commit_changes(diff_frames(base_a, a[a["ID"] != "id3"])) == (1, [])
+    saved, conflicts = store.commit_changes(diff_frames(base_b, edit(b, "id3", Nome="Tarde demais")))
+    assert saved == 0 and conflicts[0]["motivo"] == "excluída por outra sessão"
+    assert row(store, "id3") is None
+
+
+def test_delete_after_edit_is_refused(store):
+    base_a, a = session(store)
+    base_b, b = session(store)
+    store.commit_changes(diff_frames(base_a, edit(a, "id3", Nome="Editada")))
+    saved, conflicts = store.commit_changes(diff_frames(base_b, b[b["ID"] != "id3"]))
+    assert saved == 0 and conflicts[0]["motivo"] == "alterada por outra sessão"
+    assert row(store, "id3")["Nome"] == "Editada"
+
+
+def test_concurrent_sessions_lose_nothing(store):
+    # cada thread edita a sua linha e todas disputam id0: uma ganha, as outras recebem conflito
+    bases = [session(store) for _ in range(4)]
+    results = [None] * 4
+    start = threading.Barrier(4)
+
+    def run(n):
+        base, df = bases[n]
+        edit(df, f"id{n + 1}", Nome=f"Thread {n}")
+        edit(df, "id0", Tags=f"t{n}")
+        start.wait()
+        results[n] = store.commit_changes(diff_frames(base, df))
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    winners = [n for n, (saved, conflicts) in enumerate(results) if saved == 2]
+    assert len(winners) == 1
+    for n, (saved, conflicts) in enumerate(results):
+        if n not in winners:
+            assert saved == 1 and [c["ID"] for c in conflicts] == ["id0"]
+    df = store.load().set_index("ID")
+    assert [df.at[f"id{n + 1}", "Nome"] for n in range(4)] == [f"Thread {n}" for n in range(4)]
+    assert df.at["id0", "Tags"] == f"t{winners[0]}"
+
+
+def test_journal_save_is_one_line(tmp_path):
+    store = get_storage(tmp_path, "journal")
+    store.replace_all(links(ROWS))
+    base, mine = session(store)
+    edit(mine, "id0", Nome="A")
+    edit(mine, "id1", Tags="b")
+    mine = mine[mine["ID"] != "id2"]
+    assert store.commit_changes(diff_frames(base, mine)) == (3, [])
+    assert len(store.journal_path.read_text().splitlines()) == 1
+    assert store.load()["ID"].tolist() == ["id0", "id1", "id3", "id4"]
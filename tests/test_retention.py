@@ -0,0 +1,113 @@
+"""Retenção da lixeira: corte de ``due``, lotes do ``Purger`` e log de exclusões."""
+from datetime import datetime
+
+import pandas as pd
+
+from central.enrich import Quota
+from central.retention import LOG_COLS, Purger, due, log_purge, read_log
+
+from conftest import links, sheet
+
+NOW = datetime(2024, 6, 30, 12, 0)
+
+
+def archived(id_: str, n: int, when: str) -> dict:
+    return {"ID": id_, "Nome": f"Planilha {id_}", "URL": sheet(n), "Ativo": False,
+            "Arquivado_em": pd.Timestamp(when)}
+
+
+ROWS = [
+    archived("velha", 1, "2024-05-01 09:00"),
+    archived("limite", 2, "2024-05-31 12:00"),    # exatamente 30 dias: ainda não
+    archived("antiga", 3, "2024-04-15 08:00"),
+    archived("nova", 4, "2024-06-29 18:00"),
+    {"ID": "ativa", "Nome": "Ativa", "URL": sheet(5)},
+]
+
+
+class Steps:
+    """Cota que não espera e roda ``hook(n_da_chamada)`` antes de cada lote."""
+
+    def __init__(self, hook=None):
+        self.calls = []
+        self.hook = hook
+
+    def acquire(self, n: int):
+        self.calls.append(n)
+        if self.hook:
+            self.hook(len(self.calls))
+
+
+def test_due_cutoff_oldest_first():
+    df = links(ROWS)
+    assert due(df, 30, now=NOW)["ID"].tolist() == ["antiga", "velha"]
+    assert due(df, 0, now=NOW)["ID"].tolist() == ["antiga", "velha", "limite", "nova"]
+    assert due(df, 90, now=NOW).empty
+
+
+def test_due_ignores_active_rows_even_with_old_date():
+    df = links([{**archived("x", 1, "2020-01-01"), "Ativo": True}])
+    assert due(df, 1, now=NOW).empty
+
+
+def test_run_once_deletes_in_batches(make_catalog, tmp_path):
+    catalog = make_catalog(ROWS)
+    quota = Steps()
+    purger = Purger(catalog, tmp_path / "purge.jsonl", days=0, batch=3, quota=quota)
+    assert purger.run_once() == {"linhas": 4, "lotes": 2}
+    assert quota.calls == [3, 1] and purger.removed == 4 and not purger.busy
+    assert catalog.snapshot()["ID"].tolist() == ["ativa"]
+    assert purger.run_once() == {"linhas": 0, "lotes": 0}
+
+
+def test_rows_restored_mid_run_are_skipped(make_catalog, tmp_path):
+    catalog = make_catalog(ROWS)
+
+    def restore(call: int):
+        # outra sessão restaura "velha" enquanto o primeiro lote espera a cota
+        if call == 1:
+            catalog.commit({"op": "restore", "ids": ["velha"], "values": {"Ativo": "True", "Arquivado_em": ""}})
+
+    purger = Purger(catalog, tmp_path / "purge.jsonl", days=0, batch=2, quota=Steps(restore))
+    assert purger.run_once() == {"linhas": 3, "lotes": 2}
+    df = catalog.snapshot().set_index("ID")
+    assert sorted(df.index) == ["ativa", "velha"] and df.at["velha", "Ativo"]
+    assert "velha" not in read_log(purger.log_path)["ID"].tolist()
+
+
+def test_a_batch_left_empty_is_not_written(make_catalog, tmp_path):
+    catalog = make_catalog(ROWS[:1])
+
+    def restore(call: int):
+        catalog.commit({"op": "restore", "ids": ["velha"], "values": {"Ativo": "True", "Arquivado_em": ""}})
+
+    purger = Purger(catalog, tmp_path / "purge.jsonl", days=0, quota=Steps(restore))
+    assert purger.run_once() == {"linhas": 0, "lotes": 0}
+    assert catalog.snapshot()["ID"].tolist() == ["velha"]
+    assert not purger.log_path.exists()
+
+
+def test_purge_log_round_trip(make_catalog, tmp_path):
+    catalog = make_catalog([ROWS[0], ROWS[2], ROWS[4]])  # run_once usa o relógio real
+    purger = Purger(catalog, tmp_path / "purge.jsonl", days=30, batch=1, quota=Quota(10, 1))
+    purger.run_once()
+    log = read_log(purger.log_path)
+    assert log.columns.tolist() == ["Excluída em", "Regra", *LOG_COLS]
+    # os mais recentes primeiro: o segundo lote ("velha") vem antes do primeiro ("antiga")
+    assert log["ID"].tolist() == ["velha", "antiga"]
+    assert log["Regra"].eq("arquivada há mais de 30 dia(s)").all()
+    row = log.set_index("ID").loc["antiga"]
+    assert row["Nome"] == "Planilha antiga" and row["URL"] == sheet(3)
+    assert row["Arquivado_em"] == "2024-04-15 08:00:00"
+    assert len(purger.log_path.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_read_log_limit_and_empty(tmp_path):
+    path = tmp_path / "purge.jsonl"
+    assert read_log(path).empty
+    log_purge(path, links([]), "nada")
+    assert not path.exists()
+    for i in range(3):
+        log_purge(path, links([archived(f"{i}a", i, "2024-01-01"), archived(f"{i}b", i + 10, "2024-01-01")]), "r")
+    assert read_log(path, limit=3)["ID"].tolist() == ["2a", "2b", "1a"]
+    assert len(read_log(path)) == 6
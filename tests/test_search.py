@@ -0,0 +1,89 @@
+"""Busca por trigramas: normalização, corte de similaridade, ranking e atualização por commit."""
+import pytest
+
+from central import search
+from central.search import SearchIndex, fold, query_trigrams
+
+from conftest import sheet
+
+ROWS = [
+    {"ID": "nome", "Nome": "Vendas mensais", "URL": sheet(1), "Categoria": "Financeiro", "Tags": ""},
+    {"ID": "tag", "Nome": "Painel geral", "URL": sheet(2), "Categoria": "Financeiro", "Tags": "vendas"},
+    {"ID": "cat", "Nome": "Metas do trimestre", "URL": sheet(3), "Categoria": "Vendas", "Tags": ""},
+    {"ID": "acento", "Nome": "Operações São Paulo", "URL": sheet(4), "Categoria": "Logística", "Tags": "Frota"},
+    {"ID": "longe", "Nome": "Controle de estoque", "URL": sheet(5), "Categoria": "Compras", "Tags": ""},
+]
+
+
+def ranking(results: dict) -> list[str]:
+    return sorted(results, key=results.get, reverse=True)
+
+
+def test_fold_removes_accents_and_case():
+    assert fold("Operações SÃO Paulo") == "operacoes sao paulo"
+    assert fold("Straße") == "strasse"
+
+
+def test_accents_and_case_are_ignored(make_catalog):
+    index = make_catalog(ROWS).search
+    for query in ("operacoes", "OPERAÇÕES", "Operacões", "sao paulo", "logistica", "frota"):
+        assert "acento" in index.search(query), query
+
+
+def test_min_similarity_cutoff(make_catalog, monkeypatch):
+    index = make_catalog(ROWS).search
+    # "coxyzwv": só 2 de 7 trigramas da consulta ("  c", " co") aparecem em "controle"
+    assert len(query_trigrams("coxyzwv")) == 7
+    assert "longe" not in index.search("coxyzwv")
+    # erro de digitação leve passa do corte
+    assert "longe" in index.search("controel")
+    monkeypatch.setattr(search, "MIN_SIMILARITY", 0.25)
+    assert "longe" in index.search("coxyzwv")
+
+
+def test_name_beats_tags_beats_category(make_catalog):
+    index = make_catalog(ROWS).search
+    assert ranking(index.search("vendas")) == ["nome", "tag", "cat"]
+
+
+def test_prefix_and_exact_word_bonuses(make_catalog):
+    index = make_catalog(ROWS + [
+        {"ID": "meio", "Nome": "Revendas", "URL": sheet(6)},
+    ]).search
+    # prefixo enquanto digita: só "Vendas mensais" tem palavra do nome começando por "vend"
+    results = index.search("vend")
+    assert ranking(results)[0] == "nome"
+    assert results["nome"] - results["meio"] >= search.PREFIX_BONUS
+    # palavra inteira igual a uma do nome soma o bônus por palavra
+    both = index.search("vendas mensais")
+    assert both["nome"] - index.search("vendas")["nome"] == pytest.approx(search.EXACT_BONUS)
+
+
+def test_ids_restrict_results(make_catalog):
+    index = make_catalog(ROWS).search
+    assert set(index.search("vendas", ids={"tag", "cat"})) == {"tag", "cat"}
+    assert index.search("") == {} and index.search("  !! ") == {}
+
+
+def test_index_follows_commits(make_catalog):
+    catalog = make_catalog(ROWS)
+    old = catalog.search
+    catalog.commit({"op": "add", "rows": [{"ID": "novo", "Nome": "Relatório de frete", "URL": sheet(7)}]})
+    catalog.commit({"op": "edit", "ids": ["longe"], "values": {"Nome": "Inventário"}})
+    catalog.commit({"op": "delete", "ids": ["tag"]})
+    index = catalog.search
+    assert set(index.search("frete")) == {"novo"}
+    assert "longe" in index.search("inventario") and "longe" not in index.search("estoque")
+    assert "tag" not in index.search("painel")
+    # mesmo resultado de um índice montado do zero, e o anterior continua intacto
+    fresh = SearchIndex.build(catalog.snapshot())
+    for query in ("frete", "vendas", "inventario", "operacoes", "painel"):
+        assert index.search(query) == fresh.search(query), query
+    assert "longe" in old.search("estoque") and "tag" in old.search("painel")
+
+
+def test_archive_keeps_the_same_index(make_catalog):
+    catalog = make_catalog(ROWS)
+    before = catalog.search
+    catalog.commit({"op": "archive", "ids": ["nome"], "values": {"Ativo": "False"}})
+    assert catalog.search is before
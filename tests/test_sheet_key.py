@@ -0,0 +1,73 @@
+import io
+
+import pandas as pd
+
+from central.importer import import_csv, validate
+from central.merge import changed_rows, editor_changes
+from central.sheet_key import sheet_keys
+from central.storage import serialize
+
+from conftest import sheet
+
+# dois links antigos apontando para a mesma aba (duplicata de antes do índice)
+ROWS = [
+    {"ID": "a", "Nome": "Frota", "URL": sheet(1)},
+    {"ID": "b", "Nome": "Frota (cópia)", "URL": sheet(1) + "&usp=sharing"},
+    {"ID": "c", "Nome": "Vendas", "URL": sheet(2)},
+]
+
+
+def test_existing_cluster_is_reported(make_catalog):
+    catalog = make_catalog(ROWS)
+    assert catalog.keys.clusters() == [("planilha0001#0", ["a", "b"])]
+
+
+def test_edit_row_of_existing_duplicate_cluster(make_catalog):
+    catalog = make_catalog(ROWS)
+    page = catalog.snapshot()
+    changes = editor_changes(page, {"edited_rows": {1: {"Nome": "Frota renomeada"}}})
+    assert validate(changed_rows(changes, page), catalog.keys).eq("").all()
+    saved, conflicts = catalog.commit_changes(changes)
+    assert (saved, conflicts) == (1, [])
+    assert catalog.snapshot().set_index("ID").at["b", "Nome"] == "Frota renomeada"
+
+
+def test_reimport_row_of_existing_duplicate_cluster(make_catalog):
+    catalog = make_catalog(ROWS)
+    out = serialize(catalog.snapshot())
+    out.loc[out["ID"] == "b", "Nome"] = "Frota importada"
+    report = import_csv(catalog, io.StringIO(out.to_csv(index=False)))
+    assert report["erros"] == []
+    assert report["atualizadas"] == 1
+    assert catalog.snapshot().set_index("ID").at["b", "Nome"] == "Frota importada"
+
+
+def test_new_or_moved_key_still_refused(make_catalog):
+    catalog = make_catalog(ROWS)
+    # ID novo com a chave do grupo, e ID existente mudando para ela
+    rows = pd.DataFrame({"ID": ["novo", "c"], "URL": [sheet(1), sheet(1) + "?usp=sharing"]})
+    reason = catalog.keys.duplicates(rows["ID"], sheet_keys(rows["URL"]))
+    assert reason.str.startswith("Planilha já cadastrada").all()
+
+
+def test_table_editor_saves_canonical_url(make_catalog):
+    catalog = make_catalog(ROWS)
+    page = catalog.snapshot()
+    typed = "https://docs.google.com/spreadsheets/d/planilha0009/view?usp=sharing#gid=7"
+    changes = editor_changes(page, {
+        "edited_rows": {2: {"URL": typed}},
+        "added_rows": [{"Nome": "Nova", "URL": sheet(8) + "?usp=sharing", "Ativo": True}],
+    })
+    rows = changed_rows(changes, page)
+    assert rows["URL"].tolist() == [sheet(9, 7), sheet(8)]
+    assert validate(rows, catalog.keys).eq("").all()
+    catalog.commit_changes(changes)
+    urls = catalog.snapshot().set_index("Nome")["URL"]
+    assert (urls["Vendas"], urls["Nova"]) == (sheet(9, 7), sheet(8))
+
+
+def test_table_editor_keeps_invalid_url_for_validation(make_catalog):
+    catalog = make_catalog(ROWS)
+    page = catalog.snapshot()
+    changes = editor_changes(page, {"edited_rows": {2: {"URL": "não é link"}}})
+    assert validate(changed_rows(changes, page), catalog.keys).tolist() == ["URL inválida"]
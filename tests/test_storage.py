@@ -0,0 +1,69 @@
+"""Contagem de linhas afetadas igual em todos os backends; versão do SQLite na abertura."""
+import pytest
+
+from central.storage import CSV_NAME, SQLITE_NAME, SqliteStorage, get_storage, serialize
+
+from conftest import links, sheet
+
+ROWS = [{"ID": f"id{i}", "Nome": f"Planilha {i}", "URL": sheet(i)} for i in range(3)]
+
+
+def make(tmp_path, kind):
+    store = get_storage(tmp_path, kind)
+    store.replace_all(links(ROWS))
+    return store
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "csv", "journal"])
+def test_delete_counts_existing_rows(tmp_path, kind):
+    store = make(tmp_path, kind)
+    assert store.apply({"op": "delete", "ids": ["id0", "nada", "id1"]}) == 2
+    assert store.apply({"op": "delete", "ids": ["id0"]}) == 0
+    assert store.load()["ID"].tolist() == ["id2"]
+
+
+# o CSV não devolve contagem de lote
+@pytest.mark.parametrize("kind", ["sqlite", "journal"])
+def test_batch_counts_rows_present_at_each_step(tmp_path, kind):
+    store = make(tmp_path, kind)
+    ops = [
+        {"op": "delete", "ids": ["id0", "nada"]},
+        {"op": "archive", "ids": ["id0", "id1"], "values": {"Ativo": "False"}},
+        {"op": "delete", "ids": ["id1", "id1"]},
+    ]
+    assert store.apply({"op": "batch", "ops": ops}) == 3
+    assert store.load()["ID"].tolist() == ["id2"]
+
+
+def test_journal_counts_without_replaying(tmp_path, monkeypatch):
+    store = make(tmp_path, "journal")
+    monkeypatch.setattr(store, "_load", lambda columns=None: pytest.fail("replay do journal numa gravação"))
+    assert store.apply({"op": "add", "rows": [{"ID": "novo", "Nome": "Nova", "URL": sheet(9)}]}) == 1
+    assert store.apply({"op": "delete", "ids": ["novo", "id0", "nada"]}) == 2
+    assert store.apply({"op": "archive", "ids": ["id0", "id1"], "values": {"Ativo": "False"}}) == 1
+
+
+def test_journal_sees_writes_from_another_process(tmp_path):
+    from central.journal import JournalStorage
+
+    store = make(tmp_path, "journal")
+    store.apply({"op": "delete", "ids": ["nada"]})
+    other = JournalStorage(store.snapshot_path, store.journal_path)
+    other.apply({"op": "delete", "ids": ["id0"]})
+    assert store.apply({"op": "delete", "ids": ["id0", "id1"]}) == 1
+
+
+def test_opening_sqlite_does_not_bump_the_version(tmp_path):
+    store = make(tmp_path, "sqlite")
+    version = store.version()
+    # outro processo abrindo o mesmo banco só roda o DDL idempotente
+    again = SqliteStorage(tmp_path / SQLITE_NAME, tmp_path / CSV_NAME)
+    assert again.version() == store.version() == version
+    assert again.load()["ID"].tolist() == ["id0", "id1", "id2"]
+
+
+def test_legacy_csv_import_bumps_the_version(tmp_path):
+    serialize(links(ROWS)).to_csv(tmp_path / CSV_NAME, index=False)
+    store = SqliteStorage(tmp_path / SQLITE_NAME, tmp_path / CSV_NAME)
+    assert store.version() == 1 and len(store.load()) == 3
+    assert SqliteStorage(tmp_path / SQLITE_NAME, tmp_path / CSV_NAME).version() == 1
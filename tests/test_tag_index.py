@@ -0,0 +1,78 @@
+"""Índice invertido de tags: normalização, postings por commit e copy-on-write."""
+import pytest
+
+from central.tag_index import TagIndex, parse_tags
+
+from conftest import sheet
+
+ROWS = [
+    {"ID": "a", "Nome": "A", "URL": sheet(1), "Tags": "vendas, 2024"},
+    {"ID": "b", "Nome": "B", "URL": sheet(2), "Tags": "vendas,rh"},
+    {"ID": "c", "Nome": "C", "URL": sheet(3), "Tags": "arquivo"},
+]
+
+
+@pytest.mark.parametrize("raw, tags", [
+    (" vendas ,  rh,", ["vendas", "rh"]),
+    (",, ,", []),
+    ("", []),
+    (None, []),
+    (float("nan"), []),
+    ("Shopee", ["Shopee"]),
+])
+def test_parse_tags(raw, tags):
+    assert parse_tags(raw) == tags
+
+
+def test_repeated_tag_in_a_row_is_one_posting(make_catalog):
+    catalog = make_catalog([{"ID": "a", "Nome": "A", "URL": sheet(1), "Tags": "x, x ,y"}])
+    assert catalog.tags.row_codes["a"] == (catalog.tags.codes["x"], catalog.tags.codes["y"])
+    assert catalog.tags.match_all(["x", "y"]) == {"a"}
+
+
+def test_postings_follow_commits(make_catalog):
+    catalog = make_catalog(ROWS)
+    assert catalog.tags.match_all(["vendas"]) == {"a", "b"}
+    assert catalog.tags.tags() == ["2024", "arquivo", "rh", "vendas"]
+
+    catalog.commit({"op": "add", "rows": [{"ID": "d", "Nome": "D", "URL": sheet(4), "Tags": "rh, novo"}]})
+    assert catalog.tags.match_all(["rh"]) == {"b", "d"}
+    assert catalog.tags.match_all(["rh", "novo"]) == {"d"}
+
+    catalog.commit({"op": "edit", "ids": ["b"], "values": {"Tags": "financeiro"}})
+    assert catalog.tags.match_all(["vendas"]) == {"a"}
+    assert catalog.tags.match_all(["rh"]) == {"d"}
+    assert catalog.tags.match_all(["financeiro"]) == {"b"}
+
+    catalog.commit({"op": "delete", "ids": ["d", "a"]})
+    assert catalog.tags.tags() == ["arquivo", "financeiro"]
+    assert catalog.tags.match_all(["vendas"]) == set()
+    assert catalog.tags.tags(["c"]) == ["arquivo"]
+
+    # o índice incremental é igual ao montado do zero
+    rebuilt = TagIndex.build(catalog.snapshot())
+    assert {t: catalog.tags.match_all([t]) for t in catalog.tags.tags()} == \
+        {t: rebuilt.match_all([t]) for t in rebuilt.tags()}
+
+
+def test_archive_keeps_the_same_index(make_catalog):
+    catalog = make_catalog(ROWS)
+    before = catalog.tags
+    catalog.commit({"op": "archive", "ids": ["a"], "values": {"Ativo": "False"}})
+    assert catalog.tags is before
+
+
+def test_older_index_is_not_touched(make_catalog):
+    catalog = make_catalog(ROWS)
+    old = catalog.tags
+    vendas = old.postings[old.codes["vendas"]]
+    catalog.commit({"op": "edit", "ids": ["a"], "values": {"Tags": "rh"}})
+    catalog.commit({"op": "delete", "ids": ["b"]})
+    new = catalog.tags
+    assert new is not old
+    assert old.match_all(["vendas"]) == {"a", "b"} and vendas == {"a", "b"}
+    assert old.match_all(["rh"]) == {"b"} and old.row_codes["a"] == (old.codes["vendas"], old.codes["2024"])
+    assert new.match_all(["vendas"]) == set() and new.match_all(["rh"]) == {"a"}
+    # postings que nenhuma operação tocou continuam compartilhadas
+    assert new.postings[new.codes["arquivo"]] is old.postings[old.codes["arquivo"]]
+    assert new.postings[new.codes["2024"]] is not old.postings[old.codes["2024"]]